@@ -1,28 +1,45 @@
+import copy
 import os
 import uuid
+import hashlib
 from flask import Flask, request, render_template, redirect, url_for, send_from_directory, flash, session, jsonify
 from werkzeug.utils import secure_filename
 from PIL import Image
 from pathlib import Path
 from datetime import datetime, date
 import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 # utils 모듈 경로 추가
 BASE_DIR = Path(__file__).parent
 sys.path.insert(0, str(BASE_DIR))
 
-from utils.detector import InsectDetector
-from utils.classifier import InsectClassifier
-from utils.hierarchical_classifier import HierarchicalClassifier
+# detector / classifier / hierarchical_classifier는 torch, ultralytics, timm 등
+# 무거운 의존성을 가져오므로 첫 추론 시점에 get_* 함수 안에서 import합니다.
+# (/map, /board, 소셜 API만 처리하는 워커는 이 비용을 내지 않음)
 from utils.risk_assessor import get_risk_assessor
 from utils.info_provider import get_info_provider
 from utils.map_location_extract import extract_locations_from_folder
-from utils.classification_storage import get_classification_storage
+from utils.classification_storage import get_classification_storage, compute_filter_level
 from utils.social_storage import get_social_storage
 from utils.weather_provider import get_weather_info, get_weather_icon
+from utils.taxon_resolver import get_taxon_resolver, extract_taxon_label
+from utils.data_watcher import get_data_watcher
+from utils.model_warmup import ModelWarmup, warmup_enabled_from_env, preload_count_from_env
+from utils.session_store import get_session_store, ServerSideSessionInterface
+from utils.detection_cache import get_detection_cache, model_version
+from utils.near_duplicate import boxes_agree, get_near_duplicate_index, image_signature, scale_detections
+from utils.crop_result_cache import get_crop_result_cache
+from utils.crop_archive import get_crop_archiver
+from utils.thumbnails import get_thumbnail_store
 
 app = Flask(__name__)
 app.secret_key = "super-secret-key"  # flash 메시지용. 나중엔 env로 빼는 게 좋음
+# 탐지 결과가 쿠키 크기 제한을 넘지 않도록 세션 내용은 서버에 저장 (쿠키에는 세션 ID만)
+app.session_interface = ServerSideSessionInterface(get_session_store())
 
 # 업로드 폴더 설정
 BASE_DIR = Path(__file__).parent
@@ -38,8 +55,18 @@ app.config["MAX_CONTENT_LENGTH"] = 16 * 1024 * 1024  # 16MB 제한
 # 곤충 탐지기 초기화
 DETECTOR_MODEL_PATH = BASE_DIR / "utils" / "models" / "best_detector.pt"
 CLASSIFIER_MODEL_PATH = BASE_DIR / "utils" / "models" / "best_classifier.pth"
-CROPS_FOLDER = BASE_DIR / "crops"
-CROPS_FOLDER.mkdir(exist_ok=True)
+DETECTOR_CONF_THRESHOLD = 0.25
+DETECTOR_IOU_THRESHOLD = 0.45
+# 큰 JPEG은 긴 변이 이 길이 이상 남는 배율로 축소 디코딩해 탐지 (0이면 원본 해상도)
+DETECTOR_DECODE_LONG_SIDE = int(os.environ.get("NEST_DETECT_DECODE_SIDE", "1280"))
+# 탐지 방식: full(전체 이미지 1회) 또는 tiled(원본 해상도 타일 배치 추론, 작은 곤충용)
+DETECTOR_MODE = os.environ.get("NEST_DETECT_MODE", "full").lower()
+DETECTOR_TILE_SIZE = int(os.environ.get("NEST_DETECT_TILE", "640"))
+DETECTOR_TILE_OVERLAP = float(os.environ.get("NEST_DETECT_TILE_OVERLAP", "0.2"))
+DETECTOR_MERGE_METHOD = os.environ.get("NEST_DETECT_MERGE", "nms").lower()
+# /classify 지연 예산 (ms, 0이면 제한 없음). 계층 분류기 로드가 예산을 넘길 것 같으면
+# 도달한 단계까지만 응답하고 나머지 단계는 백그라운드에서 마저 분류해 저장소를 갱신
+CLASSIFY_BUDGET_MS = int(os.environ.get("NEST_CLASSIFY_BUDGET_MS", "5000"))
 
 detector = None
 classifier = None
@@ -47,28 +74,48 @@ hierarchical_classifier = None
 risk_assessor = None
 info_provider = None
 
+# 동시 첫 요청이 모델을 중복 생성하지 않도록 생성 구간을 잠금
+_model_lock = threading.Lock()
+
 def get_detector():
     """곤충 탐지기 싱글톤 인스턴스 반환"""
     global detector
     if detector is None:
-        model_path = DETECTOR_MODEL_PATH if DETECTOR_MODEL_PATH.exists() else None
-        detector = InsectDetector(model_path=model_path)
+        with _model_lock:
+            if detector is None:
+                from utils.detector import InsectDetector
+                model_path = DETECTOR_MODEL_PATH if DETECTOR_MODEL_PATH.exists() else None
+                detector = InsectDetector(
+                    model_path=model_path,
+                    conf_threshold=DETECTOR_CONF_THRESHOLD,
+                    iou_threshold=DETECTOR_IOU_THRESHOLD,
+                    decode_long_side=DETECTOR_DECODE_LONG_SIDE,
+                    tile_size=DETECTOR_TILE_SIZE,
+                    tile_overlap=DETECTOR_TILE_OVERLAP,
+                    merge_method=DETECTOR_MERGE_METHOD
+                )
     return detector
 
 def get_classifier():
     """곤충 분류기 싱글톤 인스턴스 반환"""
     global classifier
     if classifier is None:
-        model_path = CLASSIFIER_MODEL_PATH if CLASSIFIER_MODEL_PATH.exists() else None
-        classifier = InsectClassifier(model_path=model_path)
+        with _model_lock:
+            if classifier is None:
+                from utils.classifier import InsectClassifier
+                model_path = CLASSIFIER_MODEL_PATH if CLASSIFIER_MODEL_PATH.exists() else None
+                classifier = InsectClassifier(model_path=model_path)
     return classifier
 
 def get_hierarchical_classifier():
     """계층적 분류기 싱글톤 인스턴스 반환"""
     global hierarchical_classifier
     if hierarchical_classifier is None:
-        models_dir = BASE_DIR / "utils" / "models"
-        hierarchical_classifier = HierarchicalClassifier(models_dir=models_dir)
+        with _model_lock:
+            if hierarchical_classifier is None:
+                from utils.hierarchical_classifier import HierarchicalClassifier
+                models_dir = BASE_DIR / "utils" / "models"
+                hierarchical_classifier = HierarchicalClassifier(models_dir=models_dir)
     return hierarchical_classifier
 
 def get_risk_assessor_instance():
@@ -85,6 +132,305 @@ def get_info_provider_instance():
         info_provider = get_info_provider()
     return info_provider
 
+def start_data_watcher():
+    """species_info.json / risk_data.json 변경 시 재시작 없이 자동 리로드"""
+    watcher = get_data_watcher()
+    if watcher.interval <= 0:
+        print("[DATA_WATCHER] 비활성화됨 (NEST_DATA_RELOAD_INTERVAL <= 0)")
+        return
+    provider = get_info_provider_instance()
+    assessor = get_risk_assessor_instance()
+    watcher.watch(provider.data_path, provider.reload)
+    watcher.watch(assessor.data_path, assessor.reload)
+    watcher.start()
+
+start_data_watcher()
+
+# 모델 워밍업 (NEST_WARMUP=1일 때 시작 직후 백그라운드에서 모델 로드 + 더미 추론)
+model_warmup = ModelWarmup(
+    get_detector,
+    get_classifier,
+    get_hierarchical_classifier,
+    get_usage_records=lambda: get_classification_storage().get_all_classifications(),
+    enabled=warmup_enabled_from_env(),
+    preload_count=preload_count_from_env()
+)
+
+# debug 리로더의 감시용 부모 프로세스에서는 모델을 올리지 않음 (실제 서버는 자식 프로세스)
+if not (__name__ == "__main__" and os.environ.get("WERKZEUG_RUN_MAIN") != "true"):
+    model_warmup.start()
+
+def unknown_risk_result(species_name: str) -> dict:
+    """위험도 DB에 없는 종의 기본 위험도 (분류되었지만 미등록)"""
+    return {
+        "species_name": species_name,
+        "threat_level": "미분류",
+        "risk_level_color": "#9E9E9E",
+        "description": "이 종에 대한 위험도 정보가 아직 등록되지 않았습니다.",
+        "warnings": ["⚠️ 알 수 없는 종: 접촉을 피하고 전문가에게 문의하세요"],
+        "response_guide": {
+            "prevention": ["접촉 피하기", "사진 촬영 후 전문가 문의"],
+            "observation": ["안전 거리 유지", "행동 관찰"]
+        }
+    }
+
+def unknown_species_info(species_name: str) -> dict:
+    """정보 DB에 없는 종의 기본 상세 정보"""
+    return {
+        "species_name": species_name,
+        "description": "이 종에 대한 상세 정보가 아직 등록되지 않았습니다.",
+        "note": "전문가에게 문의하거나 추가 조사가 필요합니다."
+    }
+
+def resolve_classification(result: dict):
+    """
+    분류 결과 -> (분류군 레코드, 위험도, 상세 정보)
+
+    분류되었지만 DB에 없는 종은 기본 위험도/정보를 사용하고,
+    종명을 추출할 수 없으면 (None, None, None)을 반환합니다.
+    """
+    species_name = extract_taxon_label(result)
+    record = get_taxon_resolver().resolve(species_name) if species_name else None
+    if record is None:
+        return None, None, None
+    return (
+        record,
+        record['risk'] or unknown_risk_result(record['label']),
+        record['info'] or unknown_species_info(record['label'])
+    )
+
+def build_classification_data(result: dict, record: dict = None, risk_data: dict = None):
+    """
+    계층적 분류 결과 -> 분류 정보 저장소 레코드
+
+    Args:
+        result: HierarchicalClassifier.classify_detections 결과 한 개
+        record: 분류군 해석 결과 (resolve_classification)
+        risk_data: 위험도 평가 결과
+
+    Returns:
+        저장할 분류 정보 dict 또는 None (계층적 분류 결과가 없음)
+    """
+    if 'hierarchical_result' not in result:
+        return None
+    hier_result = result['hierarchical_result']
+    
+    classification_data = {
+        'order': hier_result.get('order', ''),
+        'family': hier_result.get('family', ''),
+        'genus': hier_result.get('genus', ''),
+        'species': hier_result.get('species', ''),
+        'confidence_scores': hier_result.get('confidence_scores', {}),
+        'species_candidates': hier_result.get('species_candidates', [])
+    }
+    
+    # 국명 추출 (여러 소스에서 시도)
+    korean_name = None
+    
+    # 1. 분류군 해석 결과에서 가져오기 (위험도/상세 정보와 같은 레코드 재사용)
+    if record:
+        korean_name = record['korean_name'] or record['label']
+        
+        # 위험도 분류 정보 저장 (species_info의 risk_assessment)
+        if record['info'] and record['info'].get('risk_assessment'):
+            species_risk_assessment = record['info']['risk_assessment']
+            classification_data['threat_level'] = species_risk_assessment.get('threat_level', '')
+            classification_data['risk_category'] = species_risk_assessment.get('risk_category', '')
+            # species_info의 risk_assessment도 저장 (전체 객체)
+            classification_data['risk_assessment_from_species_info'] = species_risk_assessment
+    
+    # 2. 그래도 없으면 과나 속 이름 사용
+    if not korean_name:
+        if classification_data.get('family'):
+            korean_name = classification_data['family']
+        elif classification_data.get('genus'):
+            korean_name = classification_data['genus']
+        elif classification_data.get('order'):
+            korean_name = classification_data['order']
+    
+    # korean_name 저장
+    if korean_name:
+        classification_data['korean_name'] = korean_name
+    
+    # 위험도 평가 결과 전체 저장 (risk_assessment에서)
+    if risk_data:
+        # risk_assessment 전체 객체 저장
+        classification_data['risk_assessment'] = risk_data
+        
+        # 하위 호환성을 위해 개별 필드도 저장
+        if not classification_data.get('threat_level'):
+            threat_level = risk_data.get('threat_level', '')
+            if threat_level == 'unknown' or threat_level == '정보 없음':
+                threat_level = '미분류'
+            classification_data['threat_level'] = threat_level
+            classification_data['risk_level_color'] = risk_data.get('risk_level_color', '')
+    
+    return classification_data
+
+def classify_all_detections(image_path: str, detections: list) -> list:
+    """
+    모든 탐지 박스 계층적 분류 (API용, 크롭 이미지는 저장하지 않음)
+
+    Returns:
+        탐지 박스 순서대로 분류 정보 레코드 (build_classification_data, 분류 실패 박스는 None)
+    """
+    if not detections:
+        return []
+    from utils.classifier import read_rgb_image
+    return classify_detections_batch([(read_rgb_image(image_path), detections)])[0]
+
+def classify_detections_batch(items: list) -> list:
+    """
+    여러 이미지의 탐지 박스를 모아 한 번에 계층적 분류 (일괄 수집용)
+
+    모든 이미지의 크롭을 목 분류 한 배치, 계층적 분류 한 번으로 넘기므로
+    같은 과/속/종 분류기가 필요한 크롭은 이미지가 달라도 함께 추론되고 분류기 로드도 한 번으로 줄어듭니다.
+
+    Args:
+        items: [(RGB 이미지, 탐지 결과 리스트), ...]
+
+    Returns:
+        이미지 순서대로 classify_all_detections와 같은 형식의 레코드 리스트
+    """
+    records = [[None] * len(detections) for _, detections in items]
+    from utils.classifier import bbox_to_pixels
+    crops = []  # (이미지 순번, 박스 인덱스, 박스, 크롭)
+    for position, (image, detections) in enumerate(items):
+        for index, det in enumerate(detections):
+            pixels = bbox_to_pixels(det, image.shape)
+            if pixels is None:
+                continue
+            x1, y1, x2, y2 = pixels
+            cropped = image[y1:y2, x1:x2]
+            if cropped.size == 0:
+                continue
+            crops.append((position, index, det.get('bbox', det) if isinstance(det, dict) else det, cropped))
+    if not crops:
+        return records
+
+    classifier = get_classifier()
+    images = [crop[3] for crop in crops]
+    order_results = classifier.classify_batch(images, top_k=3, use_tta=classifier.tta_mode)
+    hierarchical = get_hierarchical_classifier()
+    try:
+        hierarchical_results = hierarchical.classify_hierarchical_batch(
+            images, [order_result['order'] for order_result in order_results]
+        )
+    except Exception as e:
+        print(f"계층적 분류 오류: {e}")
+        return records
+
+    for (position, index, bbox, _), order_result, hierarchical_result in zip(crops, order_results, hierarchical_results):
+        result = {
+            'detection_idx': index,
+            'bbox': bbox,
+            'classification': hierarchical.build_classification(
+                order_result['order'], order_result['confidence'], hierarchical_result
+            ),
+            'hierarchical_result': hierarchical_result
+        }
+        record, risk, _ = resolve_classification(result)
+        records[position][index] = build_classification_data(result, record, risk)
+    return records
+
+def insect_record_key(image_filename: str, index: int) -> str:
+    """분류 정보 저장소 키 (filename_insect0.jpg, filename_insect1.jpg, ...)"""
+    base_name, ext = os.path.splitext(image_filename)
+    return f"{base_name}_insect{index}{ext}"
+
+# 마감 시간 때문에 중간 단계에서 멈춘(partial) 분류를 마저 수행하는 백그라운드 작업
+_completion_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hier-complete")
+
+def completed_item_key(original_image: str, index: int) -> str:
+    """완료된 분류 결과의 세션 부가 항목 키 (결과 화면 요청이 다른 워커로 가도 읽을 수 있음)"""
+    return f"completed:{original_image}:{index}"
+
+def complete_partial_classifications(sid: str, image_rgb, original_image: str, items: list, expected_timestamps: dict):
+    """
+    partial 분류 결과를 마감 시간 없이 이어서 분류하고 저장소 레코드 갱신
+
+    완료된 결과는 세션 저장소의 부가 항목으로 남기고, 결과 화면 요청이 세션에 반영합니다.
+
+    Args:
+        sid: 요청한 세션 ID
+        image_rgb: 원본 RGB 이미지
+        original_image: 업로드 파일명
+        items: [(개체 인덱스, partial 분류 결과), ...]
+        expected_timestamps: {레코드 키: partial 결과를 저장한 timestamp}
+            그 사이 같은 박스를 다시 분류해 레코드가 바뀌었으면 덮어쓰지 않음
+    """
+    try:
+        hierarchical = get_hierarchical_classifier()
+        crops = []
+        for _, result in items:
+            x1, y1, x2, y2 = map(int, result['bbox'][:4])
+            crops.append(image_rgb[y1:y2, x1:x2])
+        completed = hierarchical.classify_hierarchical_batch(
+            crops,
+            [result['hierarchical_result']['order'] for _, result in items],
+            initial=[result['hierarchical_result'] for _, result in items]
+        )
+
+        records = {}
+        results = {}
+        for (index, result), hier_result in zip(items, completed):
+            order_entry = result['classification'][0]
+            result = dict(result)
+            result['hierarchical_result'] = hier_result
+            result['classification'] = hierarchical.build_classification(
+                order_entry['class_name'], order_entry['confidence'], hier_result
+            )
+            record, risk, info = resolve_classification(result)
+            classification_data = build_classification_data(result, record, risk)
+            if classification_data is not None:
+                records[insect_record_key(original_image, index)] = classification_data
+            results[index] = (result, risk, info)
+
+        saved = set(get_classification_storage().save_classifications(
+            records, expected_timestamps={key: expected_timestamps.get(key) for key in records}
+        ))
+        # 저장소에서 밀려난(그 사이 다시 분류된) 항목은 세션에도 반영하지 않음
+        done = [index for index in results if insect_record_key(original_image, index) in saved]
+        session_store = get_session_store()
+        for index in done:
+            result, risk, info = results[index]
+            session_store.set_item(sid, completed_item_key(original_image, index), app.session_interface.encode({
+                'result': result, 'risk': risk, 'info': info
+            }))
+        print(f"[CLASSIFY] 부분 분류 완료: {original_image} {done}")
+    except Exception as e:
+        print(f"[CLASSIFY] 부분 분류 완료 실패 ({original_image}): {e}")
+
+def apply_completed_classifications(sid: str, detection: dict) -> bool:
+    """
+    세션의 partial 분류 결과를 백그라운드에서 완료된 결과로 교체
+
+    Returns:
+        바뀐 항목이 있으면 True
+    """
+    if not detection or not detection.get('classifications'):
+        return False
+    session_store = get_session_store()
+    changed = False
+    for index, result in enumerate(detection['classifications']):
+        if not result or not (result.get('hierarchical_result') or {}).get('partial'):
+            continue
+        blob = session_store.pop_item(sid, completed_item_key(detection.get('original_image'), index))
+        if blob is None:
+            continue
+        completed = app.session_interface.decode(blob)
+        # 그 사이 박스를 바꿔 다시 분류했으면 적용하지 않음
+        if completed['result'].get('bbox') != result.get('bbox'):
+            continue
+        completed_result, risk, info = completed['result'], completed['risk'], completed['info']
+        detection['classifications'][index] = completed_result
+        if detection.get('risk_assessment') and index < len(detection['risk_assessment']):
+            detection['risk_assessment'][index] = risk
+        if detection.get('detailed_info') and index < len(detection['detailed_info']):
+            detection['detailed_info'][index] = info
+        changed = True
+    return changed
+
 # 허용 확장자
 ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "gif", "webp"}
 
@@ -104,6 +450,81 @@ def detect_image_ext(path: str) -> str | None:
     except Exception:
         return None
 
+# 크롭 결과 캐시를 무효화해야 하는 분류 설정 (utils.classifier/hierarchical_classifier가 읽는 환경 변수)
+CLASSIFICATION_CACHE_ENV = (
+    "NEST_TTA_MODE", "NEST_TTA_MIN_MARGIN", "NEST_TTA_MAX_ENTROPY", "NEST_HIER_BEAM",
+)
+
+def hierarchical_models_signature() -> str:
+    """과/속/종 분류기 파일 목록 해시 (파일 이름/수정 시각/크기)"""
+    models_dir = BASE_DIR / "utils" / "models"
+    entries = []
+    for level in ('family', 'genus', 'species'):
+        for path in sorted((models_dir / level).glob("best_*")):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append(f"{level}/{path.name}:{stat.st_mtime_ns}:{stat.st_size}")
+    return hashlib.sha256('|'.join(entries).encode('utf-8')).hexdigest()[:16]
+
+def classification_version() -> str:
+    """크롭 결과 캐시 키에 쓰는 분류 버전 (목 모델 + 계층 분류기 파일 + TTA/beam 설정, 모델을 로드하지 않고 계산)"""
+    return model_version(
+        CLASSIFIER_MODEL_PATH,
+        hierarchy=hierarchical_models_signature(),
+        **{name.lower(): os.environ.get(name, '') for name in CLASSIFICATION_CACHE_ENV}
+    )
+
+def detector_model_version(mode: str = None) -> str:
+    """탐지 캐시 키에 쓰는 탐지 모델 버전 (모델을 로드하지 않고 계산)"""
+    mode = mode or DETECTOR_MODE
+    return model_version(
+        DETECTOR_MODEL_PATH,
+        conf=DETECTOR_CONF_THRESHOLD,
+        iou=DETECTOR_IOU_THRESHOLD,
+        decode=DETECTOR_DECODE_LONG_SIDE,
+        mode=mode,
+        tile=DETECTOR_TILE_SIZE if mode == "tiled" else 0,
+        overlap=DETECTOR_TILE_OVERLAP if mode == "tiled" else 0,
+        merge=DETECTOR_MERGE_METHOD if mode == "tiled" else ""
+    )
+
+def save_upload_with_hash(file_storage, save_path: str, chunk_size: int = 64 * 1024) -> str:
+    """업로드 파일을 디스크에 쓰면서 SHA-256 계산 (원본 바이트 그대로 저장)"""
+    digest = hashlib.sha256()
+    with open(save_path, 'wb') as out:
+        while True:
+            chunk = file_storage.stream.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+            out.write(chunk)
+    return digest.hexdigest()
+
+@app.template_global()
+def thumbnail_url(filename: str, size: int = 256) -> str:
+    """
+    업로드 이미지의 썸네일 URL (템플릿용)
+
+    썸네일이 아직 없으면(이전 업로드 등) 백그라운드 생성을 예약하고 원본 URL을 반환합니다.
+    """
+    store = get_thumbnail_store()
+    name = store.get_name(filename, size)
+    if name:
+        return url_for('thumbnail_file', name=name)
+    source_path = UPLOAD_FOLDER / filename
+    if source_path.is_file():
+        store.submit(source_path, filename)
+    return url_for('uploaded_file', filename=filename)
+
+def attach_thumbnail_urls(observations: list) -> list:
+    """JS에서 쓰는 관찰 목록에 목록용/상세용 썸네일 URL 추가"""
+    for obs in observations:
+        obs['thumb_url'] = thumbnail_url(obs['filename'], 256)
+        obs['preview_url'] = thumbnail_url(obs['filename'], 768)
+    return observations
+
 def ensure_unique_filename(original_filename: str) -> str:
     """Generate a safe unique filename while preserving extension."""
     safe = secure_filename(original_filename)
@@ -141,7 +562,7 @@ def index():
         filename = ensure_unique_filename(file.filename)
         save_path = os.path.join(app.config["UPLOAD_FOLDER"], filename)
 
-        file.save(save_path)  # 여기서 실제 바이트 그대로 저장
+        content_hash = save_upload_with_hash(file, save_path)  # 원본 바이트 그대로 저장 + 해시
 
         # 저장된 파일이 진짜 이미지인지, 그리고 확장자가 맞는지 검증
         real_ext = detect_image_ext(save_path)
@@ -163,28 +584,75 @@ def index():
             filename = new_filename
             save_path = new_path
 
+        # 게시판/지도용 썸네일은 백그라운드에서 생성
+        get_thumbnail_store().submit(save_path, filename, content_hash)
+
         # 곤충 탐지 수행
         try:
-            detector = get_detector()
+            # 박스가 그려진 결과 이미지는 /results 요청 시에만 렌더링 (화면은 브라우저에서 박스를 그림)
             result_filename = f"detected_{filename}"
-            result_path = os.path.join(app.config["RESULTS_FOLDER"], result_filename)
             
-            detection_result = detector.detect(save_path, save_path=result_path)
-            print(f"탐지: {detection_result['count']}개")
+            # 같은 사진을 다시 올린 경우 캐시된 탐지 결과 사용 (추론 생략)
+            detection_cache = get_detection_cache()
+            version = detector_model_version()
+            detections = detection_cache.get(content_hash, version)
+            if detections is not None:
+                print(f"[DETECTION_CACHE] 캐시 적중: {content_hash[:12]} ({len(detections)}개)")
+            
+            # 연사 등 같은 세션의 근접 중복 이미지면 이전 탐지 결과를 좌표만 맞춰 재사용
+            # (저해상도 확인 탐지와 박스가 일치할 때만)
+            near_dup_index = get_near_duplicate_index()
+            signature = image_signature(save_path) if near_dup_index.enabled else None
+            phash, image_size = signature if signature else (None, None)
+            near_duplicate = None
+            if detections is None and phash is not None:
+                near = near_dup_index.find(phash, version, session.sid, size=image_size, exclude_hash=content_hash)
+                prior = detection_cache.get(near['content_hash'], version) if near else None
+                if prior is not None:
+                    candidate = scale_detections(prior, tuple(near['size']), image_size)
+                    preview = get_detector().detect_preview(save_path, near_dup_index.confirm_size)
+                    accepted = boxes_agree(candidate, preview, near_dup_index.confirm_iou)
+                    near_dup_index.record_confirmation(accepted)
+                    if accepted:
+                        # 빌려 온 박스는 이 이미지의 내용 해시 캐시에 넣지 않음 (탐지기가 만든 결과만 캐시)
+                        detections = candidate
+                        near_duplicate = {'original_image': near['original_image'], 'distance': near['distance']}
+                        print(f"[NEAR_DUP] 근접 중복 재사용: {near['original_image']} (거리 {near['distance']})")
+                    else:
+                        print(f"[NEAR_DUP] 확인 탐지 불일치, 전체 탐지 수행: {near['original_image']} (거리 {near['distance']})")
+            
+            if detections is None:
+                detector = get_detector()
+                detection_result = detector.detect(save_path, mode=DETECTOR_MODE)
+                detections = detection_result['detections']
+                detection_cache.put(content_hash, version, detections)
+            print(f"탐지: {len(detections)}개")
+            
+            # 다른 이미지에서 빌려 온 결과는 다시 빌려 주지 않음 (이 이미지의 탐지 캐시에 없음)
+            if near_duplicate is None:
+                near_dup_index.add(phash, {
+                    'content_hash': content_hash,
+                    'model_version': version,
+                    'size': image_size,
+                    'original_image': filename,
+                    'owner': session.sid
+                })
             
             # 탐지 결과만 저장 (분류는 사용자가 확인 버튼을 눌렀을 때 수행)
             session['last_detection'] = {
                 'original_image': filename,
                 'detected_image': result_filename,
-                'count': detection_result['count'],
-                'detections': detection_result['detections'],
+                'content_hash': content_hash,
+                'near_duplicate_of': near_duplicate,
+                'count': len(detections),
+                'detections': detections,
                 'classifications': None,  # 분류는 나중에 수행
                 'risk_assessment': None,  # 위험도 평가는 나중에 수행
                 'species_info': None  # 정보 제공은 나중에 수행
             }
             
-            if detection_result['count'] > 0:
-                flash(f"업로드 완료! {detection_result['count']}개의 곤충이 탐지되었습니다. 바운딩 박스를 조정한 후 확인 버튼을 눌러주세요.")
+            if detections:
+                flash(f"업로드 완료! {len(detections)}개의 곤충이 탐지되었습니다. 바운딩 박스를 조정한 후 확인 버튼을 눌러주세요.")
             else:
                 flash("업로드 완료! 곤충이 탐지되지 않았습니다.")
                 
@@ -206,6 +674,10 @@ def index():
         # show_result 쿼리 파라미터가 있으면 결과 표시 (POST 후 리다이렉트)
         if request.args.get('show_result') == 'true':
             detection = session.get('last_detection', None)
+            # 백그라운드에서 마저 분류된 결과 반영
+            if apply_completed_classifications(session.sid, detection):
+                session['last_detection'] = detection
+                session.modified = True
         else:
             # 직접 접근 또는 새로고침 시 세션 초기화
             session.pop('last_detection', None)
@@ -217,10 +689,39 @@ def index():
 def uploaded_file(filename):
     return send_from_directory(app.config["UPLOAD_FOLDER"], filename)
 
-# 탐지 결과 이미지 서빙
+# 썸네일 서빙 (내용 해시 기반 이름이므로 영구 캐시)
+@app.route("/thumbs/<name>")
+def thumbnail_file(name):
+    store = get_thumbnail_store()
+    # 인덱스(index.json)나 작성 중인 임시 파일은 영구 캐시되면 안 되므로 썸네일 이름만 허용
+    if not store.is_thumbnail_name(name):
+        return "썸네일을 찾을 수 없습니다.", 404
+    response = send_from_directory(store.thumb_dir, name, max_age=365 * 24 * 3600)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+# 탐지 결과 이미지 서빙 (요청 시 렌더링, 박스가 바뀌지 않으면 캐시 파일 재사용)
 @app.route("/results/<filename>")
 def result_file(filename):
-    return send_from_directory(app.config["RESULTS_FOLDER"], filename)
+    # 이전 버전에서 업로드 시점에 저장해 둔 결과 이미지
+    if (RESULTS_FOLDER / filename).is_file():
+        return send_from_directory(app.config["RESULTS_FOLDER"], filename)
+    
+    detection = session.get('last_detection')
+    if not detection or detection.get('detected_image') != filename:
+        return "결과 이미지를 찾을 수 없습니다.", 404
+    
+    from utils.annotation import render_annotated
+    rendered = render_annotated(
+        UPLOAD_FOLDER / detection['original_image'],
+        detection.get('detections') or [],
+        RESULTS_FOLDER,
+        stem=Path(filename).stem
+    )
+    if rendered is None:
+        return "결과 이미지를 만들 수 없습니다.", 404
+    return send_from_directory(app.config["RESULTS_FOLDER"], rendered.name)
 
 # 세션 초기화 라우트
 @app.route("/reset", methods=["GET", "POST"])
@@ -252,6 +753,7 @@ def update_bboxes():
 @app.route("/classify", methods=["POST"])
 def classify():
     """조정된 바운딩 박스로 분류 및 위험도 평가 수행"""
+    deadline = time.perf_counter() + CLASSIFY_BUDGET_MS / 1000 if CLASSIFY_BUDGET_MS > 0 else None
     try:
         # JSON 파싱 시도, 실패하면 빈 딕셔너리 사용
         try:
@@ -260,6 +762,17 @@ def classify():
             data = {}
         bboxes = data.get('bboxes', [])
         selected_index = data.get('selected_index', 0)
+        # 여러 박스를 한 요청에서 배치 분류: selected_indices 목록 또는 classify_all
+        selected_indices = data.get('selected_indices')
+        classify_all = str(data.get('classify_all', '')).lower() in ('1', 'true', 'yes', 'on') or selected_index == 'all'
+        if selected_indices is not None:
+            # 정수(또는 정수 문자열) 목록만 허용
+            try:
+                if not isinstance(selected_indices, list) or any(isinstance(i, (bool, float)) for i in selected_indices):
+                    raise ValueError(selected_indices)
+                selected_indices = [int(i) for i in selected_indices]
+            except (TypeError, ValueError):
+                return jsonify({'success': False, 'error': 'selected_indices는 정수 목록이어야 합니다.'}), 400
         
         # 세션에서 바운딩 박스 가져오기 (JSON에 없으면)
         if not bboxes and 'last_detection' in session:
@@ -281,28 +794,66 @@ def classify():
         detection['detections'] = bboxes
         detection['count'] = len(bboxes)
         
-        # 분류 수행 (2단계: 목 분류 -> 계층적 분류)
-        classification_results = None
-        risk_assessment = None
-        species_info = None
+        # 분류할 박스 인덱스 (기본: selected_index 하나)
+        if classify_all:
+            target_indices = list(range(len(bboxes)))
+        elif isinstance(selected_indices, list):
+            target_indices = sorted({i for i in selected_indices if 0 <= i < len(bboxes)})
+        elif isinstance(selected_index, int) and 0 <= selected_index < len(bboxes):
+            target_indices = [selected_index]
+        else:
+            target_indices = []
+        
+        # 박스를 조금만 옮긴 경우 이전 분류 결과 재사용 (세션별 크롭 결과 캐시)
+        # 캐시 상태는 세션 본문 대신 세션 저장소의 부가 항목에 둠 (세션 크기 유지)
+        crop_cache = get_crop_result_cache()
+        session_store = get_session_store()
+        detection.pop('crop_cache', None)
+        cache_blob = session_store.get_item(session.sid, 'crop_cache')
+        cache_state = app.session_interface.decode(cache_blob) if cache_blob else {}
+        content_hash = detection.get('content_hash')
+        classifier_version = classification_version()
+        results_by_index = {}
+        for index in target_indices:
+            cached = crop_cache.lookup(cache_state, content_hash, classifier_version, bboxes[index])
+            if cached is not None:
+                results_by_index[index] = cached
+        pending_indices = [index for index in target_indices if index not in results_by_index]
+        cache_hits = len(results_by_index)
+        if results_by_index:
+            print(f"[CROP_CACHE] 분류 결과 재사용: {sorted(results_by_index)} (새로 분류: {pending_indices})")
+        
+        cache_changed = False
         
-        # 선택된 바운딩 박스만 분류
-        if len(bboxes) > 0 and selected_index < len(bboxes):
+        # 분류 수행 (2단계: 목 분류 -> 계층적 분류)
+        tta_summary = {'crops': 0, 'tta_run': 0, 'tta_skipped': 0}
+        if pending_indices:
             try:
                 # 선택된 바운딩 박스만 추출
-                selected_bbox = [bboxes[selected_index]]
+                selected_bbox = [bboxes[i] for i in pending_indices]
                 
-                # 1단계: 목 분류
+                # 원본 이미지는 한 번만 디코딩해 두 단계가 같이 사용
                 classifier = get_classifier()
+                from utils.classifier import read_rgb_image
+                image_rgb = read_rgb_image(save_path)
+                
+                # 1단계: 목 분류
+                # 크롭은 메모리에서만 사용 (파일 보관은 NEST_CROP_ARCHIVE=1일 때 백그라운드로)
                 order_results = classifier.classify_detections(
                     save_path,
                     selected_bbox,
-                    crop_dir=str(CROPS_FOLDER)
+                    image=image_rgb
                 )
                 
+                # 확신이 높아 반전/회전 추론을 생략한 크롭 수 (NEST_TTA_MODE=adaptive)
+                tta_summary['crops'] = len(order_results)
+                tta_summary['tta_run'] = sum(1 for result in order_results if result.get('tta'))
+                tta_summary['tta_skipped'] = tta_summary['crops'] - tta_summary['tta_run']
+                print(f"[TTA] 목 분류 {tta_summary['crops']}개 중 TTA 수행 {tta_summary['tta_run']}개, 생략 {tta_summary['tta_skipped']}개")
+                
                 # 목 분류 결과 로그 출력
-                for i, result in enumerate(order_results):
-                    print(f"\n=== 곤충 #{i+1} 목 분류 결과 ===")
+                for result in order_results:
+                    print(f"\n=== 곤충 #{pending_indices[result['detection_idx']]+1} 목 분류 결과 ===")
                     if result.get('classification'):
                         print("상위 3개 목 후보:")
                         for j, cls in enumerate(result['classification'][:3]):
@@ -315,312 +866,129 @@ def classify():
                         save_path,
                         selected_bbox,
                         order_results,
-                        crop_dir=str(CROPS_FOLDER)
+                        image=image_rgb,
+                        deadline=deadline
                     )
                 except Exception as hier_error:
                     print(f"계층적 분류 오류: {hier_error}")
                     print("기본 목 분류 결과만 사용")
                     classification_results = order_results
                 
-                # 3단계: 위험도 평가
-                try:
-                    assessor = get_risk_assessor_instance()
-                    risk_assessment = []
-                    
-                    print(f"분류 결과 개수: {len(classification_results)}")
-                    
-                    for i, result in enumerate(classification_results):
-                        print(f"\n=== 곤충 #{i+1} 분류 결과 ===")
-                        print(f"결과 구조: {type(result)}")
-                        
-                        # 분류 결과에서 종명 추출
-                        species_name = None
-                        
-                        # 계층적 분류 결과 구조 파싱
-                        if isinstance(result, dict):
-                            print(f"결과 키들: {list(result.keys())}")
-                            
-                            # hierarchical_result에서 추출
-                            if 'hierarchical_result' in result:
-                                hier_result = result['hierarchical_result']
-                                print(f"계층적 결과: {hier_result}")
-                                if hier_result.get('species'):
-                                    species_name = hier_result['species']
-                                    print(f"종 발견: {species_name}")
-                                elif hier_result.get('genus'):
-                                    species_name = hier_result['genus']
-                                    print(f"속 발견: {species_name}")
-                                elif hier_result.get('family'):
-                                    species_name = hier_result['family']
-                                    print(f"과 발견: {species_name}")
-                                elif hier_result.get('order'):
-                                    species_name = hier_result['order']
-                                    print(f"목 발견: {species_name}")
-                            
-                            # classification 리스트에서 추출
-                            elif 'classification' in result and result['classification']:
-                                print(f"분류 리스트: {result['classification']}")
-                                # 종 레벨부터 역순으로 검색
-                                for cls in reversed(result['classification']):
-                                    if cls.get('level') == 'species' and cls.get('class_name'):
-                                        species_name = cls['class_name']
-                                        print(f"종 발견 (분류): {species_name}")
-                                        break
-                                    elif cls.get('level') == 'genus' and cls.get('class_name'):
-                                        species_name = cls['class_name']
-                                        print(f"속 발견 (분류): {species_name}")
-                                        break
-                                    elif cls.get('level') == 'family' and cls.get('class_name'):
-                                        species_name = cls['class_name']
-                                        print(f"과 발견 (분류): {species_name}")
-                                        break
-                                    elif cls.get('level') == 'order' and cls.get('class_name'):
-                                        species_name = cls['class_name']
-                                        print(f"목 발견 (분류): {species_name}")
-                                        break
-                        
-                        print(f"최종 추출된 종명: {species_name}")
-                        
-                        # 위험도 평가 수행
-                        if species_name:
-                            # 후보 표시 제거 (예: "Vespa mandarinia (후보 #2)" -> "Vespa mandarinia")
-                            clean_name = species_name.split(' (후보')[0].strip()
-                            print(f"정리된 종명: {clean_name}")
-                            
-                            risk_result = assessor.assess_risk(clean_name)
-                            print(f"위험도 평가 결과: {risk_result is not None}")
-                            
-                            if risk_result:
-                                risk_assessment.append(risk_result)
-                            else:
-                                # 기본 위험도 (분류되었지만 위험도 DB에 없는 경우)
-                                risk_assessment.append({
-                                    "species_name": clean_name,
-                                    "threat_level": "미분류",
-                                    "risk_level_color": "#9E9E9E",
-                                    "description": "이 종에 대한 위험도 정보가 아직 등록되지 않았습니다.",
-                                    "warnings": ["⚠️ 알 수 없는 종: 접촉을 피하고 전문가에게 문의하세요"],
-                                    "response_guide": {
-                                        "prevention": ["접촉 피하기", "사진 촬영 후 전문가 문의"],
-                                        "observation": ["안전 거리 유지", "행동 관찰"]
-                                    }
-                                })
-                        else:
-                            print("종명을 추출할 수 없음")
-                            risk_assessment.append(None)
+                # 감사용 크롭 보관 (내용 해시 파일명, 요청 경로 밖에서 인코딩/저장)
+                crop_archiver = get_crop_archiver()
+                if crop_archiver is not None:
+                    crop_archiver.submit(image_rgb, [
+                        (pending_indices[result['detection_idx']], result['bbox']) for result in order_results
+                    ], original_image)
                 
-                except Exception as risk_error:
-                    print(f"위험도 평가 오류: {risk_error}")
-                    import traceback
-                    traceback.print_exc()
-                    risk_assessment = None
-                
-                # 4단계: 상세 정보 제공
-                try:
-                    provider = get_info_provider_instance()
-                    species_info = []
-                    
-                    for i, result in enumerate(classification_results):
-                        # 분류 결과에서 종명 추출 (위험도 평가와 동일한 로직)
-                        species_name = None
-                        
-                        if isinstance(result, dict):
-                            print(f"[INFO] 분류 결과 #{i+1} 키: {list(result.keys())}")
-                            
-                            # hierarchical_result에서 추출
-                            if 'hierarchical_result' in result:
-                                hier_result = result['hierarchical_result']
-                                print(f"[INFO] hierarchical_result: {hier_result}")
-                                if hier_result.get('species'):
-                                    species_name = hier_result['species']
-                                    print(f"[INFO] hierarchical_result에서 종 추출: {species_name}")
-                                elif hier_result.get('genus'):
-                                    species_name = hier_result['genus']
-                                    print(f"[INFO] hierarchical_result에서 속 추출: {species_name}")
-                                elif hier_result.get('family'):
-                                    species_name = hier_result['family']
-                                    print(f"[INFO] hierarchical_result에서 과 추출: {species_name}")
-                                elif hier_result.get('order'):
-                                    species_name = hier_result['order']
-                                    print(f"[INFO] hierarchical_result에서 목 추출: {species_name}")
-                            
-                            # classification 리스트에서 추출 (hierarchical_result에 없을 경우)
-                            if not species_name and 'classification' in result and result['classification']:
-                                print(f"[INFO] classification 리스트에서 추출 시도: {len(result['classification'])}개 항목")
-                                for cls in reversed(result['classification']):
-                                    print(f"[INFO]   - level: {cls.get('level')}, class_name: {cls.get('class_name')}")
-                                    if cls.get('level') == 'species' and cls.get('class_name'):
-                                        species_name = cls['class_name']
-                                        print(f"[INFO] classification에서 종 추출: {species_name}")
-                                        break
-                                    elif cls.get('level') == 'genus' and cls.get('class_name'):
-                                        species_name = cls['class_name']
-                                        print(f"[INFO] classification에서 속 추출: {species_name}")
-                                        break
-                                    elif cls.get('level') == 'family' and cls.get('class_name'):
-                                        species_name = cls['class_name']
-                                        print(f"[INFO] classification에서 과 추출: {species_name}")
-                                        break
-                                    elif cls.get('level') == 'order' and cls.get('class_name'):
-                                        species_name = cls['class_name']
-                                        print(f"[INFO] classification에서 목 추출: {species_name}")
-                                        break
-                        
-                        # 정보 제공
-                        if species_name:
-                            # 후보 표시 제거
-                            clean_name = species_name.split(' (후보')[0].strip()
-                            # 언더스코어를 공백으로 변환 (Vespa_mandarinia -> Vespa mandarinia)
-                            clean_name = clean_name.replace('_', ' ')
-                            print(f"[INFO] 정보 조회 종명: '{clean_name}' (원본: '{species_name}')")
-                            
-                            info_result = provider.get_info(clean_name)
-                            print(f"[INFO] 정보 조회 결과: {info_result is not None}")
-                            if info_result:
-                                print(f"[INFO] 정보 조회 성공: {info_result.get('species_name', 'N/A')}")
-                                species_info.append(info_result)
-                            else:
-                                print(f"[INFO] 정보 조회 실패: '{clean_name}'에 대한 정보 없음")
-                                species_info.append({
-                                    "species_name": clean_name,
-                                    "description": "이 종에 대한 상세 정보가 아직 등록되지 않았습니다.",
-                                    "note": "전문가에게 문의하거나 추가 조사가 필요합니다."
-                                })
-                        else:
-                            print(f"[INFO] 종명을 추출할 수 없음 (result: {result})")
-                            species_info.append(None)
-                
-                except Exception as info_error:
-                    print(f"정보 제공 오류: {info_error}")
-                    import traceback
-                    traceback.print_exc()
-                    species_info = None
+                for result in classification_results:
+                    index = pending_indices[result['detection_idx']]
+                    results_by_index[index] = result
+                    # 계층적 분류까지 끝난 결과만 캐시 (목 분류만 되었거나 partial이면 다음에 다시 시도)
+                    if 'hierarchical_result' in result and not result['hierarchical_result'].get('partial'):
+                        crop_cache.store(cache_state, content_hash, classifier_version, bboxes[index], result)
+                        cache_changed = True
                 
             except Exception as e:
                 print(f"분류 중 오류 발생: {str(e)}")
                 import traceback
                 traceback.print_exc()
-                classification_results = None
-                risk_assessment = None
-                species_info = None
         
-        # 세션 업데이트 - 선택된 인덱스에만 저장
-        total_detections = len(detection['detections'])
-        if not detection.get('classifications'):
-            detection['classifications'] = [None] * total_detections
-        if not detection.get('risk_assessment'):
-            detection['risk_assessment'] = [None] * total_detections
-        if not detection.get('detailed_info'):
-            detection['detailed_info'] = [None] * total_detections
+        if cache_changed:
+            session_store.set_item(session.sid, 'crop_cache', app.session_interface.encode(cache_state))
         
-        # 인덱스 범위 확인
-        if selected_index >= total_detections:
-            print(f"경고: selected_index({selected_index})가 범위를 벗어남. 0으로 설정")
-            selected_index = 0
+        # 3단계: 분류군 해석 (위험도 평가 + 상세 정보, 캐시 적중 결과 포함)
+        classified_indices = sorted(results_by_index)
+        taxon_records = None
+        risk_assessment = None
+        species_info = None
+        try:
+            taxon_records = []
+            risk_assessment = []
+            species_info = []
+            
+            print(f"분류 결과 개수: {len(classified_indices)}")
+            
+            for index in classified_indices:
+                result = results_by_index[index]
+                result['detection_idx'] = index
+                print(f"\n=== 곤충 #{index+1} 최종 추출된 종명: {extract_taxon_label(result)} ===")
+                
+                # 분류되었지만 DB에 없는 경우 기본값 사용
+                record, risk, info = resolve_classification(result)
+                if record is None:
+                    print("종명을 추출할 수 없음")
+                taxon_records.append(record)
+                risk_assessment.append(risk)
+                species_info.append(info)
         
-        if classification_results and len(classification_results) > 0:
-            detection['classifications'][selected_index] = classification_results[0]
-        if risk_assessment and len(risk_assessment) > 0:
-            detection['risk_assessment'][selected_index] = risk_assessment[0]
-        if species_info and len(species_info) > 0:
-            detection['detailed_info'][selected_index] = species_info[0]
+        except Exception as resolve_error:
+            print(f"분류군 해석 오류: {resolve_error}")
+            import traceback
+            traceback.print_exc()
+            taxon_records = None
+            risk_assessment = None
+            species_info = None
         
-        # 분류 정보를 파일로 저장
-        if classification_results and len(classification_results) > 0:
+        # 세션 업데이트 - 분류한 인덱스에만 저장
+        total_detections = len(detection['detections'])
+        for field in ('classifications', 'risk_assessment', 'detailed_info'):
+            values = detection.get(field) or []
+            # 박스가 추가되었으면 길이를 맞춤
+            detection[field] = (values + [None] * total_detections)[:total_detections]
+        
+        records = {}
+        for position, index in enumerate(classified_indices):
+            result = results_by_index[index]
+            detection['classifications'][index] = result
+            if risk_assessment:
+                detection['risk_assessment'][index] = risk_assessment[position]
+            if species_info:
+                detection['detailed_info'][index] = species_info[position]
+            
+            record = taxon_records[position] if taxon_records else None
+            risk_data = risk_assessment[position] if risk_assessment else None
+            classification_data = build_classification_data(result, record, risk_data)
+            if classification_data is not None:
+                # 파일명에 개체 인덱스 추가 (filename_insect0, filename_insect1, ...)
+                records[insect_record_key(original_image, index)] = classification_data
+        
+        # 분류 정보를 파일로 저장 (여러 건이어도 한 번에 기록)
+        if records:
             try:
-                storage = get_classification_storage()
-                result = classification_results[0]
-                
-                # 계층적 분류 결과에서 정보 추출
-                if 'hierarchical_result' in result:
-                    hier_result = result['hierarchical_result']
-                    
-                    classification_data = {
-                        'order': hier_result.get('order', ''),
-                        'family': hier_result.get('family', ''),
-                        'genus': hier_result.get('genus', ''),
-                        'species': hier_result.get('species', ''),
-                        'confidence_scores': hier_result.get('confidence_scores', {}),
-                        'species_candidates': hier_result.get('species_candidates', [])
-                    }
-                    
-                    # 국명 추출 (여러 소스에서 시도)
-                    korean_name = None
-                    
-                    # 1. species_info에서 가져오기 (우선순위 1)
-                    if species_info and len(species_info) > 0 and species_info[0]:
-                        korean_name = species_info[0].get('korean_name') or species_info[0].get('species_name', '')
-                        
-                        # 위험도 분류 정보 저장 (species_info의 risk_assessment)
-                        if species_info[0].get('risk_assessment'):
-                            species_risk_assessment = species_info[0]['risk_assessment']
-                            classification_data['threat_level'] = species_risk_assessment.get('threat_level', '')
-                            classification_data['risk_category'] = species_risk_assessment.get('risk_category', '')
-                            # species_info의 risk_assessment도 저장 (전체 객체)
-                            classification_data['risk_assessment_from_species_info'] = species_risk_assessment
-                    
-                    # 2. species_info에 없으면 info_provider에서 직접 조회
-                    if not korean_name and classification_data.get('species'):
-                        try:
-                            provider = get_info_provider_instance()
-                            # species에서 언더스코어를 공백으로 변환
-                            clean_species = classification_data['species'].replace('_', ' ')
-                            info_result = provider.get_info(clean_species)
-                            if info_result:
-                                korean_name = info_result.get('korean_name') or info_result.get('species_name', '')
-                                # 위험도 정보도 함께 저장
-                                if info_result.get('risk_assessment'):
-                                    species_risk_assessment = info_result['risk_assessment']
-                                    classification_data['threat_level'] = species_risk_assessment.get('threat_level', '')
-                                    classification_data['risk_category'] = species_risk_assessment.get('risk_category', '')
-                                    # species_info의 risk_assessment도 저장 (전체 객체)
-                                    classification_data['risk_assessment_from_species_info'] = species_risk_assessment
-                        except Exception as info_error:
-                            print(f"정보 조회 오류 (저장 시): {info_error}")
-                    
-                    # 3. 그래도 없으면 과나 속 이름 사용
-                    if not korean_name:
-                        if classification_data.get('family'):
-                            korean_name = classification_data['family']
-                        elif classification_data.get('genus'):
-                            korean_name = classification_data['genus']
-                        elif classification_data.get('order'):
-                            korean_name = classification_data['order']
-                    
-                    # korean_name 저장
-                    if korean_name:
-                        classification_data['korean_name'] = korean_name
-                    
-                    # 위험도 평가 결과 전체 저장 (risk_assessment에서)
-                    if risk_assessment and len(risk_assessment) > 0 and risk_assessment[0]:
-                        risk_data = risk_assessment[0]
-                        # risk_assessment 전체 객체 저장
-                        classification_data['risk_assessment'] = risk_data
-                        
-                        # 하위 호환성을 위해 개별 필드도 저장
-                        if not classification_data.get('threat_level'):
-                            threat_level = risk_data.get('threat_level', '')
-                            if threat_level == 'unknown' or threat_level == '정보 없음':
-                                threat_level = '미분류'
-                            classification_data['threat_level'] = threat_level
-                            classification_data['risk_level_color'] = risk_data.get('risk_level_color', '')
-                    
-                    # 파일명에 개체 인덱스 추가 (filename_insect0, filename_insect1, ...)
-                    base_name, ext = os.path.splitext(original_image)
-                    indexed_filename = f"{base_name}_insect{selected_index}{ext}"
-                    # filename 필드는 원본 파일명 유지
-                    classification_data['filename'] = original_image
-                    storage.save_classification(indexed_filename, classification_data)
-                    print(f"✓ 분류 정보 저장 완료: {indexed_filename} -> korean_name: {korean_name}, species: {classification_data.get('species', 'N/A')}, risk_assessment: {bool(classification_data.get('risk_assessment'))}")
+                get_classification_storage().save_classifications(records)
+                for indexed_filename, classification_data in records.items():
+                    print(f"✓ 분류 정보 저장 완료: {indexed_filename} -> korean_name: {classification_data.get('korean_name')}, species: {classification_data.get('species', 'N/A')}, risk_assessment: {bool(classification_data.get('risk_assessment'))}")
             except Exception as save_error:
                 print(f"분류 정보 저장 오류: {save_error}")
         
+        # 마감 시간 때문에 멈춘 단계는 백그라운드에서 마저 분류 (저장 후에 시작해야 덮어쓰지 않음)
+        partial_items = [
+            (index, results_by_index[index]) for index in classified_indices
+            if (results_by_index[index].get('hierarchical_result') or {}).get('partial')
+        ]
+        if partial_items:
+            print(f"[CLASSIFY] 예산 {CLASSIFY_BUDGET_MS}ms 초과 예상, 부분 결과 반환: {[index for index, _ in partial_items]}")
+            expected_timestamps = {
+                key: records[key].get('timestamp')
+                for key in (insect_record_key(original_image, index) for index, _ in partial_items)
+                if key in records
+            }
+            _completion_executor.submit(
+                complete_partial_classifications, session.sid, image_rgb, original_image, copy.deepcopy(partial_items),
+                expected_timestamps
+            )
+        
         session['last_detection'] = detection
         session.modified = True
         
         # JSON 응답으로 리다이렉트 URL 반환 (fetch에서 처리하기 위해)
         return jsonify({
             'success': True,
+            'classified': len(classified_indices),
+            'cached': cache_hits,
+            'tta': tta_summary,
+            'partial': [index for index, _ in partial_items],
             'redirect': url_for("index", show_result="true")
         })
         
@@ -652,14 +1020,13 @@ def select_candidate():
                 result['hierarchical_result']['selected_species'] = species_name
                 print(f"분류 결과 업데이트 완료: {species_name}")
         
-        # 위험도 평가 업데이트
-        assessor = get_risk_assessor_instance()
-        risk_result = assessor.assess_risk(species_name) or {
-            "species_name": species_name,
-            "threat_level": "미분류",
-            "risk_level_color": "#9E9E9E",
-            "description": "이 종에 대한 위험도 정보가 아직 등록되지 않았습니다."
-        }
+        # 위험도 평가 및 상세 정보 (한 번만 해석)
+        record = get_taxon_resolver().resolve(species_name)
+        clean_species_name = record['label'] if record else species_name.replace('_', ' ')
+        print(f"정보 조회 종명: {clean_species_name}")
+        
+        risk_result = (record and record['risk']) or unknown_risk_result(clean_species_name)
+        info_result = (record and record['info']) or unknown_species_info(clean_species_name)
         
         if not detection.get('risk_assessment'):
             detection['risk_assessment'] = []
@@ -667,21 +1034,6 @@ def select_candidate():
             detection['risk_assessment'].append(None)
         detection['risk_assessment'][insect_index] = risk_result
         
-        # 상세 정보 업데이트
-        provider = get_info_provider_instance()
-        # 언더스코어를 공백으로 변환
-        clean_species_name = species_name.replace('_', ' ')
-        print(f"정보 조회 종명: {clean_species_name}")
-        
-        info_result = provider.get_info(clean_species_name)
-        print(f"정보 조회 결과: {info_result is not None}")
-        
-        if not info_result:
-            info_result = {
-                "species_name": clean_species_name,
-                "description": "이 종에 대한 상세 정보가 아직 등록되지 않았습니다."
-            }
-        
         if not detection.get('detailed_info'):
             detection['detailed_info'] = []
         while len(detection['detailed_info']) <= insect_index:
@@ -702,18 +1054,8 @@ def select_candidate():
                 # 선택된 종 정보로 업데이트
                 existing_data['species'] = clean_species_name
                 
-                # korean_name 확보 (여러 소스에서 시도)
-                korean_name = info_result.get('korean_name') or info_result.get('species_name', clean_species_name)
-                
-                # info_result에 없으면 info_provider에서 직접 조회
-                if not korean_name or korean_name == clean_species_name:
-                    try:
-                        provider = get_info_provider_instance()
-                        info_from_provider = provider.get_info(clean_species_name)
-                        if info_from_provider:
-                            korean_name = info_from_provider.get('korean_name') or info_from_provider.get('species_name', clean_species_name)
-                    except Exception as provider_error:
-                        print(f"정보 제공자 조회 오류: {provider_error}")
+                # korean_name 확보 (해석 결과 재사용)
+                korean_name = (record and record['korean_name']) or clean_species_name
                 
                 existing_data['korean_name'] = korean_name
                 
@@ -855,12 +1197,9 @@ def board_page():
                 # korean_name이 없으면 info_provider에서 조회 시도
                 if not korean_name and species:
                     try:
-                        provider = get_info_provider_instance()
-                        # species에서 언더스코어를 공백으로 변환
-                        clean_species = species.replace('_', ' ')
-                        info_result = provider.get_info(clean_species)
-                        if info_result:
-                            korean_name = info_result.get('korean_name') or info_result.get('species_name', '')
+                        record = get_taxon_resolver().resolve(species)
+                        if record and record['info']:
+                            korean_name = record['korean_name']
                             # 조회한 정보를 classification에 추가 (다음에 빠르게 사용)
                             if korean_name:
                                 classification['korean_name'] = korean_name
@@ -958,9 +1297,9 @@ def board_page():
                 })
     
     return render_template("board.html", 
-                         today_observations=today_observations,
+                         today_observations=attach_thumbnail_urls(today_observations),
                          best_observations=best_observations,
-                         all_observations_with_location=all_observations_with_location)
+                         all_observations_with_location=attach_thumbnail_urls(all_observations_with_location))
 
 @app.route("/map")
 def map_page():
@@ -971,17 +1310,10 @@ def map_page():
     # 분류 정보 로드
     storage = get_classification_storage()
     classifications = storage.get_all_classifications()
-    risk_assessor = get_risk_assessor_instance()
     
-    # 위험도 통계 계산
-    risk_stats = {
-        'critical': 0,
-        'danger': 0,
-        'caution': 0,
-        'safe': 0,
-        'unknown': 0,
-        'unclassified': 0
-    }
+    # 위험도 통계 (분류 정보 저장 시 갱신된 집계 사용)
+    # 저장된 관찰(개체별 분류 레코드) 기준이며, 위치 정보가 없는 레코드도 포함하므로 지도 마커 수와는 다를 수 있음
+    risk_stats = storage.get_risk_summary()
     
     # 위치 정보에 분류 정보 및 위험도 정보 추가
     for loc in locations:
@@ -1010,115 +1342,33 @@ def map_page():
         
         if classification:
             loc['classification'] = classification
+            # 필터 등급/색상은 저장 시 계산됨
+            loc['filter_level'] = classification.get('filter_level', 'unclassified')
             
-            # threat_level로 위험도 분류 (우선순위 1)
-            threat_level = classification.get('threat_level', '')
-            
-            # threat_level 값을 필터링 기준으로 변환
-            filter_level = 'unclassified'  # 기본값
-            
-            if threat_level:
-                if '인체 고위험' in threat_level or '공격성·독성' in threat_level:
-                    filter_level = 'critical'
-                elif '인체 중위험' in threat_level or '독성·피부염' in threat_level or '질병 매개' in threat_level:
-                    filter_level = 'danger'
-                elif '반려동물 위험' in threat_level:
-                    filter_level = 'caution'
-                elif '일반·불쾌' in threat_level or '불쾌 곤충' in threat_level or '일반·불쾌 곤충' in threat_level or '불쾌' in threat_level or '일반' in threat_level:
-                    filter_level = 'safe'
-                elif '보호' in threat_level or '천연기념물' in threat_level:
-                    filter_level = 'unknown'
-                else:
-                    # threat_level이 있지만 매칭되지 않는 경우 미분류
-                    filter_level = 'unclassified'
-            
-            # threat_level이 없으면 risk_assessment에서 가져오기 (하위 호환)
-            if not threat_level:
-                # risk_assessment 객체가 있으면 사용
-                if classification.get('risk_assessment'):
-                    risk_result = classification['risk_assessment']
-                    loc['risk_assessment'] = risk_result
-                    threat_level = risk_result.get('threat_level', '')
-                    if not threat_level:
-                        threat_level = risk_result.get('risk_level', '미분류')
-                    if threat_level == 'unknown' or threat_level == '정보 없음':
-                        threat_level = '미분류'
-                    # risk_stats는 기존 키 유지 (하위 호환)
-                    risk_level_key = 'unclassified' if threat_level == '미분류' else threat_level
-                    if risk_level_key in risk_stats:
-                        risk_stats[risk_level_key] += 1
-                    else:
-                        risk_stats['unclassified'] += 1
-                else:
-                    # 종명 또는 국명으로 위험도 평가
-                    species = classification.get('species', '')
-                    korean_name = classification.get('korean_name', '')
-                    species_name = species if species else korean_name
-                    
-                    if species_name:
-                        risk_result = risk_assessor.assess_risk(species_name)
-                        if risk_result:
-                            loc['risk_assessment'] = risk_result
-                            threat_level = risk_result.get('threat_level', '')
-                            if not threat_level:
-                                threat_level = risk_result.get('risk_level', '미분류')
-                            if threat_level == 'unknown' or threat_level == '정보 없음':
-                                threat_level = '미분류'
-                            # risk_stats는 기존 키 유지 (하위 호환)
-                            risk_level_key = 'unclassified' if threat_level == '미분류' else threat_level
-                            if risk_level_key in risk_stats:
-                                risk_stats[risk_level_key] += 1
-                            else:
-                                risk_stats['unclassified'] += 1
-                        else:
-                            loc['risk_assessment'] = {
-                                'threat_level': '미분류',
-                                'risk_level_color': '#9E9E9E',
-                                'description': '이 종에 대한 위험도 정보가 아직 등록되지 않았습니다.'
-                            }
-                            risk_stats['unclassified'] += 1
-                    else:
-                        # 분류 정보는 있지만 종명이 없는 경우 (미분류)
-                        loc['risk_assessment'] = {
-                            'threat_level': '미분류',
-                            'risk_level_color': '#9E9E9E',
-                            'description': '분류 정보가 없습니다.'
-                        }
-                        risk_stats['unclassified'] += 1
-            else:
-                # threat_level이 있으면 필터링 기준으로 사용
+            if classification.get('threat_level'):
                 loc['risk_assessment'] = {
-                    'threat_level': threat_level,
+                    'threat_level': classification['threat_level'],
                     'risk_category': classification.get('risk_category', ''),
-                    'risk_level_color': '#9E9E9E'  # 기본 색상
+                    'risk_level_color': classification.get('filter_color', '#9E9E9E')
+                }
+            elif classification.get('risk_assessment'):
+                loc['risk_assessment'] = classification['risk_assessment']
+            else:
+                # 분류 정보는 있지만 위험도 정보가 없는 경우 (미분류)
+                loc['risk_assessment'] = {
+                    'threat_level': '미분류',
+                    'risk_level_color': '#9E9E9E',
+                    'description': '이 종에 대한 위험도 정보가 아직 등록되지 않았습니다.'
                 }
-                # 위험도별 색상 설정
-                if filter_level == 'critical':
-                    loc['risk_assessment']['risk_level_color'] = '#F44336'
-                elif filter_level == 'danger':
-                    loc['risk_assessment']['risk_level_color'] = '#FF9800'
-                elif filter_level == 'caution':
-                    loc['risk_assessment']['risk_level_color'] = '#FFC107'
-                elif filter_level == 'safe':
-                    loc['risk_assessment']['risk_level_color'] = '#4CAF50'
-                elif filter_level == 'unknown':
-                    loc['risk_assessment']['risk_level_color'] = '#9E9E9E'
-                else:
-                    loc['risk_assessment']['risk_level_color'] = '#6366F1'
-                
-                if filter_level in risk_stats:
-                    risk_stats[filter_level] += 1
-                else:
-                    risk_stats['unclassified'] += 1
         else:
             # 분류 정보가 없는 경우 (미분류)
+            loc['filter_level'] = 'unclassified'
             loc['risk_assessment'] = {
                 'risk_level': 'unclassified',
                 'risk_level_name': '미분류',
                 'risk_level_color': '#9E9E9E',
                 'description': '분류 정보가 없습니다.'
             }
-            risk_stats['unclassified'] += 1
     
     # 전체 이미지 수 계산
     upload_path = Path(app.config["UPLOAD_FOLDER"])
@@ -1154,6 +1404,154 @@ def handle_likes(filename):
         
         return jsonify(result)
 
+@app.route("/healthz")
+def healthz():
+    """프로세스 생존 확인 (모델 상태와 무관)"""
+    return jsonify({'status': 'ok'})
+
+@app.route("/readyz")
+def readyz():
+    """모델 준비 상태 확인 (워밍업 중이거나 실패하면 503)"""
+    status = model_warmup.get_status()
+    status['loaded'] = {
+        'detector': detector is not None,
+        'classifier': classifier is not None,
+        'hierarchical_classifier': hierarchical_classifier is not None
+    }
+    return jsonify(status), (200 if status['ready'] else 503)
+
+@app.route("/api/stats")
+def cache_stats():
+    """캐시/세션 저장소 통계 (적중률 등)"""
+    crop_archiver = get_crop_archiver()
+    return jsonify({
+        'detection_cache': get_detection_cache().get_stats(),
+        'session_store': get_session_store().get_stats(),
+        'near_duplicate_index': get_near_duplicate_index().get_stats(),
+        'thumbnails': get_thumbnail_store().get_stats(),
+        'crop_result_cache': get_crop_result_cache().get_stats(),
+        'crop_archive': crop_archiver.get_stats() if crop_archiver else {'enabled': False},
+        'order_tta': classifier.get_tta_stats() if classifier is not None else None,
+        'taxon_resolver': get_taxon_resolver().get_stats()
+    })
+
+def api_error(message: str, status: int):
+    """JSON API 오류 응답"""
+    return jsonify({'success': False, 'error': message}), status
+
+@app.errorhandler(413)
+def request_too_large(error):
+    """업로드 용량 초과 (API는 JSON으로 응답)"""
+    if request.path.startswith('/api/'):
+        limit_mb = app.config["MAX_CONTENT_LENGTH"] // (1024 * 1024)
+        return api_error(f'이미지가 너무 큽니다 (최대 {limit_mb}MB).', 413)
+    return error
+
+def api_classification_summary(record: dict):
+    """분류 정보 레코드 -> API 응답용 요약 (위험도 상세 객체 제외)"""
+    if record is None:
+        return None
+    filter_level, filter_color = compute_filter_level(record)
+    return {
+        'order': record.get('order', ''),
+        'family': record.get('family', ''),
+        'genus': record.get('genus', ''),
+        'species': record.get('species', ''),
+        'korean_name': record.get('korean_name', ''),
+        'confidence_scores': record.get('confidence_scores', {}),
+        'species_candidates': record.get('species_candidates', []),
+        'threat_level': record.get('threat_level', ''),
+        'risk_category': record.get('risk_category', ''),
+        'filter_level': filter_level,
+        'filter_color': filter_color
+    }
+
+@app.route("/api/v1/analyze", methods=["POST"])
+def api_analyze():
+    """
+    탐지 + 모든 박스 계층적 분류를 한 번에 수행하는 JSON API (카메라 트랩 게이트웨이용)
+
+    세션/리다이렉트 없이 요청 한 번에 결과 JSON 하나를 반환합니다.
+    이미지는 저장하지 않고 처리 후 삭제합니다.
+
+    요청:
+        multipart/form-data의 'image' 파일 또는 본문에 이미지 바이트
+        (Content-Type: image/* 또는 application/octet-stream)
+    쿼리 파라미터:
+        mode: full 또는 tiled (기본: 서버 설정)
+        classify: 0이면 탐지만 수행
+    """
+    started = time.perf_counter()
+    mode = request.args.get('mode', DETECTOR_MODE).lower()
+    if mode not in ('full', 'tiled'):
+        return api_error(f'지원하지 않는 mode: {mode}', 400)
+    run_classification = request.args.get('classify', '1').lower() not in ('0', 'false', 'no', 'off')
+
+    file_storage = request.files.get('image') or next(iter(request.files.values()), None)
+    data = file_storage.read() if file_storage is not None else request.get_data(cache=False)
+    if not data:
+        return api_error("이미지가 없습니다. 'image' 파일 필드 또는 요청 본문으로 보내세요.", 400)
+
+    content_hash = hashlib.sha256(data).hexdigest()
+    fd, temp_path = tempfile.mkstemp(prefix="analyze_", suffix=".img")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        if detect_image_ext(temp_path) is None:
+            return api_error(f"지원하지 않는 이미지 형식입니다 ({', '.join(sorted(ALLOWED_EXTENSIONS))}).", 415)
+        with Image.open(temp_path) as img:
+            width, height = img.size
+            # EXIF 회전으로 가로/세로가 바뀌는 사진 (탐지 좌표는 회전 적용 기준)
+            if img.getexif().get(0x0112, 1) in (5, 6, 7, 8):
+                width, height = height, width
+
+        # 같은 이미지는 캐시된 탐지 결과 재사용
+        detection_cache = get_detection_cache()
+        version = detector_model_version(mode)
+        detections = detection_cache.get(content_hash, version)
+        cached = detections is not None
+        detect_started = time.perf_counter()
+        if not cached:
+            detections = get_detector().detect(temp_path, mode=mode)['detections']
+            detection_cache.put(content_hash, version, detections)
+        detect_ms = (time.perf_counter() - detect_started) * 1000
+
+        classify_started = time.perf_counter()
+        records = classify_all_detections(temp_path, detections) if run_classification else [None] * len(detections)
+        classify_ms = (time.perf_counter() - classify_started) * 1000
+    except Exception as e:
+        print(f"[API] 분석 오류: {e}")
+        return api_error(f'분석 중 오류가 발생했습니다: {e}', 500)
+    finally:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+
+    return jsonify({
+        'success': True,
+        'sha256': content_hash,
+        'image': {'width': width, 'height': height},
+        'model_version': version,
+        'mode': mode,
+        'cached_detection': cached,
+        'count': len(detections),
+        'detections': [
+            {
+                'index': index,
+                'bbox': [round(float(value), 1) for value in det['bbox'][:4]],
+                'confidence': round(float(det.get('confidence', 0.0)), 4),
+                'classification': api_classification_summary(record)
+            }
+            for index, (det, record) in enumerate(zip(detections, records))
+        ],
+        'timings_ms': {
+            'detect': round(detect_ms, 1),
+            'classify': round(classify_ms, 1),
+            'total': round((time.perf_counter() - started) * 1000, 1)
+        }
+    })
+
 @app.route("/api/comments/<filename>", methods=["GET", "POST"])
 def handle_comments(filename):
     """댓글 조회 및 추가"""
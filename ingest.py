@@ -0,0 +1,369 @@
+"""
+조사 폴더 일괄 수집 CLI
+
+현장 조사팀이 넘겨준 이미지 폴더 전체를 웹 화면 없이 처리합니다.
+이미지마다 탐지 -> 모든 탐지 박스 계층적 분류 -> EXIF(위치/촬영 시각) 추출 후
+uploads/에 복사하고 분류 정보 저장소에 기록하므로, 결과가 게시판/지도에 그대로 나타납니다.
+
+- 디코딩/해시/EXIF는 스레드 풀에서 미리 처리하고 탐지는 detect_batch로 배치 추론
+- 분류는 묶음(--batch-size장)의 모든 크롭을 모아 한 번에 수행 (classify_detections_batch)
+- 분류 정보는 --commit-every장마다 한 번에 저장 (save_classifications)
+- 저장이 끝난 이미지는 상태 파일(JSONL)에 기록되어, 중단 후 같은 명령을 다시 실행하면 이어서 처리
+  (실패한 이미지는 다음 실행에서 다시 시도)
+- --report로 CSV(탐지 박스당 한 행) 또는 JSON(이미지당 한 항목) 보고서 작성
+
+사용법:
+    python ingest.py /data/survey_2024_06
+    python ingest.py /data/survey --batch-size 16 --workers 4 --report survey.csv
+    python ingest.py /data/survey --mode tiled --report survey.json
+    python ingest.py /data/survey --report survey.csv --report-only   # 처리 없이 보고서만
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BASE_DIR = Path(__file__).parent
+sys.path.insert(0, str(BASE_DIR))
+
+# 일괄 처리에는 백그라운드 워밍업/데이터 감시 스레드가 필요 없음
+os.environ["NEST_WARMUP"] = "0"
+os.environ.setdefault("NEST_DATA_RELOAD_INTERVAL", "0")
+
+import app as nest_app
+from werkzeug.utils import secure_filename
+
+from utils.classification_storage import get_classification_storage, compute_filter_level
+from utils.classifier import read_rgb_image
+from utils.detection_cache import get_detection_cache
+from utils.map_location_extract import get_exif_data, get_gps_info, get_lat_lon, get_datetime_taken
+from utils.thumbnails import file_sha256
+
+
+STATE_DIR = BASE_DIR / "cache" / "ingest"
+
+CSV_FIELDS = (
+    'source', 'upload', 'status', 'error', 'lat', 'lon', 'datetime_taken',
+    'insect_index', 'record_key', 'bbox', 'detection_confidence',
+    'order', 'family', 'genus', 'species', 'korean_name', 'threat_level', 'filter_level'
+)
+
+
+def scan_images(source_dir: Path) -> List[Path]:
+    """폴더 안의 이미지 파일 (하위 폴더 포함, 경로 순)"""
+    return sorted(
+        path for path in source_dir.rglob('*')
+        if path.is_file() and path.suffix.lower().lstrip('.') in nest_app.ALLOWED_EXTENSIONS
+    )
+
+
+def file_key(path: Path, root: Path) -> str:
+    """재개 판단용 키 (상대 경로 + 크기 + 수정 시각, 파일을 읽지 않음)"""
+    stat = path.stat()
+    return f"{path.relative_to(root).as_posix()}|{stat.st_size}|{stat.st_mtime_ns}"
+
+
+def default_state_path(source_dir: Path) -> Path:
+    """폴더별 상태 파일 경로 (절대 경로 해시)"""
+    digest = hashlib.sha1(str(source_dir.resolve()).encode('utf-8')).hexdigest()[:12]
+    return STATE_DIR / f"{secure_filename(source_dir.name) or 'survey'}_{digest}.jsonl"
+
+
+class IngestState:
+    """처리 완료 이미지 기록 (JSONL, 한 줄에 이미지 하나)"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.entries = self._load()
+
+    def _load(self) -> Dict[str, Dict]:
+        entries = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # 중단 시 마지막 줄이 잘렸을 수 있음
+                    entries[entry['key']] = entry
+        except OSError:
+            pass
+        return entries
+
+    def append(self, entries: List[Dict]):
+        """기록 추가 (디스크에 동기화한 뒤 반환)"""
+        if not entries:
+            return
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n')
+                self.entries[entry['key']] = entry
+            f.flush()
+            os.fsync(f.fileno())
+
+    def is_done(self, key: str) -> bool:
+        entry = self.entries.get(key)
+        return entry is not None and entry.get('status') in ('done', 'skipped')
+
+
+def read_exif(path: Path) -> Dict:
+    """EXIF 위치/촬영 시각"""
+    exif_data = get_exif_data(str(path))
+    lat, lon = get_lat_lon(get_gps_info(exif_data)) if exif_data else (None, None)
+    return {
+        'lat': lat,
+        'lon': lon,
+        'datetime_taken': get_datetime_taken(exif_data) if exif_data else None
+    }
+
+
+def prepare_image(path: Path, root: Path) -> Dict:
+    """
+    탐지 전 준비 (스레드 풀에서 실행): 형식 확인, 내용 해시, EXIF, 업로드 파일 이름
+
+    업로드 이름은 내용 해시로 정해지므로 재실행해도 같은 파일을 덮어쓸 뿐 중복되지 않습니다.
+    """
+    entry = {'key': file_key(path, root), 'source': str(path), 'status': 'pending'}
+    ext = nest_app.detect_image_ext(str(path))
+    if ext is None:
+        entry.update(status='skipped', error='이미지 형식을 인식할 수 없음')
+        return entry
+
+    content_hash = file_sha256(path)
+    stem = os.path.splitext(secure_filename(path.name))[0] or 'survey'
+    entry.update(
+        sha256=content_hash,
+        upload=f"{stem}_{content_hash[:8]}.{ext}",
+        **read_exif(path)
+    )
+    return entry
+
+
+def build_entry_detections(entry: Dict, detections: List[Dict], records: List[Optional[Dict]]) -> Dict[str, Dict]:
+    """
+    이미지 결과를 상태/보고서 항목에 채우고 저장할 분류 정보 반환
+
+    Returns:
+        {저장소 키: 분류 정보}
+    """
+    to_save = {}
+    entry['detections'] = []
+    for index, (det, record) in enumerate(zip(detections, records)):
+        record_key = nest_app.insect_record_key(entry['upload'], index)
+        row = {
+            'insect_index': index,
+            'record_key': record_key if record else None,
+            'bbox': [round(value, 1) for value in det['bbox'][:4]],
+            'detection_confidence': round(det.get('confidence', 0.0), 4)
+        }
+        if record:
+            record['filename'] = entry['upload']
+            record['source'] = 'ingest'
+            to_save[record_key] = record
+            row.update({
+                'order': record.get('order', ''),
+                'family': record.get('family', ''),
+                'genus': record.get('genus', ''),
+                'species': record.get('species', ''),
+                'korean_name': record.get('korean_name', ''),
+                'threat_level': record.get('threat_level', ''),
+                'filter_level': compute_filter_level(record)[0]
+            })
+        entry['detections'].append(row)
+    return to_save
+
+
+def ingest_folder(source_dir: Path, state: IngestState, batch_size: int = 8, workers: int = 4,
+                  mode: str = 'full', commit_every: int = 50, limit: int = None) -> Dict:
+    """
+    폴더 일괄 수집
+
+    Returns:
+        {'total', 'processed', 'skipped_done', 'errors', 'detections', 'seconds'}
+    """
+    images = scan_images(source_dir)
+    pending = [path for path in images if not state.is_done(file_key(path, source_dir))]
+    done_count = len(images) - len(pending)
+    if limit:
+        pending = pending[:limit]
+    print(f"[INGEST] {source_dir}: 이미지 {len(images)}장, 처리 대상 {len(pending)}장 "
+          f"(완료 {done_count}장 건너뜀)")
+    stats = {'total': len(images), 'processed': 0, 'skipped_done': done_count,
+             'errors': 0, 'detections': 0, 'seconds': 0.0}
+    if not pending:
+        return stats
+
+    detector = nest_app.get_detector()
+    storage = get_classification_storage()
+    detection_cache = get_detection_cache()
+    version = nest_app.detector_model_version(mode)
+    upload_folder = Path(nest_app.app.config["UPLOAD_FOLDER"])
+
+    staged_records: Dict[str, Dict] = {}
+    staged_entries: List[Dict] = []
+
+    def commit():
+        # 저장소에 먼저 쓰고 상태 파일에 기록 (중단되면 해당 묶음은 재실행 시 다시 처리)
+        storage.save_classifications(staged_records)
+        state.append(staged_entries)
+        staged_records.clear()
+        staged_entries.clear()
+
+    def fail(path: Path, entry: Dict, error: Exception):
+        entry.update(status='error', error=str(error))
+        stats['errors'] += 1
+        print(f"[INGEST] 처리 실패 ({path}): {error}")
+
+    start = time.perf_counter()
+    chunks = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="ingest") as pool:
+            # 다음 묶음의 해시/EXIF를 현재 묶음 추론과 겹쳐 처리
+            prepared = [pool.submit(prepare_image, path, source_dir) for path in chunks[0]]
+            for chunk_index, chunk in enumerate(chunks):
+                entries = [future.result() for future in prepared]
+                if chunk_index + 1 < len(chunks):
+                    prepared = [pool.submit(prepare_image, path, source_dir) for path in chunks[chunk_index + 1]]
+
+                targets = [(path, entry) for path, entry in zip(chunk, entries) if entry['status'] == 'pending']
+                results = detector.detect_batch(
+                    [path for path, _ in targets], batch_size=batch_size, mode=mode, prefetch_workers=workers
+                ) if targets else []
+
+                # 탐지가 끝난 이미지의 크롭을 모아 한 번에 분류 (묶음 안 이미지끼리 분류기 로드/추론 공유)
+                classify_items = []
+                for (path, entry), result in zip(targets, results):
+                    try:
+                        if result.get('error'):
+                            raise ValueError(result['error'])
+                        detections = result['detections']
+                        detection_cache.put(entry['sha256'], version, detections)
+                        image = read_rgb_image(path) if detections else None
+                        classify_items.append((path, entry, image, detections))
+                    except Exception as e:
+                        fail(path, entry, e)
+
+                try:
+                    classified = nest_app.classify_detections_batch(
+                        [(image, detections) for _, _, image, detections in classify_items]
+                    )
+                except Exception as e:
+                    for path, entry, _, _ in classify_items:
+                        fail(path, entry, e)
+                    classified = []
+
+                for (path, entry, _, detections), records in zip(classify_items, classified):
+                    try:
+                        # copyfile: 원본 수정 시각을 복사하지 않아 수집 시각 기준 날짜/"오늘" 보기에 나타남
+                        shutil.copyfile(path, upload_folder / entry['upload'])
+                        staged_records.update(build_entry_detections(entry, detections, records))
+                        entry['status'] = 'done'
+                        stats['detections'] += len(detections)
+                    except Exception as e:
+                        fail(path, entry, e)
+
+                staged_entries.extend(entries)
+                stats['processed'] += len(entries)
+                if len(staged_entries) >= commit_every:
+                    commit()
+
+                elapsed = time.perf_counter() - start
+                rate = stats['processed'] / elapsed if elapsed else 0.0
+                remaining = (len(pending) - stats['processed']) / rate if rate else 0.0
+                print(f"[INGEST] {stats['processed']}/{len(pending)} "
+                      f"({stats['processed'] / len(pending):.1%}) 탐지 {stats['detections']}개, "
+                      f"오류 {stats['errors']}장, {rate:.2f}장/초, 남은 시간 {remaining / 60:.1f}분")
+    finally:
+        # 중단(Ctrl+C) 시에도 끝난 이미지까지는 저장
+        commit()
+        stats['seconds'] = time.perf_counter() - start
+
+    return stats
+
+
+def write_report(entries: List[Dict], report_path: Path):
+    """
+    보고서 작성 (.json: 이미지당 한 항목, 그 외: CSV 탐지 박스당 한 행)
+    """
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    if report_path.suffix.lower() == '.json':
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, ensure_ascii=False, indent=2)
+        return
+
+    # Excel에서 한글이 깨지지 않도록 BOM 포함
+    with open(report_path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        for entry in entries:
+            base = {field: entry.get(field) for field in CSV_FIELDS}
+            detections = entry.get('detections') or [{}]
+            for det in detections:
+                row = dict(base, **det)
+                if isinstance(row.get('bbox'), list):
+                    row['bbox'] = ' '.join(str(value) for value in row['bbox'])
+                writer.writerow(row)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="조사 폴더 일괄 탐지/분류 수집")
+    parser.add_argument('source', help="이미지 폴더 (하위 폴더 포함)")
+    parser.add_argument('--batch-size', type=int, default=8, help="탐지 배치 크기 (기본 8)")
+    parser.add_argument('--workers', type=int, default=4, help="디코딩/해시/EXIF 스레드 수 (기본 4)")
+    parser.add_argument('--mode', choices=('full', 'tiled'), default=nest_app.DETECTOR_MODE,
+                        help=f"탐지 방식 (기본: {nest_app.DETECTOR_MODE})")
+    parser.add_argument('--commit-every', type=int, default=50, help="분류 정보 일괄 저장 간격 (장, 기본 50)")
+    parser.add_argument('--state', default=None, help="상태 파일 경로 (기본: cache/ingest/<폴더>_<해시>.jsonl)")
+    parser.add_argument('--report', default=None, help="보고서 경로 (.csv 또는 .json)")
+    parser.add_argument('--report-only', action='store_true', help="처리 없이 상태 파일로 보고서만 작성")
+    parser.add_argument('--limit', type=int, default=None, help="이번 실행에서 처리할 최대 이미지 수")
+    args = parser.parse_args(argv)
+
+    source_dir = Path(args.source)
+    if not source_dir.is_dir():
+        print(f"[INGEST] 폴더가 없습니다: {source_dir}")
+        return 1
+
+    state = IngestState(Path(args.state) if args.state else default_state_path(source_dir))
+    print(f"[INGEST] 상태 파일: {state.path} (기록 {len(state.entries)}건)")
+
+    exit_code = 0
+    if not args.report_only:
+        try:
+            stats = ingest_folder(
+                source_dir, state,
+                batch_size=max(1, args.batch_size),
+                workers=args.workers,
+                mode=args.mode,
+                commit_every=max(1, args.commit_every),
+                limit=args.limit
+            )
+            print(f"[INGEST] 완료: {stats['processed']}장 처리 ({stats['seconds']:.1f}초), "
+                  f"탐지 {stats['detections']}개, 오류 {stats['errors']}장")
+            if stats['errors']:
+                exit_code = 2
+        except KeyboardInterrupt:
+            print("[INGEST] 중단됨 - 같은 명령을 다시 실행하면 이어서 처리합니다.")
+            exit_code = 130
+
+    if args.report:
+        # 같은 파일이 수정되어 다시 처리된 경우 마지막 기록만 사용
+        latest = {entry['source']: entry for entry in state.entries.values()}
+        entries = sorted(latest.values(), key=lambda entry: entry['source'])
+        write_report(entries, Path(args.report))
+        print(f"[INGEST] 보고서 작성: {args.report} ({len(entries)}장)")
+
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
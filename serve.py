@@ -0,0 +1,251 @@
+"""
+운영용 pre-fork WSGI 서버
+
+마스터 프로세스가 탐지기, 목 분류기, 자주 쓰는 계층 분류기를 한 번 로드한 뒤
+워커 N개를 fork합니다. 모델 가중치는 copy-on-write로 워커들이 공유하므로
+워커마다 모델을 따로 올리는 것보다 메모리를 크게 줄일 수 있습니다.
+
+사용법:
+    python serve.py --workers 4 --port 8000
+    python serve.py --workers 4 --report-rss 30      # 30초 후 워커별 메모리 리포트
+    python serve.py --workers 4 --no-preload         # 비교용: 워커마다 모델 로드
+
+Linux/macOS 전용입니다 (fork 필요). Windows에서는 python app.py를 사용하세요.
+"""
+
+import argparse
+import os
+import signal
+import socket
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BASE_DIR = Path(__file__).parent
+sys.path.insert(0, str(BASE_DIR))
+
+# 워밍업은 아래에서 마스터가 동기적으로 실행 (app import 시 백그라운드 스레드를 띄우지 않음)
+os.environ["NEST_WARMUP"] = "0"
+
+import app as nest_app
+
+
+def configure_worker_threads(num_threads: int):
+    """
+    워커별 연산 스레드 수 설정
+
+    워커 N개가 각각 전체 코어 수만큼 스레드를 쓰면 과다 구독(oversubscription)이
+    발생하므로, 코어를 워커 수로 나눈 만큼만 사용합니다.
+    """
+    os.environ["OMP_NUM_THREADS"] = str(num_threads)
+    try:
+        import torch
+        torch.set_num_threads(num_threads)
+    except ImportError:
+        pass
+    try:
+        import cv2
+        cv2.setNumThreads(num_threads)
+    except ImportError:
+        pass
+
+
+def preload_models(preload_count: int):
+    """마스터에서 모델 로드 + 워밍업 (fork 전에 완료되어야 공유됨)"""
+    warmup = nest_app.model_warmup
+    warmup.enabled = True
+    warmup.preload_count = preload_count
+
+    # fork 전에 멀티스레드 커널을 돌리면 자식에서 스레드 풀이 멈출 수 있으므로
+    # 마스터의 더미 추론은 단일 스레드로 실행
+    configure_worker_threads(1)
+
+    if not warmup.run():
+        raise RuntimeError(f"모델 로드 실패: {warmup.get_status()['error']}")
+
+
+def read_memory_stats(pid: int) -> Optional[Dict[str, int]]:
+    """
+    프로세스 메모리 통계 (KB, Linux /proc 기준)
+
+    Returns:
+        {'rss': 상주 메모리, 'pss': 공유 페이지를 나눠 계산한 메모리,
+         'private': 해당 프로세스 전용 메모리(USS), 'shared': 공유 메모리}
+        /proc을 읽을 수 없으면 None
+    """
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(':') and parts[1].isdigit():
+                    fields[parts[0][:-1]] = int(parts[1])
+    except OSError:
+        return None
+
+    return {
+        'rss': fields.get('Rss', 0),
+        'pss': fields.get('Pss', 0),
+        'private': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0),
+        'shared': fields.get('Shared_Clean', 0) + fields.get('Shared_Dirty', 0)
+    }
+
+
+def report_memory(master_pid: int, worker_pids: List[int], preloaded: bool):
+    """마스터/워커 메모리 리포트 출력"""
+    master = read_memory_stats(master_pid)
+    workers = [(pid, read_memory_stats(pid)) for pid in worker_pids]
+    workers = [(pid, stats) for pid, stats in workers if stats]
+    if master is None or not workers:
+        print("[SERVE] 메모리 통계를 읽을 수 없습니다 (/proc/<pid>/smaps_rollup 필요)")
+        return
+
+    mode = "마스터 사전 로드(공유)" if preloaded else "워커별 로드"
+    print(f"[SERVE] 메모리 리포트 ({mode}, 단위 MB)")
+    print(f"  master  pid={master_pid:<7} RSS {master['rss'] / 1024:8.1f}  PSS {master['pss'] / 1024:8.1f}")
+    for pid, stats in workers:
+        print(f"  worker  pid={pid:<7} RSS {stats['rss'] / 1024:8.1f}  PSS {stats['pss'] / 1024:8.1f}  "
+              f"전용 {stats['private'] / 1024:8.1f}  공유 {stats['shared'] / 1024:8.1f}")
+
+    total_pss = master['pss'] + sum(stats['pss'] for _, stats in workers)
+    total_rss = master['rss'] + sum(stats['rss'] for _, stats in workers)
+    print(f"  합계 PSS {total_pss / 1024:.1f}MB (실제 사용량), 합계 RSS {total_rss / 1024:.1f}MB (공유 페이지 중복 계산)")
+    if preloaded:
+        # 워커별 로드였다면 각 워커가 마스터만큼의 모델 메모리를 따로 가짐
+        naive = master['rss'] * len(workers)
+        print(f"  워커별 로드 시 예상: 약 {naive / 1024:.1f}MB (마스터 RSS x 워커 {len(workers)}개), "
+              f"비교는 --no-preload로 실측 가능")
+
+
+class PreforkServer:
+    """마스터-워커 pre-fork 서버"""
+
+    def __init__(self, host: str, port: int, workers: int, threads_per_worker: int,
+                 preload: bool = True):
+        self.host = host
+        self.port = port
+        self.num_workers = workers
+        self.threads_per_worker = threads_per_worker
+        self.preload = preload
+        self.workers = {}
+        self.listener = None
+        self.stopping = False
+
+    def _bind(self):
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listener.bind((self.host, self.port))
+        self.listener.listen(128)
+        self.listener.set_inheritable(True)
+
+    def _spawn_worker(self, worker_id: int):
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = worker_id
+            return
+
+        # --- 워커 프로세스 ---
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        exit_code = 0
+        try:
+            configure_worker_threads(self.threads_per_worker)
+            if not self.preload:
+                nest_app.model_warmup.run()
+            # 스레드는 fork 후 자식에 복제되지 않으므로 워커에서 감시 스레드를 다시 시작
+            nest_app.start_data_watcher()
+
+            from werkzeug.serving import make_server
+            server = make_server(self.host, self.port, nest_app.app,
+                                 threaded=True, fd=self.listener.fileno())
+            print(f"[SERVE] 워커 {worker_id} 시작 (pid={os.getpid()}, 연산 스레드={self.threads_per_worker})")
+            server.serve_forever()
+        except Exception as e:
+            print(f"[SERVE] 워커 {worker_id} 오류: {e}")
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+    def _handle_stop(self, signum, frame):
+        self.stopping = True
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError:
+                pass
+
+    def run(self, report_rss_after: Optional[float] = None):
+        self._bind()
+
+        if self.preload:
+            preload_models(nest_app.model_warmup.preload_count)
+
+        # 마스터는 요청을 처리하지 않으므로 데이터 감시 스레드를 멈춘 뒤 fork
+        # (fork 시점에 감시 스레드가 잠금을 쥐고 있으면 워커가 멈출 수 있음)
+        nest_app.get_data_watcher().stop()
+
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+
+        for worker_id in range(self.num_workers):
+            self._spawn_worker(worker_id)
+        print(f"[SERVE] http://{self.host}:{self.port} 워커 {self.num_workers}개 실행 중 (master pid={os.getpid()})")
+
+        report_at = time.monotonic() + report_rss_after if report_rss_after else None
+
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+
+            if pid == 0:
+                if report_at is not None and time.monotonic() >= report_at:
+                    report_memory(os.getpid(), list(self.workers), self.preload)
+                    report_at = None
+                time.sleep(0.5)
+                continue
+
+            worker_id = self.workers.pop(pid, None)
+            if worker_id is not None and not self.stopping:
+                print(f"[SERVE] 워커 {worker_id} 종료됨 (pid={pid}, status={status}), 재시작")
+                self._spawn_worker(worker_id)
+
+        self.listener.close()
+        print("[SERVE] 서버 종료")
+
+
+def main(argv=None) -> int:
+    cpu_count = os.cpu_count() or 1
+
+    parser = argparse.ArgumentParser(description="NEST pre-fork WSGI 서버")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=2, help="워커 프로세스 수")
+    parser.add_argument('--threads', type=int, default=None,
+                        help="워커당 torch/cv2 연산 스레드 수 (기본: CPU 코어 수 / 워커 수)")
+    parser.add_argument('--preload-hierarchical', type=int, default=None,
+                        help="마스터에서 사전 로드할 계층 분류기 수 (기본: NEST_WARMUP_PRELOAD)")
+    parser.add_argument('--no-preload', action='store_true',
+                        help="비교용: 마스터에서 모델을 올리지 않고 워커마다 따로 로드")
+    parser.add_argument('--report-rss', type=float, default=None, metavar='SECONDS',
+                        help="시작 후 지정한 시간이 지나면 워커별 메모리(RSS/PSS) 출력")
+    args = parser.parse_args(argv)
+
+    if not hasattr(os, 'fork'):
+        print("[SERVE] 이 플랫폼은 fork를 지원하지 않습니다. python app.py로 실행하세요.")
+        return 1
+
+    workers = max(1, args.workers)
+    threads = args.threads or max(1, cpu_count // workers)
+    if args.preload_hierarchical is not None:
+        nest_app.model_warmup.preload_count = args.preload_hierarchical
+
+    server = PreforkServer(args.host, args.port, workers, threads, preload=not args.no_preload)
+    server.run(report_rss_after=args.report_rss)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
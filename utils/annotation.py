@@ -0,0 +1,136 @@
+"""
+탐지 결과 이미지 렌더링 모듈
+
+업로드 화면은 원본 이미지 위에 바운딩 박스를 브라우저에서 겹쳐 그리므로,
+박스가 그려진 결과 이미지는 /results 경로로 요청될 때만 만들고 디스크에 캐시합니다.
+캐시 파일 이름에는 박스 목록의 해시가 들어가므로 사용자가 박스를 수정하면 새로 렌더링합니다.
+
+환경 변수:
+    NEST_ANNOTATED_FORMAT: webp 또는 jpeg (기본 webp)
+    NEST_ANNOTATED_QUALITY: 인코딩 품질 1-100 (기본 85)
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+ANNOTATED_FORMATS = {
+    'webp': ('.webp', cv2.IMWRITE_WEBP_QUALITY),
+    'jpeg': ('.jpg', cv2.IMWRITE_JPEG_QUALITY),
+}
+
+
+def annotated_encoding_from_env() -> Tuple[str, int]:
+    """(형식, 품질) 환경 변수 해석 (잘못된 값이면 기본값)"""
+    fmt = os.environ.get("NEST_ANNOTATED_FORMAT", "webp").lower()
+    if fmt == 'jpg':
+        fmt = 'jpeg'
+    if fmt not in ANNOTATED_FORMATS:
+        fmt = 'webp'
+    try:
+        quality = min(100, max(1, int(os.environ.get("NEST_ANNOTATED_QUALITY", "85"))))
+    except ValueError:
+        quality = 85
+    return fmt, quality
+
+
+def draw_detections(image, detections):
+    """
+    바운딩 박스와 신뢰도를 그린 이미지 사본 반환 (이미지 크기에 적응)
+
+    Args:
+        image: BGR 이미지 (numpy array)
+        detections: [{'bbox': [x1, y1, x2, y2], 'confidence': float}, ...]
+    """
+    annotated_image = image.copy()
+    h, w = image.shape[:2]
+
+    # 이미지 크기에 따른 스케일 계산
+    scale = min(h, w) / 640  # 640을 기준으로 스케일링
+    box_thickness = max(1, int(3 * scale))
+    font_scale = max(0.3, 0.6 * scale)
+    font_thickness = max(1, int(2 * scale))
+
+    for det in detections or []:
+        box = det['bbox']
+        conf = det.get('confidence', 1.0)
+        x1, y1, x2, y2 = map(int, box[:4])
+
+        # 적응적 박스 그리기
+        cv2.rectangle(annotated_image, (x1, y1), (x2, y2), (0, 255, 0), box_thickness)
+
+        # 적응적 텍스트
+        label = f'{conf:.1%}'
+        label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, font_scale, font_thickness)[0]
+        padding = max(5, int(10 * scale))
+        cv2.rectangle(annotated_image, (x1, y1-label_size[1]-padding*2), (x1+label_size[0]+padding, y1), (0, 255, 0), -1)
+        cv2.putText(annotated_image, label, (x1+padding//2, y1-padding), cv2.FONT_HERSHEY_SIMPLEX, font_scale, (0, 0, 0), font_thickness)
+
+    return annotated_image
+
+
+def detections_digest(detections: List[Dict], fmt: str, quality: int) -> str:
+    """박스 목록 + 인코딩 설정의 짧은 해시 (렌더링 캐시 키)"""
+    boxes = [
+        [round(float(value), 1) for value in det['bbox'][:4]] + [round(float(det.get('confidence', 1.0)), 4)]
+        for det in detections or []
+    ]
+    payload = json.dumps([boxes, fmt, quality], separators=(',', ':'))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:12]
+
+
+def render_annotated(image_path, detections: List[Dict], output_dir, stem: str,
+                     fmt: str = None, quality: int = None) -> Optional[Path]:
+    """
+    탐지 결과 이미지를 렌더링하거나 캐시된 파일 반환
+
+    Args:
+        image_path: 원본 이미지 경로
+        detections: 바운딩 박스 목록
+        output_dir: 결과 이미지 저장 디렉토리
+        stem: 결과 파일 이름 앞부분 (예: "detected_abc")
+        fmt / quality: 인코딩 형식과 품질 (None이면 환경 변수)
+
+    Returns:
+        결과 이미지 경로 또는 None (원본을 읽을 수 없음)
+    """
+    env_fmt, env_quality = annotated_encoding_from_env()
+    fmt = fmt or env_fmt
+    quality = quality or env_quality
+    extension, quality_flag = ANNOTATED_FORMATS[fmt]
+
+    output_dir = Path(output_dir)
+    target = output_dir / f"{stem}.{detections_digest(detections, fmt, quality)}{extension}"
+    if target.exists():
+        return target
+
+    # 한글 경로 지원
+    try:
+        image = cv2.imdecode(np.fromfile(str(image_path), dtype=np.uint8), cv2.IMREAD_COLOR)
+    except OSError:
+        image = None
+    if image is None:
+        return None
+
+    ok, encoded = cv2.imencode(extension, draw_detections(image, detections), [quality_flag, quality])
+    if not ok:
+        return None
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    # 박스가 바뀌기 전 렌더링 결과 정리 (같은 업로드당 한 장만 유지)
+    for stale in output_dir.glob(f"{stem}.*"):
+        try:
+            stale.unlink()
+        except OSError:
+            pass
+
+    tmp_path = target.with_name(target.name + '.tmp')
+    encoded.tofile(str(tmp_path))
+    os.replace(tmp_path, target)
+    return target
@@ -0,0 +1,140 @@
+"""
+바운딩 박스 병합 모듈
+
+타일 추론처럼 같은 곤충이 여러 번 탐지될 때 중복 박스를 합칩니다.
+numpy 벡터 연산만 사용하므로 torchvision 없이 동작합니다.
+
+- nms: 점수 순으로 남기고 많이 겹치는 박스 제거
+- weighted_box_fusion: 겹치는 박스를 점수 가중 평균으로 합침 (타일 경계에서 잘린 박스에 유리)
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+
+MERGE_METHODS = ('nms', 'wbf')
+
+
+def box_iou(box: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+    """
+    박스 하나와 여러 박스의 IoU
+
+    Args:
+        box: [x1, y1, x2, y2]
+        boxes: (N, 4)
+
+    Returns:
+        (N,) IoU
+    """
+    x1 = np.maximum(box[0], boxes[:, 0])
+    y1 = np.maximum(box[1], boxes[:, 1])
+    x2 = np.minimum(box[2], boxes[:, 2])
+    y2 = np.minimum(box[3], boxes[:, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    union = area + areas - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
+
+
+def nms(boxes: np.ndarray, scores: np.ndarray, classes: np.ndarray,
+        iou_threshold: float = 0.45) -> np.ndarray:
+    """
+    클래스별 NMS
+
+    Args:
+        boxes: (N, 4) [x1, y1, x2, y2]
+        scores: (N,)
+        classes: (N,) 다른 클래스끼리는 제거하지 않음
+        iou_threshold: 이 값보다 많이 겹치면 낮은 점수 박스 제거
+
+    Returns:
+        남길 인덱스 (점수 내림차순)
+    """
+    if len(boxes) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    # 클래스마다 좌표를 멀리 떨어뜨려 한 번에 처리
+    offset = (boxes.max() + 1) * classes.astype(boxes.dtype)
+    shifted = boxes + offset[:, None]
+
+    order = np.argsort(-scores, kind='stable')
+    keep = []
+    while order.size > 0:
+        best = order[0]
+        keep.append(best)
+        if order.size == 1:
+            break
+        ious = box_iou(shifted[best], shifted[order[1:]])
+        order = order[1:][ious <= iou_threshold]
+    return np.array(keep, dtype=np.int64)
+
+
+def weighted_box_fusion(boxes: np.ndarray, scores: np.ndarray, classes: np.ndarray,
+                        iou_threshold: float = 0.55) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    가중 박스 융합 (WBF)
+
+    점수 순으로 박스를 돌며 IoU가 임계값을 넘는 같은 클래스 군집에 넣고,
+    군집 좌표는 점수 가중 평균, 점수는 군집 내 평균으로 계산합니다.
+
+    Returns:
+        (병합된 boxes, scores, classes)
+    """
+    if len(boxes) == 0:
+        return boxes.reshape(0, 4), scores, classes
+
+    order = np.argsort(-scores, kind='stable')
+    fused = np.zeros((len(boxes), 4), dtype=np.float64)
+    weighted_sum = np.zeros((len(boxes), 4), dtype=np.float64)
+    score_sum = np.zeros(len(boxes), dtype=np.float64)
+    counts = np.zeros(len(boxes), dtype=np.int64)
+    cluster_classes = np.zeros(len(boxes), dtype=classes.dtype)
+    n_clusters = 0
+
+    for idx in order:
+        box, score, cls = boxes[idx], float(scores[idx]), classes[idx]
+        match = -1
+        if n_clusters:
+            ious = box_iou(box, fused[:n_clusters])
+            ious[cluster_classes[:n_clusters] != cls] = -1.0
+            best = int(np.argmax(ious))
+            if ious[best] > iou_threshold:
+                match = best
+        if match < 0:
+            match = n_clusters
+            cluster_classes[match] = cls
+            n_clusters += 1
+        weighted_sum[match] += box * score
+        score_sum[match] += score
+        counts[match] += 1
+        fused[match] = weighted_sum[match] / score_sum[match]
+
+    return (
+        fused[:n_clusters].astype(boxes.dtype),
+        (score_sum[:n_clusters] / counts[:n_clusters]).astype(scores.dtype),
+        cluster_classes[:n_clusters]
+    )
+
+
+def merge_boxes(boxes: np.ndarray, scores: np.ndarray, classes: np.ndarray,
+                method: str = 'nms', iou_threshold: float = 0.45):
+    """
+    중복 박스 병합
+
+    Args:
+        method: 'nms' 또는 'wbf'
+
+    Returns:
+        (boxes, scores, classes) 점수 내림차순
+    """
+    if method == 'wbf':
+        boxes, scores, classes = weighted_box_fusion(boxes, scores, classes, iou_threshold)
+        order = np.argsort(-scores, kind='stable')
+        return boxes[order], scores[order], classes[order]
+    if method != 'nms':
+        raise ValueError(f"지원하지 않는 병합 방법: {method} ({', '.join(MERGE_METHODS)})")
+    keep = nms(boxes, scores, classes, iou_threshold)
+    return boxes[keep], scores[keep], classes[keep]
@@ -4,9 +4,76 @@
 """
 
 import json
+import os
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: 프로세스 간 잠금 없이 스레드 잠금만 사용
+    fcntl = None
+
+
+# 지도 필터 위험도 등급 (통계 카드 순서)
+RISK_FILTER_LEVELS = ('critical', 'danger', 'caution', 'safe', 'unknown', 'unclassified')
+
+# threat_level 문자열 -> 필터 등급 (위에서부터 순서대로 검사)
+RISK_FILTER_RULES = (
+    ('critical', ('인체 고위험', '공격성·독성')),
+    ('danger', ('인체 중위험', '독성·피부염', '질병 매개')),
+    ('caution', ('반려동물 위험',)),
+    ('safe', ('일반·불쾌', '불쾌 곤충', '불쾌', '일반')),
+    ('unknown', ('보호', '천연기념물')),
+)
+
+RISK_FILTER_COLORS = {
+    'critical': '#F44336',
+    'danger': '#FF9800',
+    'caution': '#FFC107',
+    'safe': '#4CAF50',
+    'unknown': '#9E9E9E',
+    'unclassified': '#6366F1'
+}
+
+
+def normalize_threat_level(threat_level: str) -> str:
+    """threat_level 문자열(예: "인체 고위험(공격성·독성)")을 필터 등급으로 변환"""
+    if not threat_level:
+        return 'unclassified'
+    for level, keywords in RISK_FILTER_RULES:
+        if any(keyword in threat_level for keyword in keywords):
+            return level
+    return 'unclassified'
+
+
+def compute_filter_level(classification_data: Dict) -> Tuple[str, str]:
+    """
+    분류 정보의 지도 필터 등급과 색상 계산
+
+    threat_level을 우선 사용하고, 없으면 저장된 risk_assessment
+    (RiskAssessor 결과의 risk_level 또는 threat_level)를 사용합니다.
+
+    Returns:
+        (필터 등급, 색상)
+    """
+    threat_level = classification_data.get('threat_level', '')
+    if threat_level:
+        level = normalize_threat_level(threat_level)
+        return level, RISK_FILTER_COLORS[level]
+
+    risk = classification_data.get('risk_assessment')
+    if risk:
+        threat_level = risk.get('threat_level') or risk.get('risk_level') or ''
+        if threat_level in RISK_FILTER_LEVELS:
+            level = threat_level
+        else:
+            level = normalize_threat_level(threat_level)
+        return level, risk.get('risk_level_color') or RISK_FILTER_COLORS[level]
+
+    return 'unclassified', '#9E9E9E'
 
 
 class ClassificationStorage:
@@ -26,9 +93,106 @@ class ClassificationStorage:
         self.storage_path = Path(storage_path)
         self.storage_path.parent.mkdir(parents=True, exist_ok=True)
         
-        # 파일이 없으면 빈 딕셔너리로 초기화
-        if not self.storage_path.exists():
-            self._save_data({})
+        # 위험도 등급별 집계 (저장 시 증분 갱신)
+        self.summary_path = self.storage_path.with_name(self.storage_path.stem + "_summary.json")
+        
+        # 분류 데이터와 집계는 같은 잠금 안에서 함께 갱신
+        # (요청 스레드, 백그라운드 분류 스레드, pre-fork 워커, 일괄 수집 CLI가 동시에 쓸 수 있음)
+        self.lock_path = self.storage_path.with_name(self.storage_path.name + ".lock")
+        self._lock = threading.Lock()
+        
+        with self._locked():
+            # 파일이 없으면 빈 딕셔너리로 초기화
+            if not self.storage_path.exists():
+                self._save_data({})
+            
+            self._ensure_summary()
+    
+    @contextmanager
+    def _locked(self):
+        """쓰기 잠금 (스레드 + fcntl 파일 잠금). 재진입하지 않으므로 쓰기 메서드 안에서 중첩 호출하지 않음"""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.lock_path, 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    @staticmethod
+    def _write_json(path: Path, payload: Dict):
+        """임시 파일에 쓴 뒤 교체 (읽는 쪽이 쓰다 만 파일을 보지 않도록)"""
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+    
+    def _empty_summary(self) -> Dict:
+        return {'total': 0, 'by_level': {level: 0 for level in RISK_FILTER_LEVELS}}
+    
+    def _load_summary(self) -> Optional[Dict]:
+        """집계 파일 로드 (없거나 손상되었으면 None)"""
+        try:
+            with open(self.summary_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception:
+            return None
+    
+    def _save_summary(self, summary: Dict):
+        """집계 파일 저장"""
+        try:
+            self._write_json(self.summary_path, summary)
+        except Exception as e:
+            print(f"집계 저장 오류: {e}")
+    
+    def _ensure_summary(self):
+        """
+        집계가 없거나 분류 데이터와 맞지 않으면 전체 재계산 (잠금 안에서 호출)
+        
+        총계뿐 아니라 등급별 수도 비교하며, filter_level이 없는 기존 분류 정보에는 필드를 채워 넣습니다.
+        """
+        data = self._load_data()
+        missing = [name for name, item in data.items() if 'filter_level' not in item]
+        for name in missing:
+            data[name]['filter_level'], data[name]['filter_color'] = compute_filter_level(data[name])
+        if missing:
+            self._save_data(data)
+        
+        expected = self._empty_summary()
+        for item in data.values():
+            expected['by_level'][item['filter_level']] += 1
+        expected['total'] = len(data)
+        
+        summary = self._load_summary()
+        if summary == expected:
+            return
+        self._save_summary(expected)
+        print(f"위험도 집계 재계산 완료: {expected['by_level']}")
+    
+    def _update_summary(self, removed_level: Optional[str] = None, added_level: Optional[str] = None):
+        """집계 증분 갱신 (잠금 안에서 호출)"""
+        summary = self._load_summary() or self._empty_summary()
+        by_level = summary['by_level']
+        if removed_level is not None:
+            by_level[removed_level] = max(0, by_level.get(removed_level, 0) - 1)
+            summary['total'] = max(0, summary.get('total', 0) - 1)
+        if added_level is not None:
+            by_level[added_level] = by_level.get(added_level, 0) + 1
+            summary['total'] = summary.get('total', 0) + 1
+        self._save_summary(summary)
+    
+    def get_risk_summary(self) -> Dict:
+        """
+        위험도 등급별 분류 정보 수
+        
+        Returns:
+            {'critical': n, 'danger': n, 'caution': n, 'safe': n, 'unknown': n, 'unclassified': n}
+        """
+        summary = self._load_summary() or self._empty_summary()
+        return {level: summary['by_level'].get(level, 0) for level in RISK_FILTER_LEVELS}
     
     def _load_data(self) -> Dict:
         """JSON 파일에서 데이터 로드"""
@@ -42,8 +206,7 @@ class ClassificationStorage:
     def _save_data(self, data: Dict):
         """JSON 파일에 데이터 저장"""
         try:
-            with open(self.storage_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            self._write_json(self.storage_path, data)
         except Exception as e:
             print(f"데이터 저장 오류: {e}")
     
@@ -64,18 +227,83 @@ class ClassificationStorage:
                     'timestamp': 분류 시각
                 }
         """
-        data = self._load_data()
-        
         # 타임스탬프 추가
         classification_data['timestamp'] = datetime.now().isoformat()
         classification_data['filename'] = filename
         
-        # 파일명을 키로 저장
-        data[filename] = classification_data
+        # 지도 필터 등급/색상은 저장 시 한 번만 계산
+        filter_level, filter_color = compute_filter_level(classification_data)
+        classification_data['filter_level'] = filter_level
+        classification_data['filter_color'] = filter_color
         
-        self._save_data(data)
+        with self._locked():
+            data = self._load_data()
+            previous = data.get(filename)
+            previous_level = previous.get('filter_level', 'unclassified') if previous else None
+            
+            # 파일명을 키로 저장
+            data[filename] = classification_data
+            
+            self._save_data(data)
+            self._update_summary(removed_level=previous_level, added_level=filter_level)
         print(f"분류 정보 저장 완료: {filename} -> {classification_data.get('species', 'Unknown')}")
-    
+
+    def save_classifications(self, records: Dict[str, Dict],
+                             expected_timestamps: Optional[Dict[str, Optional[str]]] = None) -> List[str]:
+        """
+        분류 정보 여러 건을 한 번에 저장 (일괄 수집용)
+
+        save_classification을 반복하면 건마다 전체 JSON을 다시 쓰므로,
+        파일 읽기/쓰기와 집계 갱신을 한 번만 수행합니다.
+
+        Args:
+            records: {이미지 파일명: 분류 정보 딕셔너리}
+            expected_timestamps: {이미지 파일명: 기존 레코드 timestamp (없어야 하면 None)}
+                여기 있는 파일명은 저장된 레코드의 timestamp가 같을 때만 덮어씀
+                (백그라운드 작업이 그 사이 다시 분류된 최신 레코드를 덮어쓰지 않도록)
+
+        Returns:
+            실제로 저장한 파일명 목록
+        """
+        if not records:
+            return []
+
+        timestamp = datetime.now().isoformat()
+        for filename, classification_data in records.items():
+            classification_data['timestamp'] = timestamp
+            classification_data['filename'] = filename
+            filter_level, filter_color = compute_filter_level(classification_data)
+            classification_data['filter_level'] = filter_level
+            classification_data['filter_color'] = filter_color
+
+        saved = []
+        with self._locked():
+            data = self._load_data()
+            summary = self._load_summary() or self._empty_summary()
+            by_level = summary['by_level']
+
+            for filename, classification_data in records.items():
+                previous = data.get(filename)
+                if expected_timestamps is not None and filename in expected_timestamps:
+                    if (previous or {}).get('timestamp') != expected_timestamps[filename]:
+                        print(f"분류 정보가 그 사이 바뀌어 저장하지 않음: {filename}")
+                        continue
+                if previous is not None:
+                    previous_level = previous.get('filter_level', 'unclassified')
+                    by_level[previous_level] = max(0, by_level.get(previous_level, 0) - 1)
+                    summary['total'] = max(0, summary.get('total', 0) - 1)
+                filter_level = classification_data['filter_level']
+                by_level[filter_level] = by_level.get(filter_level, 0) + 1
+                summary['total'] = summary.get('total', 0) + 1
+                data[filename] = classification_data
+                saved.append(filename)
+
+            if saved:
+                self._save_data(data)
+                self._save_summary(summary)
+        print(f"분류 정보 일괄 저장 완료: {len(saved)}건")
+        return saved
+
     def get_classification(self, filename: str) -> Optional[Dict]:
         """
         파일명으로 분류 정보 조회
@@ -95,15 +323,20 @@ class ClassificationStorage:
     
     def delete_classification(self, filename: str):
         """분류 정보 삭제"""
-        data = self._load_data()
-        if filename in data:
-            del data[filename]
+        with self._locked():
+            data = self._load_data()
+            if filename not in data:
+                return
+            removed = data.pop(filename)
             self._save_data(data)
-            print(f"분류 정보 삭제 완료: {filename}")
+            self._update_summary(removed_level=removed.get('filter_level', 'unclassified'))
+        print(f"분류 정보 삭제 완료: {filename}")
     
     def clear_all(self):
         """모든 분류 정보 삭제"""
-        self._save_data({})
+        with self._locked():
+            self._save_data({})
+            self._save_summary(self._empty_summary())
         print("모든 분류 정보 삭제 완료")
 
 
@@ -1,3 +1,6 @@
+import os
+import threading
+import time
 import torch
 import torch.nn as nn
 import timm
@@ -10,6 +13,80 @@ from pathlib import Path
 from PIL import Image
 
 
+# NEST_OFFLINE=1이면 사전 훈련 가중치를 내려받지 않음 (폐쇄망 노드)
+OFFLINE_MODE = os.environ.get("NEST_OFFLINE", "0").lower() in ("1", "true", "yes", "on")
+
+# 탐지 박스 분류 TTA 방식: always(항상 3회), adaptive(확신이 낮을 때만 반전/회전 추가), off
+TTA_MODES = ('always', 'adaptive', 'off')
+TTA_MODE = os.environ.get("NEST_TTA_MODE", "adaptive").lower()
+# adaptive: 원본 1회 추론의 top-1/top-2 확률 차가 이 값 이상이고
+TTA_MIN_MARGIN = float(os.environ.get("NEST_TTA_MIN_MARGIN", "0.6"))
+# 정규화 엔트로피(0~1)가 이 값 이하이면 TTA 생략 (python -m utils.tta_calibrate로 조정)
+TTA_MAX_ENTROPY = float(os.environ.get("NEST_TTA_MAX_ENTROPY", "0.3"))
+
+
+def prediction_uncertainty(probs):
+    """
+    확률 벡터 -> (top-1과 top-2 확률 차, 정규화 엔트로피 0~1)
+    """
+    probs = np.asarray(probs, dtype=np.float64)
+    if probs.size < 2:
+        return 1.0, 0.0
+    top2 = np.partition(probs, -2)[-2:]
+    margin = float(top2[1] - top2[0])
+    nonzero = probs[probs > 0]
+    entropy = float(-(nonzero * np.log(nonzero)).sum() / np.log(probs.size))
+    return margin, entropy
+
+
+def tta_needed(probs, min_margin=TTA_MIN_MARGIN, max_entropy=TTA_MAX_ENTROPY):
+    """원본 1회 추론 결과가 확신이 낮아 TTA가 필요한지"""
+    margin, entropy = prediction_uncertainty(probs)
+    return margin < min_margin or entropy > max_entropy
+
+
+def read_rgb_image(image_path):
+    """이미지 파일 -> RGB numpy array (한글 경로 지원)"""
+    with open(str(image_path), 'rb') as f:
+        image_data = f.read()
+    image_array = np.frombuffer(image_data, np.uint8)
+    image = cv2.imdecode(image_array, cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError(f"이미지를 로드할 수 없습니다: {image_path}")
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+
+def bbox_to_pixels(det, image_shape):
+    """
+    여러 형식의 바운딩 박스 -> 픽셀 좌표 (x1, y1, x2, y2)
+
+    지원 형식: {'bbox': [x1, y1, x2, y2]}, {'bbox': {x, y, width, height}} (정규화),
+    {x, y, width, height} (정규화), {x1, y1, x2, y2}, [x1, y1, x2, y2]
+
+    Returns:
+        (x1, y1, x2, y2) 또는 None (해석할 수 없음)
+    """
+    h, w = image_shape[:2]
+    if isinstance(det, dict):
+        if 'bbox' in det:
+            bbox = det['bbox']
+            if isinstance(bbox, dict) and 'x' in bbox:
+                # {x, y, width, height} 형식
+                return (int(bbox['x'] * w), int(bbox['y'] * h),
+                        int((bbox['x'] + bbox['width']) * w), int((bbox['y'] + bbox['height']) * h))
+            # [x1, y1, x2, y2] 형식
+            return tuple(map(int, bbox[:4]))
+        # det 자체가 bbox인 경우
+        if 'x' in det:
+            return (int(det['x'] * w), int(det['y'] * h),
+                    int((det['x'] + det['width']) * w), int((det['y'] + det['height']) * h))
+        return tuple(map(int, [det.get('x1', 0), det.get('y1', 0), det.get('x2', 100), det.get('y2', 100)]))
+    # list 형식인 경우
+    if len(det) >= 4:
+        return tuple(map(int, det[:4]))
+    return None
+
+
 class InsectClassifier:
     """곤충 목 분류 클래스 - EfficientNet-B4 사용"""
     
@@ -51,6 +128,7 @@ class InsectClassifier:
         
         # 모델 로드
         self.model = None
+        self.load_seconds = None
         self.load_model()
         
         # 전처리 설정
@@ -59,6 +137,20 @@ class InsectClassifier:
             A.Normalize(mean=(0.485, 0.456, 0.406), std=(0.229, 0.224, 0.225), max_pixel_value=255.0),
             ToTensorV2()
         ])
+        
+        # TTA 변환 (원본, 좌우 반전, 회전)
+        self.tta_transforms = [
+            A.Compose([A.Resize(224, 224), A.Normalize(mean=(0.485, 0.456, 0.406), std=(0.229, 0.224, 0.225)), ToTensorV2()]),
+            A.Compose([A.HorizontalFlip(p=1.0), A.Resize(224, 224), A.Normalize(mean=(0.485, 0.456, 0.406), std=(0.229, 0.224, 0.225)), ToTensorV2()]),
+            A.Compose([A.Rotate(limit=15, p=1.0), A.Resize(224, 224), A.Normalize(mean=(0.485, 0.456, 0.406), std=(0.229, 0.224, 0.225)), ToTensorV2()]),
+        ]
+        
+        # 탐지 박스 분류 TTA 설정 및 누적 통계
+        self.tta_mode = TTA_MODE if TTA_MODE in TTA_MODES else 'always'
+        self.tta_min_margin = TTA_MIN_MARGIN
+        self.tta_max_entropy = TTA_MAX_ENTROPY
+        self._stats_lock = threading.Lock()
+        self.tta_stats = {'crops': 0, 'tta_run': 0, 'tta_skipped': 0}
     
     def load_classes(self):
         """클래스 정보 로드"""
@@ -79,17 +171,27 @@ class InsectClassifier:
             self.idx_to_order = {0: "Unknown"}
     
     def load_model(self):
-        """모델 로드"""
+        """
+        모델 로드
+        
+        로컬 체크포인트가 있으면 곧바로 덮어쓰므로 ImageNet 사전 훈련 가중치를
+        받지 않고(pretrained=False) 구조만 생성합니다.
+        """
+        start = time.perf_counter()
+        num_classes = len(self.order_to_idx)
+        use_pretrained = not self.model_path.exists() and not OFFLINE_MODE
         try:
-            num_classes = len(self.order_to_idx)
-            self.model = timm.create_model('efficientnet_b4', pretrained=True, num_classes=num_classes)
+            self.model = timm.create_model('efficientnet_b4', pretrained=use_pretrained, num_classes=num_classes)
             
             if self.model_path.exists():
                 print(f"모델 로드: {self.model_path}")
                 self.model.load_state_dict(torch.load(str(self.model_path), map_location=self.device))
-            else:
+            elif use_pretrained:
                 print(f"경고: 모델 파일이 없습니다: {self.model_path}")
                 print("사전 훈련된 EfficientNet-B4를 사용합니다.")
+            else:
+                print(f"경고: 모델 파일이 없고 오프라인 모드입니다: {self.model_path}")
+                print("초기화된 EfficientNet-B4를 사용합니다 (분류 결과를 신뢰할 수 없음).")
             
             self.model = self.model.to(self.device)
             self.model.eval()
@@ -97,9 +199,12 @@ class InsectClassifier:
         except Exception as e:
             print(f"모델 로드 중 오류: {str(e)}")
             # 기본 모델 사용
-            self.model = timm.create_model('efficientnet_b4', pretrained=True, num_classes=len(self.order_to_idx))
+            self.model = timm.create_model('efficientnet_b4', pretrained=use_pretrained, num_classes=num_classes)
             self.model = self.model.to(self.device)
             self.model.eval()
+        
+        self.load_seconds = time.perf_counter() - start
+        print(f"[MODEL] 목 분류기 로드: {self.load_seconds:.2f}초 (pretrained={use_pretrained})")
     
     def classify(self, image_path, top_k=5, use_tta=True):
         """
@@ -116,12 +221,7 @@ class InsectClassifier:
         try:
             # 이미지 로드
             if isinstance(image_path, (str, Path)):
-                # 한글 경로 지원
-                with open(str(image_path), 'rb') as f:
-                    image_data = f.read()
-                image_array = np.frombuffer(image_data, np.uint8)
-                image = cv2.imdecode(image_array, cv2.IMREAD_COLOR)
-                image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+                image = read_rgb_image(image_path)
             elif hasattr(image_path, 'convert'):
                 # PIL Image인 경우
                 image = np.array(image_path.convert('RGB'))
@@ -129,19 +229,7 @@ class InsectClassifier:
                 # numpy array인 경우
                 image = image_path
             
-            if use_tta:
-                predictions = self._classify_with_tta(image)
-            else:
-                predictions = self._classify_single(image)
-            
-            # Top-K 예측 정렬
-            predictions = sorted(predictions, key=lambda x: x['confidence'], reverse=True)[:top_k]
-            
-            return {
-                'order': predictions[0]['order'] if predictions else 'Unknown',
-                'confidence': predictions[0]['confidence'] if predictions else 0.0,
-                'top_k': predictions
-            }
+            return self.classify_batch([image], top_k=top_k, use_tta=use_tta)[0]
         
         except Exception as e:
             print(f"분류 오류: {e}")
@@ -151,6 +239,11 @@ class InsectClassifier:
                 'top_k': []
             }
     
+    def warm_up(self):
+        """더미 이미지로 한 번 추론하여 커널/메모리 할당 초기화"""
+        dummy = np.zeros((224, 224, 3), dtype=np.uint8)
+        self._classify_single(dummy)
+    
     def _classify_single(self, image):
         """단일 이미지 분류"""
         transformed = self.transform(image=image)
@@ -170,108 +263,147 @@ class InsectClassifier:
             
             return predictions
     
-    def _classify_with_tta(self, image):
-        """TTA를 적용한 분류"""
-        # TTA 변환 정의
-        tta_transforms = [
-            A.Compose([A.Resize(224, 224), A.Normalize(mean=(0.485, 0.456, 0.406), std=(0.229, 0.224, 0.225)), ToTensorV2()]),
-            A.Compose([A.HorizontalFlip(p=1.0), A.Resize(224, 224), A.Normalize(mean=(0.485, 0.456, 0.406), std=(0.229, 0.224, 0.225)), ToTensorV2()]),
-            A.Compose([A.Rotate(limit=15, p=1.0), A.Resize(224, 224), A.Normalize(mean=(0.485, 0.456, 0.406), std=(0.229, 0.224, 0.225)), ToTensorV2()]),
-        ]
+    def _forward_views(self, images, transforms, batch_size=32):
+        """
+        이미지 x 변환 조합을 batch_size씩 추론
         
-        all_predictions = []
+        Returns:
+            (이미지별 확률 합 리스트, 이미지별 추론한 변환 수 리스트)
+        """
+        tensors = []
+        owners = []
+        for index, image in enumerate(images):
+            for transform in transforms:
+                try:
+                    tensors.append(transform(image=image)['image'])
+                    owners.append(index)
+                except Exception:
+                    continue
         
-        for transform in tta_transforms:
-            try:
-                transformed = transform(image=image)
-                input_tensor = transformed['image'].unsqueeze(0).to(self.device)
-                
-                with torch.no_grad():
-                    outputs = self.model(input_tensor)
-                    probabilities = torch.softmax(outputs, 1)[0]
-                    all_predictions.append(probabilities.cpu().numpy())
-            except:
-                continue
+        prob_sums = [None] * len(images)
+        counts = [0] * len(images)
+        with torch.no_grad():
+            for start in range(0, len(tensors), batch_size):
+                input_tensor = torch.stack(tensors[start:start + batch_size]).to(self.device)
+                probabilities = torch.softmax(self.model(input_tensor), 1).cpu().numpy()
+                for owner, probs in zip(owners[start:start + batch_size], probabilities):
+                    prob_sums[owner] = probs if prob_sums[owner] is None else prob_sums[owner] + probs
+                    counts[owner] += 1
+        return prob_sums, counts
+    
+    def classify_batch(self, images, top_k=5, use_tta=True, batch_size=32):
+        """
+        여러 이미지(크롭) 배치 분류
         
-        if not all_predictions:
-            return self._classify_single(image)
+        모든 이미지의 TTA 변형을 한 텐서로 쌓아 batch_size씩 추론하고,
+        이미지별로 변형 결과를 평균합니다.
         
-        # 예측 결과 평균
-        avg_predictions = np.mean(all_predictions, axis=0)
+        Args:
+            images: RGB numpy array 리스트
+            top_k: 상위 k개 결과 반환
+            use_tta: True/'always'(항상 TTA), False/'off', 'adaptive'
+                ('adaptive'는 원본 1회 추론의 확신이 낮은 이미지만 반전/회전 변형을 추가 추론)
+            batch_size: 한 번에 추론할 텐서 수
         
-        predictions = []
-        for idx, prob in enumerate(avg_predictions):
-            order_name = self.idx_to_order.get(idx, f"Class_{idx}")
-            predictions.append({
-                'order': order_name,
-                'confidence': float(prob)
-            })
+        Returns:
+            list: 이미지 순서대로 classify()와 같은 형식의 결과 (+ 'tta': TTA 수행 여부)
+        """
+        if use_tta == 'adaptive':
+            prob_sums, counts = self._forward_views(images, self.tta_transforms[:1], batch_size)
+            uncertain = [
+                index for index, (prob_sum, count) in enumerate(zip(prob_sums, counts))
+                if not count or tta_needed(prob_sum / count, self.tta_min_margin, self.tta_max_entropy)
+            ]
+            if uncertain:
+                extra_sums, extra_counts = self._forward_views(
+                    [images[i] for i in uncertain], self.tta_transforms[1:], batch_size
+                )
+                for index, extra_sum, extra_count in zip(uncertain, extra_sums, extra_counts):
+                    if extra_count:
+                        prob_sums[index] = extra_sum if prob_sums[index] is None else prob_sums[index] + extra_sum
+                        counts[index] += extra_count
+            uncertain = set(uncertain)
+            tta_flags = [index in uncertain for index in range(len(images))]
+            with self._stats_lock:
+                self.tta_stats['crops'] += len(images)
+                self.tta_stats['tta_run'] += len(uncertain)
+                self.tta_stats['tta_skipped'] += len(images) - len(uncertain)
+        else:
+            use_tta = use_tta not in (False, 'off')
+            transforms = self.tta_transforms if use_tta else [self.transform]
+            prob_sums, counts = self._forward_views(images, transforms, batch_size)
+            tta_flags = [use_tta] * len(images)
         
-        return predictions
+        results = []
+        for prob_sum, count, tta in zip(prob_sums, counts, tta_flags):
+            if not count:
+                results.append({'order': 'Unknown', 'confidence': 0.0, 'top_k': [], 'tta': tta})
+                continue
+            
+            # 예측 결과 평균 후 Top-K 정렬
+            predictions = [
+                {'order': self.idx_to_order.get(idx, f"Class_{idx}"), 'confidence': float(prob)}
+                for idx, prob in enumerate(prob_sum / count)
+            ]
+            predictions = sorted(predictions, key=lambda x: x['confidence'], reverse=True)[:top_k]
+            results.append({
+                'order': predictions[0]['order'],
+                'confidence': predictions[0]['confidence'],
+                'top_k': predictions,
+                'tta': tta
+            })
+        return results
     
-    def classify_detections(self, image_path, detections, crop_dir=None):
+    def get_tta_stats(self):
+        """adaptive TTA 누적 통계 (생략 비율 포함)"""
+        with self._stats_lock:
+            stats = dict(self.tta_stats)
+        stats.update({
+            'mode': self.tta_mode,
+            'min_margin': self.tta_min_margin,
+            'max_entropy': self.tta_max_entropy,
+            'skip_rate': round(stats['tta_skipped'] / stats['crops'], 4) if stats['crops'] else 0.0
+        })
+        return stats
+    
+    def classify_detections(self, image_path, detections, crop_dir=None, image=None, tta=None):
         """
-        탐지된 곤충들을 크롭하여 각각 분류
+        탐지된 곤충들을 크롭하여 한 번에 분류
 
         Args:
             image_path: 원본 이미지 경로
             detections: 탐지 결과 리스트
             crop_dir: 크롭 이미지 저장 디렉토리
+            image: 이미 디코딩한 RGB 이미지 (있으면 다시 읽지 않음)
+            tta: 'always', 'adaptive', 'off' (None이면 NEST_TTA_MODE)
 
         Returns:
             list: 각 탐지에 대한 분류 결과
         """
         # 원본 이미지 로드
-        with open(str(image_path), 'rb') as f:
-            image_data = f.read()
-        image_array = np.frombuffer(image_data, np.uint8)
-        image = cv2.imdecode(image_array, cv2.IMREAD_COLOR)
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        
-        classification_results = []
+        image_rgb = image if image is not None else read_rgb_image(image_path)
         
+        crops = []
         for idx, det in enumerate(detections):
-            # detections가 dict인지 list인지 확인
-            if isinstance(det, dict):
-                # 정규화된 좌표인 경우 픽셀 좌표로 변환
-                if 'bbox' in det:
-                    bbox = det['bbox']
-                    if isinstance(bbox, dict) and 'x' in bbox:
-                        # {x, y, width, height} 형식
-                        h, w = image.shape[:2]
-                        x1 = int(bbox['x'] * w)
-                        y1 = int(bbox['y'] * h)
-                        x2 = int((bbox['x'] + bbox['width']) * w)
-                        y2 = int((bbox['y'] + bbox['height']) * h)
-                    else:
-                        # [x1, y1, x2, y2] 형식
-                        x1, y1, x2, y2 = map(int, bbox[:4])
-                else:
-                    # det 자체가 bbox인 경우
-                    if 'x' in det:
-                        h, w = image.shape[:2]
-                        x1 = int(det['x'] * w)
-                        y1 = int(det['y'] * h)
-                        x2 = int((det['x'] + det['width']) * w)
-                        y2 = int((det['y'] + det['height']) * h)
-                    else:
-                        x1, y1, x2, y2 = map(int, [det.get('x1', 0), det.get('y1', 0), det.get('x2', 100), det.get('y2', 100)])
-            else:
-                # list 형식인 경우
-                if len(det) >= 4:
-                    x1, y1, x2, y2 = map(int, det[:4])
-                else:
-                    continue
+            pixels = bbox_to_pixels(det, image_rgb.shape)
+            if pixels is None:
+                continue
+            x1, y1, x2, y2 = pixels
             
             # 바운딩 박스 크롭
             cropped = image_rgb[y1:y2, x1:x2]
-            
             if cropped.size == 0:
                 continue
-            
-            # 분류 수행
-            classification_result = self.classify(cropped, top_k=3, use_tta=True)
-            
+            crops.append((idx, pixels, cropped))
+        
+        # 모든 크롭을 한 배치로 분류
+        batch_results = self.classify_batch(
+            [cropped for _, _, cropped in crops], top_k=3, use_tta=tta or self.tta_mode
+        )
+        
+        classification_results = []
+        order_names = list(self.order_to_idx.keys())
+        for (idx, pixels, cropped), classification_result in zip(crops, batch_results):
             # 크롭 이미지 저장 (선택사항)
             crop_path = None
             if crop_dir:
@@ -285,16 +417,17 @@ class InsectClassifier:
             classification = []
             for pred in classification_result['top_k']:
                 classification.append({
-                    'class': list(self.order_to_idx.keys()).index(pred['order']) if pred['order'] in self.order_to_idx else 0,
+                    'class': order_names.index(pred['order']) if pred['order'] in self.order_to_idx else 0,
                     'class_name': pred['order'],
                     'confidence': pred['confidence']
                 })
             
             classification_results.append({
                 'detection_idx': idx,
-                'bbox': [x1, y1, x2, y2],
+                'bbox': list(pixels),
                 'classification': classification,
-                'crop_path': str(crop_path) if crop_path else None
+                'crop_path': str(crop_path) if crop_path else None,
+                'tta': classification_result['tta']
             })
         
-        return classification_results
\ No newline at end of file
+        return classification_results
@@ -0,0 +1,166 @@
+"""
+크롭 이미지 보관 모듈
+
+분류기는 크롭을 메모리에서만 다루고, 감사(audit)용으로 크롭 파일이 필요할 때만
+이 모듈이 백그라운드 스레드에서 JPEG으로 저장합니다. 파일 이름은 크롭 픽셀의
+내용 해시라 같은 크롭은 한 번만 저장되고, 동시 요청이 서로의 파일을 덮어쓰지 않습니다.
+
+    crops/ab/ab12...ef.jpg      # 내용 주소 기반 크롭
+    crops/index.jsonl           # 원본 이미지/박스 -> 크롭 해시 기록
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from PIL import Image
+
+
+def crop_digest(crop) -> str:
+    """크롭 픽셀(numpy array) 내용 해시 (모양 포함)"""
+    digest = hashlib.sha256(str(crop.shape).encode('ascii'))
+    digest.update(crop.tobytes())
+    return digest.hexdigest()
+
+
+class CropArchiver:
+    """내용 주소 기반 크롭 보관소 (비동기 저장)"""
+
+    def __init__(self, archive_dir, quality: int = 90, workers: int = 1, max_pending: int = 256):
+        """
+        초기화
+
+        Args:
+            archive_dir: 저장 디렉토리
+            quality: JPEG 품질
+            workers: 백그라운드 저장 스레드 수
+            max_pending: 대기 작업 상한 (넘으면 요청 지연 대신 보관을 건너뜀)
+        """
+        self.archive_dir = Path(archive_dir)
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.archive_dir / "index.jsonl"
+        self.quality = quality
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.written = 0
+        self.duplicates = 0
+        self.dropped = 0
+        self.failed = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="crop-archive")
+
+    def crop_path(self, digest: str) -> Path:
+        return self.archive_dir / digest[:2] / f"{digest}.jpg"
+
+    def _write(self, crop) -> Tuple[str, bool]:
+        """크롭 저장 (이미 있으면 건너뜀) -> (해시, 새로 저장했는지)"""
+        digest = crop_digest(crop)
+        path = self.crop_path(digest)
+        if path.exists():
+            return digest, False
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        Image.fromarray(crop).save(tmp_path, 'JPEG', quality=self.quality)
+        os.replace(tmp_path, path)
+        return digest, True
+
+    def _run(self, image, boxes: List[Tuple[int, Sequence[int]]], source: str):
+        lines = []
+        try:
+            h, w = image.shape[:2]
+            for index, bbox in boxes:
+                x1, y1, x2, y2 = (int(v) for v in bbox[:4])
+                crop = image[max(0, y1):min(h, y2), max(0, x1):min(w, x2)]
+                if crop.size == 0:
+                    continue
+                digest, created = self._write(crop)
+                with self._lock:
+                    if created:
+                        self.written += 1
+                    else:
+                        self.duplicates += 1
+                lines.append(json.dumps({
+                    'sha256': digest,
+                    'source': source,
+                    'index': index,
+                    'bbox': [x1, y1, x2, y2],
+                    'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')
+                }, ensure_ascii=False))
+        except Exception as e:
+            with self._lock:
+                self.failed += 1
+            print(f"[CROP_ARCHIVE] 저장 실패 ({source}): {e}")
+        finally:
+            if lines:
+                # 한 번의 append로 기록해 여러 워커 프로세스의 줄이 섞이지 않도록 함
+                with self._lock, open(self.index_path, 'a', encoding='utf-8') as f:
+                    f.write('\n'.join(lines) + '\n')
+            with self._lock:
+                self._pending -= 1
+
+    def submit(self, image, boxes: List[Tuple[int, Sequence[int]]], source: str) -> bool:
+        """
+        크롭 보관 예약 (백그라운드)
+
+        Args:
+            image: 원본 RGB 이미지 (보관이 끝날 때까지 수정하지 말 것)
+            boxes: [(탐지 인덱스, [x1, y1, x2, y2] 픽셀 좌표), ...]
+            source: 원본 이미지 파일명 (index.jsonl에 기록)
+
+        Returns:
+            예약했으면 True, 대기 작업이 많아 건너뛰었으면 False
+        """
+        if not boxes:
+            return False
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.dropped += 1
+                return False
+            self._pending += 1
+        self._executor.submit(self._run, image, list(boxes), source)
+        return True
+
+    def get_stats(self) -> Dict:
+        """보관소 통계"""
+        with self._lock:
+            return {
+                'enabled': True,
+                'pending': self._pending,
+                'written': self.written,
+                'duplicates': self.duplicates,
+                'dropped': self.dropped,
+                'failed': self.failed
+            }
+
+
+def crop_archive_enabled_from_env() -> bool:
+    """NEST_CROP_ARCHIVE=1이면 크롭 보관 (기본: 보관하지 않음)"""
+    return os.environ.get("NEST_CROP_ARCHIVE", "0").lower() in ("1", "true", "yes", "on")
+
+
+# 싱글톤 인스턴스
+_crop_archiver_instance = None
+
+
+def get_crop_archiver() -> Optional[CropArchiver]:
+    """
+    크롭 보관소 싱글톤 인스턴스 반환 (비활성화되어 있으면 None)
+
+    환경 변수:
+        NEST_CROP_ARCHIVE: 1이면 활성화 (기본 0)
+        NEST_CROP_ARCHIVE_DIR: 저장 디렉토리 (기본: 프로젝트/crops)
+        NEST_CROP_ARCHIVE_QUALITY: JPEG 품질 (기본 90)
+    """
+    global _crop_archiver_instance
+    if _crop_archiver_instance is None and crop_archive_enabled_from_env():
+        default_dir = Path(__file__).parent.parent / "crops"
+        _crop_archiver_instance = CropArchiver(
+            archive_dir=os.environ.get("NEST_CROP_ARCHIVE_DIR", str(default_dir)),
+            quality=int(os.environ.get("NEST_CROP_ARCHIVE_QUALITY", "90"))
+        )
+    return _crop_archiver_instance
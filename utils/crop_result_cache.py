@@ -0,0 +1,170 @@
+"""
+크롭 분류 결과 캐시 모듈
+
+사용자가 바운딩 박스를 몇 픽셀 옮긴 뒤 다시 분류하면 같은 곤충을 다시 크롭해
+목 분류와 계층적 분류를 모두 다시 수행합니다. 세션마다 (이미지 내용 해시, 양자화한 박스)를
+키로 분류 결과를 보관하고, 새 박스와 IoU가 임계값 이상인 항목이 있으면 결과를 재사용합니다.
+
+캐시 상태는 세션 본문이 아니라 세션 저장소의 부가 항목(session_items)에 두어 요청마다 읽고 쓰는
+세션 크기를 늘리지 않습니다. 새 이미지를 올리거나 분류 모델/설정이 바뀌면 항목을 비우며,
+항목 수에도 상한을 둡니다.
+"""
+
+import copy
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+
+def bbox_xyxy(det) -> Optional[List[float]]:
+    """
+    탐지 항목 -> 픽셀 좌표 [x1, y1, x2, y2]
+
+    {'bbox': [x1, y1, x2, y2]} 또는 [x1, y1, x2, y2]만 지원합니다.
+    (정규화 좌표 등 다른 형식은 None -> 캐시하지 않음)
+    """
+    bbox = det.get('bbox') if isinstance(det, dict) else det
+    if not isinstance(bbox, (list, tuple)) or len(bbox) < 4:
+        return None
+    try:
+        return [float(value) for value in bbox[:4]]
+    except (TypeError, ValueError):
+        return None
+
+
+def quantize_bbox(bbox: List[float], step: int) -> Tuple[int, int, int, int]:
+    """좌표를 step 픽셀 격자로 반올림 (1~2픽셀 흔들림은 같은 키)"""
+    step = max(1, step)
+    return tuple(int(round(value / step)) * step for value in bbox[:4])
+
+
+def bbox_iou(a: List[float], b: List[float]) -> float:
+    """두 박스 [x1, y1, x2, y2]의 IoU"""
+    inter_w = min(a[2], b[2]) - max(a[0], b[0])
+    inter_h = min(a[3], b[3]) - max(a[1], b[1])
+    if inter_w <= 0 or inter_h <= 0:
+        return 0.0
+    inter = inter_w * inter_h
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+class CropResultCache:
+    """
+    세션별 크롭 분류 결과 캐시
+
+    상태는 호출자가 넘기는 dict(세션 부가 항목 'crop_cache')에 저장하고,
+    이 객체는 설정과 전체 적중 통계만 가집니다.
+    """
+
+    def __init__(self, iou_threshold: float = 0.9, quant_step: int = 4, max_entries: int = 64):
+        """
+        초기화
+
+        Args:
+            iou_threshold: 이 값 이상 겹치는 이전 박스의 결과를 재사용 (1 이상이면 정확히 같은 키만)
+            quant_step: 박스 좌표 양자화 간격 (픽셀)
+            max_entries: 세션당 보관할 최대 항목 수 (오래된 것부터 삭제)
+        """
+        self.iou_threshold = iou_threshold
+        self.quant_step = quant_step
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.iou_hits = 0
+        self.misses = 0
+
+    def _entries(self, state: Dict, content_hash: str, version: str) -> List[Dict]:
+        """이미지나 모델이 바뀌었으면 항목을 비우고 반환"""
+        if state.get('content_hash') != content_hash or state.get('model_version') != version:
+            state.clear()
+            state.update({'content_hash': content_hash, 'model_version': version, 'entries': []})
+        return state['entries']
+
+    def _key(self, content_hash: str, bbox: List[float]) -> str:
+        return f"{content_hash}:{','.join(map(str, quantize_bbox(bbox, self.quant_step)))}"
+
+    def lookup(self, state: Dict, content_hash: Optional[str], version: str, det) -> Optional[Dict]:
+        """
+        박스에 해당하는 이전 분류 결과 조회
+
+        Returns:
+            분류 결과 사본 (bbox는 새 박스로 바뀜) 또는 None
+        """
+        bbox = bbox_xyxy(det)
+        if not content_hash or bbox is None:
+            return None
+
+        entries = self._entries(state, content_hash, version)
+        key = self._key(content_hash, bbox)
+        match = next((entry for entry in entries if entry['key'] == key), None)
+        exact = match is not None
+        if match is None and self.iou_threshold < 1.0:
+            best_iou = 0.0
+            for entry in entries:
+                iou = bbox_iou(bbox, entry['bbox'])
+                if iou >= self.iou_threshold and iou > best_iou:
+                    match, best_iou = entry, iou
+
+        with self._lock:
+            if match is None:
+                self.misses += 1
+            elif exact:
+                self.exact_hits += 1
+            else:
+                self.iou_hits += 1
+        if match is None:
+            return None
+
+        result = copy.deepcopy(match['result'])
+        result['bbox'] = list(det['bbox']) if isinstance(det, dict) else list(det)
+        return result
+
+    def store(self, state: Dict, content_hash: Optional[str], version: str, det, result: Dict):
+        """분류 결과 저장 (같은 키는 덮어씀)"""
+        bbox = bbox_xyxy(det)
+        if not content_hash or bbox is None:
+            return
+
+        entries = self._entries(state, content_hash, version)
+        key = self._key(content_hash, bbox)
+        entries[:] = [entry for entry in entries if entry['key'] != key]
+        entries.append({'key': key, 'bbox': bbox, 'result': copy.deepcopy(result)})
+        del entries[:-self.max_entries]
+
+    def get_stats(self) -> Dict:
+        """캐시 통계 (모든 세션 합계)"""
+        with self._lock:
+            hits = self.exact_hits + self.iou_hits
+            lookups = hits + self.misses
+            return {
+                'iou_threshold': self.iou_threshold,
+                'quant_step': self.quant_step,
+                'exact_hits': self.exact_hits,
+                'iou_hits': self.iou_hits,
+                'misses': self.misses,
+                'hit_rate': round(hits / lookups, 4) if lookups else 0.0
+            }
+
+
+# 싱글톤 인스턴스
+_crop_result_cache_instance = None
+
+
+def get_crop_result_cache() -> CropResultCache:
+    """
+    크롭 분류 결과 캐시 싱글톤 인스턴스 반환
+
+    환경 변수:
+        NEST_CROP_CACHE_IOU: 재사용 IoU 임계값 (기본 0.9)
+        NEST_CROP_CACHE_QUANT: 박스 좌표 양자화 간격 px (기본 4)
+        NEST_CROP_CACHE_ENTRIES: 세션당 최대 항목 수 (기본 64)
+    """
+    global _crop_result_cache_instance
+    if _crop_result_cache_instance is None:
+        _crop_result_cache_instance = CropResultCache(
+            iou_threshold=float(os.environ.get("NEST_CROP_CACHE_IOU", "0.9")),
+            quant_step=int(os.environ.get("NEST_CROP_CACHE_QUANT", "4")),
+            max_entries=int(os.environ.get("NEST_CROP_CACHE_ENTRIES", "64"))
+        )
+    return _crop_result_cache_instance
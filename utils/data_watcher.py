@@ -0,0 +1,115 @@
+"""
+데이터 파일 변경 감시 모듈
+
+species_info.json, risk_data.json 등 JSON 데이터 파일의 수정 시각과 크기를
+주기적으로 확인하여, 변경되면 등록된 리로드 함수를 백그라운드 스레드에서 호출합니다.
+서버를 재시작하지 않고 종 데이터를 추가할 수 있습니다.
+"""
+
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+
+class DataFileWatcher:
+    """mtime 폴링 기반 파일 변경 감시기"""
+
+    def __init__(self, interval: float = 5.0):
+        """
+        초기화
+
+        Args:
+            interval: 파일 확인 주기 (초)
+        """
+        self.interval = interval
+        self._watches = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _file_signature(path: Path) -> Optional[Tuple[int, int]]:
+        """파일 상태 (수정 시각, 크기). 파일이 없으면 None"""
+        try:
+            stat = path.stat()
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
+    def watch(self, path, reload_callback: Callable[[], bool]):
+        """
+        감시할 파일 등록
+
+        Args:
+            path: 데이터 파일 경로 (아직 없어도 됨, 생성되면 리로드)
+            reload_callback: 변경 시 호출할 함수 (예: InfoProvider.reload)
+        """
+        path = Path(path)
+        with self._lock:
+            self._watches[path] = {
+                'callback': reload_callback,
+                'signature': self._file_signature(path)
+            }
+        print(f"[DATA_WATCHER] 감시 등록: {path}")
+
+    def check_now(self) -> Dict[str, bool]:
+        """
+        모든 감시 파일을 한 번 확인하고 변경된 파일 리로드
+
+        Returns:
+            {파일 경로: 리로드 성공 여부} (변경된 파일만)
+        """
+        with self._lock:
+            watches = list(self._watches.items())
+
+        reloaded = {}
+        for path, entry in watches:
+            signature = self._file_signature(path)
+            if signature == entry['signature'] or signature is None:
+                continue
+
+            print(f"[DATA_WATCHER] 변경 감지: {path}")
+            try:
+                success = entry['callback']() is not False
+            except Exception as e:
+                print(f"[DATA_WATCHER] 리로드 오류 ({path}): {e}")
+                success = False
+
+            # 실패해도 같은 내용으로 반복 시도하지 않도록 상태 갱신
+            entry['signature'] = signature
+            reloaded[str(path)] = success
+
+        return reloaded
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.check_now()
+
+    def start(self):
+        """감시 스레드 시작 (이미 실행 중이면 무시)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="data-file-watcher", daemon=True)
+        self._thread.start()
+        print(f"[DATA_WATCHER] 감시 시작 (주기: {self.interval}초)")
+
+    def stop(self):
+        """감시 스레드 종료"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+
+# 싱글톤 인스턴스
+_data_watcher_instance = None
+
+def get_data_watcher() -> DataFileWatcher:
+    """데이터 파일 감시기 싱글톤 인스턴스 반환 (주기: NEST_DATA_RELOAD_INTERVAL 환경 변수)"""
+    global _data_watcher_instance
+    if _data_watcher_instance is None:
+        interval = float(os.environ.get("NEST_DATA_RELOAD_INTERVAL", "5"))
+        _data_watcher_instance = DataFileWatcher(interval=interval)
+    return _data_watcher_instance
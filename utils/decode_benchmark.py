@@ -0,0 +1,165 @@
+"""
+탐지용 디코딩 벤치마크 모듈
+
+원본 해상도 디코딩과 축소 디코딩(utils/image_decode.py)의 지연 시간(ms/MP)과
+최대 메모리 증가량을 비교합니다. 메모리는 libjpeg 내부 버퍼까지 포함하도록
+각 측정을 새 프로세스에서 실행해 최대 RSS(VmHWM) 증가량으로 잽니다.
+
+사용법:
+    python -m utils.decode_benchmark photo1.jpg photo2.jpg
+    python -m utils.decode_benchmark --synthetic 12 --repeat 5   # 12MP 합성 JPEG
+    python -m utils.decode_benchmark --long-side 960 photo.jpg
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+
+BASE_DIR = Path(__file__).parent.parent
+
+DEFAULT_LONG_SIDE = 1280
+
+# 자식 프로세스에서 실행할 측정 코드 (import 이후의 최대 RSS 증가량만 셈)
+_CHILD_SCRIPT = r"""
+import json, resource, sys, time
+from utils.image_decode import read_image_for_detection
+
+def peak_rss_kb():
+    # ru_maxrss는 exec 전 부모 프로세스 값이 이어질 수 있어 Linux에서는 VmHWM 사용
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+path, long_side, repeat = sys.argv[1], int(sys.argv[2]), int(sys.argv[3])
+with open(path, 'rb') as f:
+    f.read()
+baseline_kb = peak_rss_kb()
+
+timings = []
+for _ in range(repeat):
+    start = time.perf_counter()
+    image, scale, size = read_image_for_detection(path, long_side)
+    timings.append(time.perf_counter() - start)
+    del image
+
+peak_kb = peak_rss_kb()
+timings.sort()
+print(json.dumps({
+    'seconds': timings[len(timings) // 2],
+    'scale': scale,
+    'size': size,
+    'peak_delta_mb': (peak_kb - baseline_kb) / 1024,
+}))
+"""
+
+
+def measure_decode(image_path, long_side: int, repeat: int = 3) -> Dict:
+    """
+    새 프로세스에서 디코딩 1회 측정
+
+    Args:
+        image_path: 이미지 경로
+        long_side: read_image_for_detection의 long_side (0이면 원본 해상도)
+        repeat: 반복 횟수 (중앙값 사용)
+
+    Returns:
+        {'seconds', 'scale', 'size', 'peak_delta_mb'}
+    """
+    completed = subprocess.run(
+        [sys.executable, '-c', _CHILD_SCRIPT, str(image_path), str(long_side), str(repeat)],
+        cwd=str(BASE_DIR),
+        capture_output=True,
+        text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"측정 실패 ({image_path}):\n{completed.stderr[-2000:]}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def make_synthetic_jpeg(megapixels: float, directory) -> Path:
+    """노이즈/그라데이션이 섞인 4:3 합성 JPEG 생성 (실제 사진과 비슷한 압축률)"""
+    import cv2
+    import numpy as np
+
+    width = int((megapixels * 1e6 * 4 / 3) ** 0.5)
+    height = int(width * 3 / 4)
+    gradient = np.linspace(0, 255, width, dtype=np.float32)[None, :, None]
+    rng = np.random.default_rng(0)
+    noise = rng.normal(0, 20, (height, width, 3)).astype(np.float32)
+    image = np.clip(gradient + noise, 0, 255).astype(np.uint8)
+
+    path = Path(directory) / f"synthetic_{megapixels:g}mp.jpg"
+    cv2.imwrite(str(path), image, [cv2.IMWRITE_JPEG_QUALITY, 90])
+    return path
+
+
+def run_benchmark(paths: List[Path], long_side: int = DEFAULT_LONG_SIDE, repeat: int = 3) -> List[Dict]:
+    """
+    각 이미지에 대해 원본/축소 디코딩 측정
+
+    Returns:
+        [{'path', 'megapixels', 'full': {...}, 'reduced': {...}}, ...]
+    """
+    results = []
+    for path in paths:
+        full = measure_decode(path, 0, repeat)
+        reduced = measure_decode(path, long_side, repeat)
+        width, height = full['size']
+        results.append({
+            'path': str(path),
+            'megapixels': width * height / 1e6,
+            'full': full,
+            'reduced': reduced
+        })
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="탐지용 축소 디코딩 벤치마크")
+    parser.add_argument('images', nargs='*', help="측정할 이미지 경로")
+    parser.add_argument('--synthetic', type=float, action='append', default=[],
+                        help="합성 JPEG 크기 (MP, 여러 번 지정 가능)")
+    parser.add_argument('--long-side', type=int, default=DEFAULT_LONG_SIDE,
+                        help=f"축소 후 남길 긴 변 최소 길이 (기본: {DEFAULT_LONG_SIDE})")
+    parser.add_argument('--repeat', type=int, default=3, help="반복 횟수 (중앙값 사용)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = [Path(path) for path in args.images]
+        paths += [make_synthetic_jpeg(mp, tmp_dir) for mp in args.synthetic]
+        if not paths:
+            paths = [make_synthetic_jpeg(mp, tmp_dir) for mp in (12.0, 24.0)]
+
+        start = time.perf_counter()
+        results = run_benchmark(paths, args.long_side, args.repeat)
+        elapsed = time.perf_counter() - start
+
+    print(f"[DECODE_BENCH] long_side={args.long_side}, repeat={args.repeat} ({elapsed:.1f}초)")
+    for result in results:
+        mp = result['megapixels']
+        full, reduced = result['full'], result['reduced']
+        print(f"  {os.path.basename(result['path'])} ({mp:.1f}MP)")
+        for label, entry in (('원본', full), (f"1/{reduced['scale']}", reduced)):
+            ms = entry['seconds'] * 1000
+            print(f"    {label:>5}: {ms:7.1f}ms ({ms / mp:5.1f}ms/MP), "
+                  f"최대 메모리 +{entry['peak_delta_mb']:.1f}MB")
+        if reduced['scale'] > 1:
+            print(f"    -> {full['seconds'] / reduced['seconds']:.1f}배 빠름, "
+                  f"메모리 {full['peak_delta_mb'] - reduced['peak_delta_mb']:.1f}MB 절감")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
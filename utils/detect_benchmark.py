@@ -0,0 +1,100 @@
+"""
+배치 탐지 처리량 벤치마크 모듈
+
+같은 이미지 묶음을 InsectDetector.detect 반복 호출과 detect_batch로 각각 탐지해
+처리량(장/초)을 비교하고, 두 방식의 이미지별 탐지 수가 같은지 확인합니다.
+
+사용법:
+    python -m utils.detect_benchmark uploads/*.jpg
+    python -m utils.detect_benchmark traps/ --batch-size 16 --workers 4
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.webp'}
+
+
+def collect_images(inputs: List[str]) -> List[Path]:
+    """파일/디렉토리 인자 -> 이미지 경로 목록 (디렉토리는 하위까지 검색)"""
+    paths = []
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            paths.extend(sorted(p for p in path.rglob('*') if p.suffix.lower() in IMAGE_EXTENSIONS))
+        elif path.suffix.lower() in IMAGE_EXTENSIONS:
+            paths.append(path)
+    return paths
+
+
+def run_benchmark(detector, paths: List[Path], batch_size: int = 8, workers: int = 2,
+                  mode: str = 'full') -> Dict:
+    """
+    반복 detect와 detect_batch 처리량 측정
+
+    Returns:
+        {'images', 'loop_seconds', 'batch_seconds', 'loop_rate', 'batch_rate', 'mismatches'}
+    """
+    # 첫 추론의 초기화 비용이 한쪽에만 들어가지 않도록 워밍업
+    detector.warm_up()
+
+    start = time.perf_counter()
+    looped = [detector.detect(path, mode=mode) for path in paths]
+    loop_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = detector.detect_batch(paths, batch_size=batch_size, mode=mode, prefetch_workers=workers)
+    batch_seconds = time.perf_counter() - start
+
+    mismatches = [
+        str(path) for path, a, b in zip(paths, looped, batched)
+        if a['count'] != b['count']
+    ]
+    return {
+        'images': len(paths),
+        'loop_seconds': loop_seconds,
+        'batch_seconds': batch_seconds,
+        'loop_rate': len(paths) / loop_seconds if loop_seconds else 0.0,
+        'batch_rate': len(paths) / batch_seconds if batch_seconds else 0.0,
+        'mismatches': mismatches
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="배치 탐지 처리량 벤치마크")
+    parser.add_argument('inputs', nargs='+', help="이미지 파일 또는 디렉토리")
+    parser.add_argument('--batch-size', type=int, default=8, help="detect_batch 배치 크기 (기본 8)")
+    parser.add_argument('--workers', type=int, default=2, help="디코딩 prefetch 스레드 수 (기본 2)")
+    parser.add_argument('--mode', choices=('full', 'tiled'), default='full', help="탐지 방식")
+    parser.add_argument('--model', default=None, help="탐지 모델 경로 (기본: utils/models/best_detector.pt)")
+    args = parser.parse_args(argv)
+
+    paths = collect_images(args.inputs)
+    if not paths:
+        print("[DETECT_BENCH] 이미지가 없습니다.")
+        return 1
+
+    from utils.detector import InsectDetector
+    detector = InsectDetector(model_path=args.model)
+
+    report = run_benchmark(detector, paths, args.batch_size, args.workers, args.mode)
+
+    print(f"[DETECT_BENCH] {report['images']}장, 배치 {args.batch_size}, prefetch {args.workers}, {args.mode}")
+    print(f"  반복 detect : {report['loop_seconds']:7.2f}초 ({report['loop_rate']:.2f}장/초)")
+    print(f"  detect_batch: {report['batch_seconds']:7.2f}초 ({report['batch_rate']:.2f}장/초)")
+    if report['loop_rate']:
+        print(f"  -> {report['batch_rate'] / report['loop_rate']:.2f}배")
+    if report['mismatches']:
+        # 배치는 크기가 다른 이미지를 정사각형으로 패딩하므로 경계 근처 박스가 드물게 달라질 수 있음
+        print(f"[DETECT_BENCH] 탐지 수가 다른 이미지 {len(report['mismatches'])}장:")
+        for path in report['mismatches'][:10]:
+            print(f"  {path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,215 @@
+"""
+탐지 결과 캐시 모듈
+
+같은 사진을 다시 올리면 YOLO 추론을 건너뛸 수 있도록, 업로드 원본의 내용 해시와
+탐지 모델 버전을 키로 탐지 결과(JSON)를 저장합니다. 박스가 그려진 결과 이미지는
+요청 시 utils/annotation.py가 렌더링하므로 캐시하지 않습니다.
+항목 수/전체 용량 상한을 넘으면 가장 오래 사용하지 않은 항목부터 삭제합니다.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+def model_version(model_path, **params) -> str:
+    """
+    모델 버전 문자열 (가중치 파일 이름/수정 시각/크기 + 추론 파라미터)
+
+    가중치 파일이 교체되거나 임계값이 바뀌면 다른 값이 되어 이전 캐시를 쓰지 않습니다.
+
+    Args:
+        model_path: 가중치 파일 경로 (없어도 됨)
+        **params: 결과에 영향을 주는 추론 파라미터 (예: conf=0.25, iou=0.45)
+
+    Returns:
+        16자리 16진수 문자열
+    """
+    model_path = Path(model_path) if model_path else None
+    signature = [model_path.name if model_path else '']
+    try:
+        stat = model_path.stat()
+        signature += [str(stat.st_mtime_ns), str(stat.st_size)]
+    except (OSError, AttributeError):
+        signature.append('missing')
+    signature += [f"{key}={params[key]}" for key in sorted(params)]
+    return hashlib.sha256('|'.join(signature).encode('utf-8')).hexdigest()[:16]
+
+
+class DetectionCache:
+    """내용 해시 기반 탐지 결과 캐시 (LRU, 디스크 저장)"""
+
+    def __init__(self, cache_dir, max_entries: int = 512, max_bytes: int = 256 * 1024 * 1024):
+        """
+        초기화
+
+        Args:
+            cache_dir: 캐시 파일 저장 디렉토리
+            max_entries: 최대 항목 수
+            max_bytes: 최대 전체 용량
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        # key -> {'detections': [...], 'bytes': 용량}
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._load_index()
+
+    @staticmethod
+    def _key(content_hash: str, version: str) -> str:
+        return f"{version}_{content_hash}"
+
+    def _read_entry(self, key: str) -> Optional[Dict]:
+        """디스크의 항목 메타데이터 읽기 (없거나 손상되면 None)"""
+        meta_path = self.cache_dir / f"{key}.json"
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            size = meta_path.stat().st_size
+            return {'detections': meta['detections'], 'bytes': size}
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _load_index(self):
+        """디스크에 남아 있는 항목으로 인덱스 복원 (오래된 것부터)"""
+        meta_files = sorted(self.cache_dir.glob("*.json"), key=lambda path: path.stat().st_mtime)
+        for meta_path in meta_files:
+            entry = self._read_entry(meta_path.stem)
+            if entry is not None:
+                self._entries[meta_path.stem] = entry
+                self._total_bytes += entry['bytes']
+        with self._lock:
+            self._evict()
+        if self._entries:
+            print(f"[DETECTION_CACHE] 캐시 복원: {len(self._entries)}개, {self._total_bytes / 1024 / 1024:.1f}MB")
+
+    def _remove_files(self, key: str):
+        try:
+            (self.cache_dir / f"{key}.json").unlink()
+        except OSError:
+            pass
+
+    def _evict(self):
+        """상한을 넘는 만큼 LRU 순으로 삭제 (잠금 안에서 호출)"""
+        while self._entries and (len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes):
+            key, entry = self._entries.popitem(last=False)
+            self._total_bytes -= entry['bytes']
+            self._remove_files(key)
+            self.evictions += 1
+
+    def get(self, content_hash: str, version: str) -> Optional[List[Dict]]:
+        """
+        캐시된 탐지 결과 조회
+
+        Args:
+            content_hash: 업로드 원본 SHA-256
+            version: 탐지 모델 버전 (model_version)
+
+        Returns:
+            탐지 결과 리스트 또는 None (캐시 없음)
+        """
+        key = self._key(content_hash, version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                # 다른 워커 프로세스가 저장했을 수 있으므로 디스크 확인
+                entry = self._read_entry(key)
+                if entry is not None:
+                    self._entries[key] = entry
+                    self._total_bytes += entry['bytes']
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return json.loads(json.dumps(entry['detections']))
+
+    def put(self, content_hash: str, version: str, detections: List[Dict]):
+        """
+        탐지 결과 저장
+
+        Args:
+            content_hash: 업로드 원본 SHA-256
+            version: 탐지 모델 버전
+            detections: InsectDetector.detect 결과의 detections
+        """
+        key = self._key(content_hash, version)
+        meta_path = self.cache_dir / f"{key}.json"
+
+        try:
+            # 같은 이미지를 여러 워커/스레드가 동시에 저장해도 임시 파일이 겹치지 않도록 pid/스레드 포함
+            tmp_path = meta_path.with_name(f"{meta_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'detections': detections}, f, separators=(',', ':'))
+            os.replace(tmp_path, meta_path)
+            size = meta_path.stat().st_size
+        except OSError as e:
+            print(f"[DETECTION_CACHE] 저장 실패: {e}")
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= previous['bytes']
+            self._entries[key] = {'detections': detections, 'bytes': size}
+            self._total_bytes += size
+            self._evict()
+
+    def clear(self):
+        """캐시 전체 삭제"""
+        with self._lock:
+            for key in self._entries:
+                self._remove_files(key)
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def get_stats(self) -> Dict:
+        """캐시 통계"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+# 싱글톤 인스턴스
+_detection_cache_instance = None
+
+def get_detection_cache() -> DetectionCache:
+    """
+    탐지 결과 캐시 싱글톤 인스턴스 반환
+
+    환경 변수:
+        NEST_DETECTION_CACHE_DIR: 캐시 디렉토리 (기본: 프로젝트/cache/detections)
+        NEST_DETECTION_CACHE_ENTRIES: 최대 항목 수 (기본 512)
+        NEST_DETECTION_CACHE_MB: 최대 용량 MB (기본 256)
+    """
+    global _detection_cache_instance
+    if _detection_cache_instance is None:
+        default_dir = Path(__file__).parent.parent / "cache" / "detections"
+        _detection_cache_instance = DetectionCache(
+            cache_dir=os.environ.get("NEST_DETECTION_CACHE_DIR", str(default_dir)),
+            max_entries=int(os.environ.get("NEST_DETECTION_CACHE_ENTRIES", "512")),
+            max_bytes=int(float(os.environ.get("NEST_DETECTION_CACHE_MB", "256")) * 1024 * 1024)
+        )
+    return _detection_cache_instance
@@ -1,16 +1,55 @@
 import os
 import platform
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+
+# NEST_OFFLINE=1이면 기본 모델을 내려받지 않음 (폐쇄망 노드)
+OFFLINE_MODE = os.environ.get("NEST_OFFLINE", "0").lower() in ("1", "true", "yes", "on")
+if OFFLINE_MODE:
+    # ultralytics의 온라인 확인/다운로드 비활성화 (import 전에 설정해야 함)
+    os.environ.setdefault("YOLO_OFFLINE", "1")
+
 import cv2
 import numpy as np
 from ultralytics import YOLO
 
+from utils.annotation import draw_detections
+from utils.box_merge import MERGE_METHODS, merge_boxes
+from utils.image_decode import read_image_for_detection
+
+# best_detector.pt가 없을 때 사용할 기본 모델 (로컬 사본이 있으면 우선 사용)
+FALLBACK_MODEL_NAME = "yolov8n.pt"
+
+# detect()의 추론 방식
+DETECT_MODES = ('full', 'tiled')
+
+
+def tile_origins(length, tile_size, overlap):
+    """
+    한 축의 타일 시작 좌표 (마지막 타일은 이미지 끝에 맞춤)
+
+    Args:
+        length: 이미지 너비 또는 높이
+        tile_size: 타일 한 변 크기
+        overlap: 이웃 타일과 겹치는 비율 (0~1 미만)
+
+    Returns:
+        시작 좌표 리스트
+    """
+    if length <= tile_size:
+        return [0]
+    stride = max(1, int(tile_size * (1 - overlap)))
+    count = int(np.ceil((length - tile_size) / stride)) + 1
+    return [int(round(v)) for v in np.linspace(0, length - tile_size, count)]
 
 
 class InsectDetector:
     """곤충 탐지 클래스"""
     
-    def __init__(self, model_path=None, conf_threshold=0.25, iou_threshold=0.45):
+    def __init__(self, model_path=None, conf_threshold=0.25, iou_threshold=0.45, decode_long_side=1280,
+                 tile_size=640, tile_overlap=0.2, tile_batch=16, merge_method='nms'):
         """
         초기화
         
@@ -18,9 +57,24 @@ class InsectDetector:
             model_path: 모델 가중치 경로
             conf_threshold: 신뢰도 임계값
             iou_threshold: NMS IoU 임계값
+            decode_long_side: 축소 디코딩 후 남길 긴 변 최소 길이 (0이면 원본 해상도로 탐지)
+            tile_size: 타일 추론 시 타일 한 변 크기 (원본 해상도 px)
+            tile_overlap: 이웃 타일 겹침 비율
+            tile_batch: 한 번의 predict에 넣을 최대 타일 수
+            merge_method: 타일 결과 병합 방법 ('nms' 또는 'wbf')
         """
+        if merge_method not in MERGE_METHODS:
+            raise ValueError(f"지원하지 않는 병합 방법: {merge_method} ({', '.join(MERGE_METHODS)})")
+        if not 0 <= tile_overlap < 1:
+            raise ValueError(f"tile_overlap은 0 이상 1 미만이어야 합니다: {tile_overlap}")
+        
         self.conf_threshold = conf_threshold
         self.iou_threshold = iou_threshold
+        self.decode_long_side = decode_long_side
+        self.tile_size = tile_size
+        self.tile_overlap = tile_overlap
+        self.tile_batch = max(1, tile_batch)
+        self.merge_method = merge_method
         
         # 기본 모델 경로 설정
         if model_path is None:
@@ -31,104 +85,324 @@ class InsectDetector:
         
         # 모델 로드
         self.model = None
+        self.load_seconds = None
         self.load_model()
     
     def load_model(self):
         """모델 로드"""
+        start = time.perf_counter()
         if not self.model_path.exists():
             print(f"경고: 모델 파일이 존재하지 않습니다: {self.model_path}")
-            print("기본 YOLOv8n 모델을 사용합니다.")
-            self.model = YOLO('yolov8n.pt')
+            fallback_path = self.model_path.parent / FALLBACK_MODEL_NAME
+            if fallback_path.exists():
+                print(f"로컬 기본 모델을 사용합니다: {fallback_path}")
+                self.model = YOLO(str(fallback_path))
+            elif OFFLINE_MODE:
+                raise FileNotFoundError(
+                    f"오프라인 모드에서는 기본 모델을 내려받을 수 없습니다. "
+                    f"{self.model_path} 또는 {fallback_path}를 배치하세요."
+                )
+            else:
+                print("기본 YOLOv8n 모델을 사용합니다.")
+                self.model = YOLO(FALLBACK_MODEL_NAME)
         else:
             print(f"모델 로드: {self.model_path}")
             self.model = YOLO(str(self.model_path))
+        
+        self.load_seconds = time.perf_counter() - start
+        print(f"[MODEL] 탐지기 로드: {self.load_seconds:.2f}초")
+    
+    def warm_up(self, image_size=640):
+        """
+        더미 이미지로 한 번 추론하여 커널/메모리 할당 초기화
+        
+        Args:
+            image_size: 더미 이미지 한 변 크기
+        """
+        dummy = np.zeros((image_size, image_size, 3), dtype=np.uint8)
+        self.model.predict(
+            source=dummy,
+            conf=self.conf_threshold,
+            iou=self.iou_threshold,
+            verbose=False
+        )
+    
+    @staticmethod
+    def _result_arrays(result):
+        """ultralytics 결과 -> (boxes, confidences, classes) numpy 배열"""
+        if result.boxes is None or len(result.boxes) == 0:
+            return np.zeros((0, 4), dtype=np.float32), np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int64)
+        return (
+            result.boxes.xyxy.cpu().numpy(),  # [x1, y1, x2, y2]
+            result.boxes.conf.cpu().numpy(),
+            result.boxes.cls.cpu().numpy().astype(np.int64)
+        )
+    
+    def _predict_tiled(self, image):
+        """
+        타일(슬라이스) 추론
+        
+        전체 이미지 1회 + 겹치는 타일들을 배치로 추론한 뒤 중복 박스를 병합합니다.
+        타일 안쪽 경계에 걸친 박스는 잘린 박스이므로 버리고, 이웃 타일이나
+        전체 이미지 추론 결과를 사용합니다.
+        
+        Args:
+            image: 원본 해상도 BGR 이미지
+        
+        Returns:
+            (boxes, confidences, classes, 타일 수)
+        """
+        h, w = image.shape[:2]
+        tiles = [
+            (x, y)
+            for y in tile_origins(h, self.tile_size, self.tile_overlap)
+            for x in tile_origins(w, self.tile_size, self.tile_overlap)
+        ]
+        
+        # 전체 이미지 추론 (타일보다 큰 곤충용)
+        all_boxes, all_confs, all_classes = [], [], []
+        full_result = self.model.predict(source=image, conf=self.conf_threshold, iou=self.iou_threshold, verbose=False)[0]
+        boxes, confs, classes = self._result_arrays(full_result)
+        all_boxes.append(boxes)
+        all_confs.append(confs)
+        all_classes.append(classes)
+        
+        if len(tiles) > 1:
+            margin = 2  # 타일 경계에 닿은 것으로 보는 거리 (px)
+            for start in range(0, len(tiles), self.tile_batch):
+                batch = tiles[start:start + self.tile_batch]
+                crops = [image[y:y + self.tile_size, x:x + self.tile_size] for x, y in batch]
+                results = self.model.predict(
+                    source=crops,
+                    conf=self.conf_threshold,
+                    iou=self.iou_threshold,
+                    imgsz=self.tile_size,
+                    verbose=False
+                )
+                for (x, y), crop, result in zip(batch, crops, results):
+                    boxes, confs, classes = self._result_arrays(result)
+                    if len(boxes) == 0:
+                        continue
+                    tile_h, tile_w = crop.shape[:2]
+                    # 이미지 가장자리가 아닌 타일 경계에 닿은 박스 제외
+                    cut = np.zeros(len(boxes), dtype=bool)
+                    if x > 0:
+                        cut |= boxes[:, 0] <= margin
+                    if y > 0:
+                        cut |= boxes[:, 1] <= margin
+                    if x + tile_w < w:
+                        cut |= boxes[:, 2] >= tile_w - margin
+                    if y + tile_h < h:
+                        cut |= boxes[:, 3] >= tile_h - margin
+                    boxes = boxes[~cut] + np.array([x, y, x, y], dtype=boxes.dtype)
+                    all_boxes.append(boxes)
+                    all_confs.append(confs[~cut])
+                    all_classes.append(classes[~cut])
+        
+        boxes, confs, classes = merge_boxes(
+            np.concatenate(all_boxes).astype(np.float32),
+            np.concatenate(all_confs).astype(np.float32),
+            np.concatenate(all_classes),
+            method=self.merge_method,
+            iou_threshold=self.iou_threshold
+        )
+        return boxes, confs, classes, len(tiles)
     
-    def detect(self, image_path, save_path=None, use_tta=False):
+    def _load_image(self, source, mode):
+        """
+        탐지 입력 로드
+        
+        Args:
+            source: 이미지 경로 또는 BGR 이미지 (numpy array, 그대로 사용)
+            mode: "full"이면 큰 JPEG 축소 디코딩, "tiled"이면 원본 해상도
+        
+        Returns:
+            (BGR 이미지, 배율, (원본 너비, 원본 높이))
+        """
+        if isinstance(source, np.ndarray):
+            return source, 1, (source.shape[1], source.shape[0])
+        long_side = 0 if mode == "tiled" else self.decode_long_side
+        return read_image_for_detection(source, long_side)
+    
+    def _build_result(self, boxes, confidences, classes, scale, orig_size, mode, tile_count):
+        """박스 배열 -> detect() 결과 dict (원본 좌표로 변환, 렌더링 제외)"""
+        orig_w, orig_h = orig_size
+        if scale != 1 and len(boxes) > 0:
+            boxes = boxes * scale
+            boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, orig_w)
+            boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, orig_h)
+        
+        detections = []
+        for box, conf, cls in zip(boxes, confidences, classes):
+            detections.append({
+                'bbox': box.tolist(),
+                'confidence': float(conf),
+                'class': int(cls),
+                'class_name': 'insect'
+            })
+        
+        return {
+            'detections': detections,
+            'image': None,
+            'image_path': None,
+            'count': len(detections),
+            'decode_scale': scale,
+            'mode': mode,
+            'tiles': tile_count
+        }
+    
+    @staticmethod
+    def _check_mode(mode):
+        if mode not in DETECT_MODES:
+            raise ValueError(f"지원하지 않는 탐지 모드: {mode} ({', '.join(DETECT_MODES)})")
+    
+    def detect(self, image_path, save_path=None, use_tta=False, mode="full"):
         """
         이미지에서 곤충 탐지
         
         Args:
-            image_path: 입력 이미지 경로
-            save_path: 결과 저장 경로 (None이면 저장 안 함)
+            image_path: 입력 이미지 경로 (또는 BGR numpy array)
+            save_path: 결과 저장 경로 (None이면 박스를 그리지도 저장하지도 않음)
+            use_tta: True이면 mode="tiled"와 같음 (이전 호출 호환)
+            mode: "full" (축소 디코딩 후 전체 이미지 1회 추론) 또는
+                  "tiled" (원본 해상도를 겹치는 타일로 나눠 배치 추론, 작은 곤충용)
         
         Returns:
             dict: 탐지 결과
                 - detections: 탐지된 객체 리스트
-                - image: 바운딩 박스가 그려진 이미지 (numpy array)
+                - image: 바운딩 박스가 그려진 이미지 (numpy array, save_path가 없으면 None)
                 - image_path: 저장된 이미지 경로
         """
-        # 이미지 로드
-        image = cv2.imread(str(image_path))
-        if image is None:
-            raise ValueError(f"이미지를 로드할 수 없습니다: {image_path}")
+        if use_tta:
+            mode = "tiled"
+        self._check_mode(mode)
+        
+        # 이미지 로드 (큰 JPEG은 축소 디코딩, 박스는 원본 좌표로 변환)
+        image, scale, orig_size = self._load_image(image_path, mode)
+        
+        tile_count = 0
+        if mode == "tiled":
+            boxes, confidences, classes, tile_count = self._predict_tiled(image)
+        else:
+            results = self.model.predict(
+                source=image,
+                conf=self.conf_threshold,
+                iou=self.iou_threshold,
+                verbose=False
+            )
+            boxes, confidences, classes = self._result_arrays(results[0])
+        
+        result = self._build_result(boxes, confidences, classes, scale, orig_size, mode, tile_count)
+        if tile_count:
+            print(f"탐지: {result['count']}개 (타일 {tile_count}개, {self.merge_method})")
+        else:
+            print(f"탐지: {result['count']}개")
         
-        # 기본 추론 (TTA 제거)
+        # 결과 저장 (웹 화면은 브라우저에서 박스를 그리므로 요청한 경우에만 렌더링)
+        if save_path is not None:
+            if scale != 1:
+                image, _, _ = read_image_for_detection(image_path, 0)
+            result['image'] = draw_detections(image, result['detections'])
+            save_path = Path(save_path)
+            save_path.parent.mkdir(parents=True, exist_ok=True)
+            cv2.imwrite(str(save_path), result['image'])
+            result['image_path'] = str(save_path)
+        
+        return result
+    
+    def detect_preview(self, image_path, imgsz=320):
+        """
+        저해상도 빠른 탐지 (근접 중복 결과를 재사용하기 전 확인용)
+        
+        긴 변이 imgsz 근처가 되도록 축소 디코딩하고 같은 크기로 한 번 추론합니다.
+        박스는 원본 좌표로 반환하지만 정밀도는 full 모드보다 낮습니다.
+        
+        Returns:
+            list: detect()의 detections와 같은 형식
+        """
+        image, scale, orig_size = read_image_for_detection(image_path, imgsz)
         results = self.model.predict(
             source=image,
             conf=self.conf_threshold,
             iou=self.iou_threshold,
+            imgsz=imgsz,
             verbose=False
         )
-        count = len(results[0].boxes.xyxy) if results[0].boxes is not None else 0
-        print(f"탐지: {count}개")
+        boxes, confidences, classes = self._result_arrays(results[0])
+        return self._build_result(boxes, confidences, classes, scale, orig_size, "full", 0)['detections']
+    
+    def detect_batch(self, sources, batch_size=8, mode="full", prefetch_workers=2):
+        """
+        여러 이미지 배치 탐지
         
-        # 결과 파싱
-        detections = []
-        result = results[0]
+        디코딩은 스레드 풀에서 미리 읽어(prefetch) 추론과 겹치게 하고,
+        full 모드는 batch_size장씩 한 번의 model.predict로 추론합니다.
+        tiled 모드는 이미지마다 타일을 배치로 추론합니다.
         
-        if result.boxes is not None and len(result.boxes) > 0:
-            boxes = result.boxes.xyxy.cpu().numpy()  # [x1, y1, x2, y2]
-            confidences = result.boxes.conf.cpu().numpy()
-            classes = result.boxes.cls.cpu().numpy()
-            
-            for box, conf, cls in zip(boxes, confidences, classes):
-                detections.append({
-                    'bbox': box.tolist(),
-                    'confidence': float(conf),
-                    'class': int(cls),
-                    'class_name': 'insect'
-                })
-        
-        # 바운딩 박스 그리기 (이미지 크기에 적응)
-        annotated_image = image.copy()
-        h, w = image.shape[:2]
+        Args:
+            sources: 이미지 경로 또는 BGR numpy array 리스트
+            batch_size: 한 번의 predict에 넣을 이미지 수
+            mode: "full" 또는 "tiled" (detect와 같음)
+            prefetch_workers: 디코딩 스레드 수
+        
+        Returns:
+            list: 입력 순서대로 detect()와 같은 형식의 결과 dict
+                  (읽을 수 없는 이미지는 detections가 비어 있고 'error'에 사유)
+        """
+        self._check_mode(mode)
+        sources = list(sources)
+        batch_size = max(1, batch_size)
+        results = [None] * len(sources)
+        
+        def load(index):
+            try:
+                return index, self._load_image(sources[index], mode), None
+            except Exception as e:
+                return index, None, str(e)
         
-        # 이미지 크기에 따른 스케일 계산
-        scale = min(h, w) / 640  # 640을 기준으로 스케일링
-        box_thickness = max(1, int(3 * scale))
-        font_scale = max(0.3, 0.6 * scale)
-        font_thickness = max(1, int(2 * scale))
-        
-        if detections:
-            for det in detections:
-                box = det['bbox']
-                conf = det['confidence']
-                x1, y1, x2, y2 = map(int, box)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, prefetch_workers), thread_name_prefix="detect-decode") as pool:
+            # 메모리 사용을 제한하도록 두 배치 분량만 미리 디코딩
+            pending = deque()
+            next_index = 0
+            while next_index < len(sources) or pending:
+                while next_index < len(sources) and len(pending) < batch_size * 2:
+                    pending.append(pool.submit(load, next_index))
+                    next_index += 1
                 
-                # 적응적 박스 그리기
-                cv2.rectangle(annotated_image, (x1, y1), (x2, y2), (0, 255, 0), box_thickness)
+                batch = []
+                while pending and len(batch) < batch_size:
+                    index, loaded, error = pending.popleft().result()
+                    if error is not None:
+                        result = self._build_result(np.zeros((0, 4)), [], [], 1, (0, 0), mode, 0)
+                        result['error'] = error
+                        results[index] = result
+                    else:
+                        batch.append((index, loaded))
+                if not batch:
+                    continue
                 
-                # 적응적 텍스트
-                label = f'{conf:.1%}'
-                label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, font_scale, font_thickness)[0]
-                padding = max(5, int(10 * scale))
-                cv2.rectangle(annotated_image, (x1, y1-label_size[1]-padding*2), (x1+label_size[0]+padding, y1), (0, 255, 0), -1)
-                cv2.putText(annotated_image, label, (x1+padding//2, y1-padding), cv2.FONT_HERSHEY_SIMPLEX, font_scale, (0, 0, 0), font_thickness)
-        
-        # 결과 저장
-        saved_path = None
-        if save_path is not None:
-            save_path = Path(save_path)
-            save_path.parent.mkdir(parents=True, exist_ok=True)
-            cv2.imwrite(str(save_path), annotated_image)
-            saved_path = str(save_path)
+                if mode == "tiled":
+                    for index, (image, scale, orig_size) in batch:
+                        boxes, confidences, classes, tile_count = self._predict_tiled(image)
+                        results[index] = self._build_result(boxes, confidences, classes, scale, orig_size, mode, tile_count)
+                    continue
+                
+                predictions = self.model.predict(
+                    source=[image for _, (image, _, _) in batch],
+                    conf=self.conf_threshold,
+                    iou=self.iou_threshold,
+                    verbose=False
+                )
+                for (index, (_, scale, orig_size)), prediction in zip(batch, predictions):
+                    boxes, confidences, classes = self._result_arrays(prediction)
+                    results[index] = self._build_result(boxes, confidences, classes, scale, orig_size, mode, 0)
         
-        return {
-            'detections': detections,
-            'image': annotated_image,
-            'image_path': saved_path,
-            'count': len(detections)
-        }
+        elapsed = time.perf_counter() - start
+        total = sum(result['count'] for result in results)
+        rate = len(sources) / elapsed if elapsed > 0 else 0.0
+        print(f"배치 탐지: {len(sources)}장, {total}개 ({rate:.1f}장/초)")
+        return results
     
     def crop_detections(self, image_path, detections, output_dir):
         """
@@ -164,121 +438,3 @@ class InsectDetector:
             cropped_paths.append(str(crop_path))
         
         return cropped_paths
-    
-    def _predict_with_tta(self, image):
-        """
-        슬라이딩 윈도우 TTA - 이미지를 패치로 나눠서 탐지
-        """
-        h, w = image.shape[:2]
-        all_boxes = []
-        all_confs = []
-        all_classes = []
-        
-        # 1. 원본 전체 이미지 (반드시 보존)
-        original_result = self.model.predict(source=image, conf=self.conf_threshold, iou=self.iou_threshold, verbose=False)[0]
-        if original_result.boxes is not None:
-            all_boxes.extend(original_result.boxes.xyxy.cpu().numpy())
-            all_confs.extend(original_result.boxes.conf.cpu().numpy())
-            all_classes.extend(original_result.boxes.cls.cpu().numpy())
-        
-        # 2. 슬라이딩 윈도우 (제한된 겹침)
-        patch_size = min(h, w) // 2
-        stride = patch_size // 2  # 50% 겹침만
-        
-        # 패치 수 제한 (4개만)
-        patch_count = 0
-        max_patches = 4
-        
-        for y in range(0, h - patch_size + 1, stride):
-            for x in range(0, w - patch_size + 1, stride):
-                if patch_count >= max_patches:
-                    break
-                    
-                patch = image[y:y+patch_size, x:x+patch_size]
-                
-                # 낮은 threshold로 패치에서 추가 탐지
-                patch_result = self.model.predict(source=patch, conf=self.conf_threshold*0.8, iou=self.iou_threshold, verbose=False)[0]
-                
-                if patch_result.boxes is not None:
-                    for box, conf, cls in zip(patch_result.boxes.xyxy.cpu().numpy(), 
-                                            patch_result.boxes.conf.cpu().numpy(), 
-                                            patch_result.boxes.cls.cpu().numpy()):
-                        # 좌표를 원본 이미지 기준으로 변환
-                        adjusted_box = box.copy()
-                        adjusted_box[0] += x
-                        adjusted_box[1] += y
-                        adjusted_box[2] += x
-                        adjusted_box[3] += y
-                        
-                        # 이미지 범위 내 확인
-                        if (adjusted_box[0] >= 0 and adjusted_box[1] >= 0 and 
-                            adjusted_box[2] <= w and adjusted_box[3] <= h):
-                            all_boxes.append(adjusted_box)
-                            all_confs.append(conf)
-                            all_classes.append(cls)
-                
-                patch_count += 1
-            
-            if patch_count >= max_patches:
-                break
-        
-        # NMS로 중복 제거 후 새로운 결과 생성
-        if all_boxes:
-            import torch
-            from torchvision.ops import nms
-            
-            boxes_tensor = torch.from_numpy(np.array(all_boxes, dtype=np.float32))
-            scores_tensor = torch.from_numpy(np.array(all_confs, dtype=np.float32))
-            
-            # 원본 IoU threshold 사용
-            keep = nms(boxes_tensor, scores_tensor, self.iou_threshold)
-            
-            if len(keep) > 0:
-                final_boxes = boxes_tensor[keep]
-                final_confs = scores_tensor[keep]
-                final_classes = torch.from_numpy(np.array(all_classes, dtype=np.int64))[keep]
-                
-                # 새로운 결과 객체 생성
-                class TTAResult:
-                    def __init__(self, boxes, confs, classes):
-                        self.boxes = TTABoxes(boxes, confs, classes)
-                    
-                    def plot(self):
-                        # TTA 결과에 대해서도 적응적 바운딩 박스 그리기
-                        img = image.copy()
-                        h, w = image.shape[:2]
-                        
-                        # 이미지 크기에 따른 스케일 계산
-                        scale = min(h, w) / 640
-                        box_thickness = max(1, int(3 * scale))
-                        font_scale = max(0.3, 0.6 * scale)
-                        font_thickness = max(1, int(2 * scale))
-                        
-                        if self.boxes and len(self.boxes) > 0:
-                            for box, conf in zip(self.boxes.xyxy, self.boxes.conf):
-                                x1, y1, x2, y2 = map(int, box)
-                                
-                                # 적응적 박스 그리기
-                                cv2.rectangle(img, (x1, y1), (x2, y2), (0, 255, 0), box_thickness)
-                                
-                                # 적응적 텍스트
-                                label = f'{conf:.1%}'
-                                label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, font_scale, font_thickness)[0]
-                                padding = max(5, int(10 * scale))
-                                cv2.rectangle(img, (x1, y1-label_size[1]-padding*2), (x1+label_size[0]+padding, y1), (0, 255, 0), -1)
-                                cv2.putText(img, label, (x1+padding//2, y1-padding), cv2.FONT_HERSHEY_SIMPLEX, font_scale, (0, 0, 0), font_thickness)
-                        return img
-                
-                class TTABoxes:
-                    def __init__(self, boxes, confs, classes):
-                        self.xyxy = boxes
-                        self.conf = confs
-                        self.cls = classes
-                    
-                    def __len__(self):
-                        return len(self.xyxy)
-                
-                return [TTAResult(final_boxes, final_confs, final_classes)]
-        
-        # 원본 결과가 없으면 빈 결과 반환
-        return [original_result]
@@ -1,3 +1,8 @@
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
 import torch
 import torch.nn as nn
 import timm
@@ -9,6 +14,14 @@ from albumentations.pytorch.transforms import ToTensorV2
 from pathlib import Path
 from PIL import Image
 import pandas as pd
+
+
+# 로드 기록이 없는 분류기의 예상 로드 시간 (초, 마감 시간 판단용)
+DEFAULT_LOAD_SECONDS = float(os.environ.get("NEST_HIER_LOAD_ESTIMATE", "1.5"))
+# 단계마다 남길 분류 경로 수 (1이면 단계별 top-1만 따라가는 기존 방식)
+BEAM_WIDTH = max(1, int(os.environ.get("NEST_HIER_BEAM", "1")))
+# 사용 후에도 메모리에 남겨 둘 최근 분류기 수 (0이면 사용 직후 해제, 사전 로드 분류기는 별도)
+CACHED_MODELS = max(0, int(os.environ.get("NEST_HIER_CACHE_MODELS", "0")))
 class HierarchicalClassifier:
     """계층적 곤충 분류 시스템 (목 -> 과 -> 속 -> 종)"""
     
@@ -20,6 +33,21 @@ class HierarchicalClassifier:
         
         self.models_dir = Path(models_dir)
         self.classifiers = {}
+        # 사전 로드(preload)된 분류기 - 사용 후에도 메모리에서 해제하지 않음
+        self.pinned = set()
+        # 분류기별 마지막 로드 소요 시간 (초)
+        self.load_times = {}
+        self.default_load_seconds = DEFAULT_LOAD_SECONDS
+        self.beam_width = BEAM_WIDTH
+        # 최근 사용 분류기 LRU (pinned 제외)
+        self.cache_size = CACHED_MODELS
+        self.recent = OrderedDict()
+        # 요청 스레드와 백그라운드 분류 스레드가 함께 쓰므로 분류기 목록은 잠금 안에서 바꾸고,
+        # 추론 중인 분류기는 사용 횟수로 표시해 다른 스레드가 해제하지 않도록 함
+        # (디스크 로드는 잠금 밖에서 하고, 로드 중인 분류기는 loading의 Event로 표시)
+        self._lock = threading.RLock()
+        self.in_use = {}
+        self.loading = {}
         
         self.transform = A.Compose([
             A.Resize(224, 224),
@@ -43,6 +71,64 @@ class HierarchicalClassifier:
         """초기화 시에는 아무것도 로드하지 않음 (지연 로딩)"""
         print("계층적 분류기 준비 완료 (지연 로딩 모드)")
     
+    @staticmethod
+    def order_key(order_name):
+        """목 이름 -> 과 분류기 키 (예: "벌목" -> "벌")"""
+        return order_name.replace('목', '').lower()
+    
+    @staticmethod
+    def family_key(family_name):
+        """과 이름 -> 속 분류기 키 (예: "말벌과" -> "말벌")"""
+        return family_name.replace('과', '').lower()
+    
+    @staticmethod
+    def genus_key(genus_name):
+        """속 이름 -> 종 분류기 키 (예: "말벌속" -> "말벌")"""
+        return genus_name.lower().replace('속', '').strip()
+    
+    @classmethod
+    def classifier_keys_for(cls, order=None, family=None, genus=None):
+        """
+        분류 결과(목/과/속 이름)가 사용하는 하위 분류기 목록
+        
+        Returns:
+            [(키, 레벨), ...] 예: [("벌", "family"), ("말벌", "genus")]
+        """
+        keys = []
+        if order:
+            keys.append((cls.order_key(order), 'family'))
+        if family:
+            keys.append((cls.family_key(family), 'genus'))
+        if genus:
+            keys.append((cls.genus_key(genus), 'species'))
+        return keys
+    
+    def preload(self, key, level):
+        """
+        분류기를 미리 로드하고 고정 (요청 처리 후에도 해제하지 않음)
+        
+        Returns:
+            로드된 분류기 키 또는 None
+        """
+        classifier_key, _ = self._acquire_classifier(key, level)
+        if not classifier_key:
+            return None
+        try:
+            with self._lock:
+                if self.classifiers.get(classifier_key) is None:
+                    return None
+                self.pinned.add(classifier_key)
+            print(f"📌 {level} 분류기 사전 로드: {classifier_key}")
+            return classifier_key
+        finally:
+            self._release_classifier(classifier_key)
+    
+    def warm_up(self):
+        """사전 로드된 분류기마다 더미 이미지로 한 번 추론"""
+        dummy = np.zeros((224, 224, 3), dtype=np.uint8)
+        for classifier_key in list(self.pinned):
+            self._classify_single(dummy, classifier_key, top_k=1)
+    
     def _load_single_classifier(self, model_path, classes_path):
         try:
             with open(classes_path, 'r', encoding='utf-8') as f:
@@ -63,153 +149,389 @@ class HierarchicalClassifier:
             return None
     
     def classify_hierarchical(self, image, order_name, top_k=3):
-        result = {
-            'order': order_name,
-            'family': None,
-            'genus': None,
-            'species': None,
-            'confidence_scores': {}
-        }
-        
-        order_key = order_name.replace('목', '').lower()
-        print(f"\n🔍 계층적 분류 시작: order={order_name}, order_key={order_key}")
-        
-        # 과 분류
-        print(f"🔍 과 분류 시도: order_key={order_key}")
-        family_classifier = self._find_classifier(order_key, 'family')
-        if family_classifier:
-            print(f"✓ 과 분류기 찾음: {family_classifier}")
-            family_result = self._classify_single(image, family_classifier, top_k)
-            # 사용 후 메모리 해제
-            self._unload_classifier(family_classifier)
+        return self.classify_hierarchical_batch([image], [order_name], top_k)[0]
+    
+    def classify_hierarchical_batch(self, images, order_names, top_k=3, deadline=None, initial=None,
+                                    beam_width=None):
+        """
+        여러 크롭 계층적 분류 (과 -> 속 -> 종)
+        
+        이미지마다 분류 경로를 beam_width개까지 유지합니다. 단계마다 각 경로를 상위 후보로 확장하고
+        beam_width개만 남깁니다 (1이면 top-1만 따라감). 경로 순위는 먼저 분류된 단계 수(깊이),
+        같은 깊이에서는 경로 점수(단계별 확률의 곱)로 정합니다. 곱은 단계가 적을수록 커지므로,
+        하위 분류기가 없거나 마감 시간 때문에 멈춘 얕은 경로가 끝까지 분류된 경로를 이기지 않도록 합니다.
+        같은 분류기가 필요한 경로는 모든 이미지에 걸쳐 묶어 분류기를 한 번만 로드하고,
+        크롭마다 한 번씩만 한 배치로 추론합니다.
+        
+        Args:
+            images: RGB numpy array 리스트
+            order_names: 이미지별 목 이름
+            deadline: time.perf_counter() 기준 마감 시각. 메모리에 없는 분류기의 예상 로드 시간이
+                남은 시간보다 길면 로드하지 않고 그 단계에서 멈춤 ('partial': True, 'pending_level')
+            initial: 이어서 분류할 이전 결과 (partial 결과를 백그라운드에서 마저 분류할 때)
+            beam_width: 유지할 경로 수 (None이면 NEST_HIER_BEAM)
+        
+        Returns:
+            list: 이미지 순서대로 {'order', 'family', 'genus', 'species', 'confidence_scores', ...}
+                (beam_width > 1이면 'beam_paths'에 점수 순 경로 목록)
+        """
+        beam_width = max(1, beam_width or self.beam_width)
+        
+        if initial is not None:
+            results = [copy.deepcopy(result) for result in initial]
+            for result in results:
+                result.pop('partial', None)
+                result.pop('pending_level', None)
+        else:
+            results = [{
+                'order': order_name,
+                'family': None,
+                'genus': None,
+                'species': None,
+                'confidence_scores': {}
+            } for order_name in order_names]
+        
+        # 이미지별 경로: 이미 분류된 단계는 그대로 두고 그 아래부터 확장
+        beams = []
+        for result in results:
+            score = 1.0
+            for level in ('family', 'genus', 'species'):
+                if result[level]:
+                    score *= result['confidence_scores'].get(level, 1.0)
+            beams.append([{
+                'order': result['order'],
+                'family': result['family'],
+                'genus': result['genus'],
+                'species': result['species'],
+                'scores': dict(result['confidence_scores']),
+                'score': score,
+                'candidates': result.get('species_candidates'),
+                'open': True,
+                'pending_level': None
+            }])
+        
+        print(f"\n🔍 계층적 분류 시작: {len(images)}개 ({', '.join(sorted(set(order_names)))}), beam {beam_width}")
+        
+        # (상위 단계 키 함수, 하위 단계, 상위 결과 필드)
+        stages = (
+            (self.order_key, 'family', 'order'),
+            (self.family_key, 'genus', 'family'),
+            (self.genus_key, 'species', 'genus'),
+        )
+        for key_func, level, parent_field in stages:
+            # 분류기 키 -> 확장할 (이미지 인덱스, 경로) 목록
+            groups = {}
+            for index, paths in enumerate(beams):
+                for path in paths:
+                    if path['open'] and path[parent_field] and not path[level]:
+                        groups.setdefault(key_func(path[parent_field]), []).append((index, path))
             
-            if family_result:
-                result['family'] = family_result[0]['name']
-                result['confidence_scores']['family'] = family_result[0]['confidence']
-                print(f"✓ 과 분류 완료: {result['family']} ({result['confidence_scores']['family']*100:.1f}%)")
+            expanded = {}
+            for key, members in groups.items():
+                # 마감 시간 안에 로드할 수 없으면 지금까지의 단계만 반환
+                classifier_key, pending = self._acquire_classifier(key, level, deadline)
+                if not classifier_key:
+                    for _, path in members:
+                        path['open'] = False
+                        if pending:
+                            path['pending_level'] = level
+                    continue
                 
-                # 속 분류
-                family_key = result['family'].replace('과', '').lower()
-                print(f"🔍 속 분류 시도: family_key={family_key}")
-                genus_classifier = self._find_classifier(family_key, 'genus')
-                if genus_classifier:
-                    print(f"✓ 속 분류기 찾음: {genus_classifier}")
-                    genus_result = self._classify_single(image, genus_classifier, top_k)
-                    self._unload_classifier(genus_classifier)
-                    
-                    if genus_result:
-                        result['genus'] = genus_result[0]['name']
-                        result['confidence_scores']['genus'] = genus_result[0]['confidence']
-                        print(f"✓ 속 분류 완료: {result['genus']} ({result['confidence_scores']['genus']*100:.1f}%)")
-                        
-                        # 종 분류
-                        genus_key = result['genus'].lower()
-                        # 속명에서 "속" 제거 (예: "말벌속" -> "말벌")
-                        genus_key = genus_key.replace('속', '').strip()
-                        print(f"🔍 종 분류 시도: genus_key={genus_key}")
-                        species_classifier = self._find_classifier(genus_key, 'species')
-                        if species_classifier:
-                            print(f"✓ 종 분류기 찾음: {species_classifier}")
-                            species_result = self._classify_single(image, species_classifier, top_k)
-                            self._unload_classifier(species_classifier)
-                            
-                            if species_result:
-                                result['species'] = species_result[0]['name']
-                                result['confidence_scores']['species'] = species_result[0]['confidence']
-                                result['species_candidates'] = species_result
-                                print(f"✓ 종 분류 완료: {result['species']} ({result['confidence_scores']['species']*100:.1f}%)")
-                        else:
-                            print(f"⚠ 종 분류기를 찾을 수 없습니다 (genus_key: {genus_key})")
-                else:
-                    print(f"⚠ 속 분류기를 찾을 수 없습니다 (family_key: {family_key})")
-            else:
-                print(f"⚠ 과 분류 결과가 없습니다")
-        else:
-            print(f"⚠ 과 분류기를 찾을 수 없습니다 (order_key: {order_key})")
+                # 같은 크롭의 여러 경로가 같은 분류기를 쓰면 한 번만 추론
+                indices = sorted({index for index, _ in members})
+                try:
+                    outputs = self._classify_batch([images[i] for i in indices], classifier_key, max(top_k, beam_width))
+                finally:
+                    # 사용 후 메모리 해제 (최근 사용 캐시/사전 로드 분류기는 유지)
+                    self._release_classifier(classifier_key)
+                output_by_index = dict(zip(indices, outputs))
+                
+                for index, path in members:
+                    output = output_by_index[index]
+                    if not output:
+                        path['open'] = False
+                        continue
+                    children = []
+                    for candidate in output[:beam_width]:
+                        child = dict(path, scores=dict(path['scores']))
+                        child[level] = candidate['name']
+                        child['scores'][level] = candidate['confidence']
+                        child['score'] = path['score'] * candidate['confidence']
+                        if level == 'species':
+                            child['candidates'] = output[:top_k]
+                        children.append(child)
+                    expanded[id(path)] = children
+                print(f"✓ {level} 분류 완료: {classifier_key} x {len(indices)}")
+            
+            # 확장한 경로로 바꾸고 (깊이, 점수) 상위 beam_width개만 유지
+            for index, paths in enumerate(beams):
+                paths = [child for path in paths for child in expanded.get(id(path), [path])]
+                beams[index] = sorted(paths, key=self._path_rank, reverse=True)[:beam_width]
+        
+        for result, paths in zip(results, beams):
+            best = paths[0]
+            for level in ('family', 'genus', 'species'):
+                result[level] = best[level]
+            result['confidence_scores'] = best['scores']
+            if best['candidates']:
+                result['species_candidates'] = best['candidates']
+            if best['pending_level']:
+                result['partial'] = True
+                result['pending_level'] = best['pending_level']
+            if beam_width > 1:
+                result['path_score'] = best['score']
+                result['beam_paths'] = [
+                    {'family': path['family'], 'genus': path['genus'], 'species': path['species'], 'score': path['score']}
+                    for path in paths
+                ]
         
         # 분류 결과 요약 출력
-        if result['species']:
-            print(f"✓ 계층적 분류 완료: {result['order']} > {result['family']} > {result['genus']} > {result['species']}")
-        elif result['genus']:
-            print(f"✓ 계층적 분류 완료: {result['order']} > {result['family']} > {result['genus']}")
-        elif result['family']:
-            print(f"✓ 계층적 분류 완료: {result['order']} > {result['family']}")
-        else:
-            print(f"✓ 계층적 분류 완료: {result['order']} (하위 분류 없음)")
+        for result in results:
+            path = [result[field] for field in ('order', 'family', 'genus', 'species') if result[field]]
+            suffix = " (부분 결과)" if result.get('partial') else ("" if len(path) > 1 else " (하위 분류 없음)")
+            print(f"✓ 계층적 분류 완료: {' > '.join(path)}{suffix}")
         
-        return result
+        return results
+    
+    @staticmethod
+    def _path_rank(path):
+        """경로 순위 키: (분류된 단계 수, 단계별 확률의 곱)"""
+        depth = sum(1 for level in ('family', 'genus', 'species') if path[level])
+        return depth, path['score']
+    
+    def _acquire_classifier(self, key, level, deadline=None):
+        """
+        분류기를 찾아 (필요하면 로드해) 사용 중으로 표시 (_release_classifier와 짝)
+        
+        메모리에 있는지 확인하고 사용 중으로 표시하는 것은 한 번의 잠금 안에서 하므로,
+        확인한 뒤 다른 스레드가 해제해 마감 시간 확인 없이 다시 로드하는 일이 없습니다.
+        디스크 로드는 잠금 밖에서 하므로 다른 스레드는 메모리에 있는 분류기를 계속 쓸 수 있고,
+        같은 분류기를 동시에 요청한 스레드는 먼저 시작한 로드가 끝나기를 기다립니다.
+        
+        Args:
+            deadline: time.perf_counter() 기준 마감 시각. 메모리에 없고 예상 로드(또는 대기) 시간이
+                남은 시간보다 길면 로드하지 않음
+        
+        Returns:
+            (분류기 키 또는 None, 마감 시간 때문에 보류했는지)
+        """
+        while True:
+            with self._lock:
+                located = self._locate_classifier(key, level)
+                if located is None:
+                    print(f"⚠ {level} 분류기를 찾을 수 없습니다 (key: {key})")
+                    return None, False
+                
+                classifier_key, model_file, json_file = located
+                if model_file is None:
+                    self.in_use[classifier_key] = self.in_use.get(classifier_key, 0) + 1
+                    return classifier_key, False
+                
+                if deadline is not None:
+                    remaining = deadline - time.perf_counter()
+                    estimate = self.estimated_load_seconds(classifier_key)
+                    if estimate > remaining:
+                        print(f"⏱ {level} 분류기 로드 보류 (예상 {estimate:.2f}초 > 남은 {max(remaining, 0):.2f}초): {classifier_key}")
+                        return None, True
+                
+                event = self.loading.get(classifier_key)
+                loader = event is None
+                if loader:
+                    event = self.loading[classifier_key] = threading.Event()
+            
+            if not loader:
+                # 다른 스레드가 로드 중 - 끝나면 다시 확인
+                event.wait()
+                continue
+            
+            classifier = None
+            try:
+                print(f"📥 {level} 분류기 로드: {model_file.name}")
+                start = time.perf_counter()
+                classifier = self._load_single_classifier(model_file, json_file)
+                elapsed = time.perf_counter() - start
+            finally:
+                with self._lock:
+                    if classifier is not None:
+                        self.classifiers[classifier_key] = classifier
+                        self.load_times[classifier_key] = elapsed
+                        self.in_use[classifier_key] = self.in_use.get(classifier_key, 0) + 1
+                    del self.loading[classifier_key]
+                    event.set()
+            return (classifier_key if classifier is not None else None), False
+    
+    def _release_classifier(self, classifier_key):
+        """사용 표시 해제 후 메모리 정리"""
+        with self._lock:
+            count = self.in_use.get(classifier_key, 0) - 1
+            if count > 0:
+                self.in_use[classifier_key] = count
+            else:
+                self.in_use.pop(classifier_key, None)
+            self._unload_classifier(classifier_key)
     
     def _unload_classifier(self, classifier_key):
-        """사용한 분류기 메모리 해제"""
-        if classifier_key in self.classifiers:
-            del self.classifiers[classifier_key]
-            if torch.cuda.is_available():
-                torch.cuda.empty_cache()
-            print(f"🗑️  {classifier_key} 메모리 해제")
+        """
+        사용한 분류기 메모리 해제 (사전 로드된 분류기는 유지)
+        
+        NEST_HIER_CACHE_MODELS > 0이면 최근 사용한 분류기를 그 수만큼 남기고
+        가장 오래 쓰지 않은 것부터 해제합니다. 다른 스레드가 추론 중인 분류기는 해제하지 않고,
+        그 스레드가 사용을 마칠 때 다시 정리합니다. self._lock을 잡은 상태에서 호출합니다.
+        """
+        if classifier_key in self.pinned:
+            return
+        if self.cache_size > 0:
+            self.recent.pop(classifier_key, None)
+            if classifier_key in self.classifiers:
+                self.recent[classifier_key] = True
+            evicted = []
+            while len(self.recent) > self.cache_size:
+                evicted.append(self.recent.popitem(last=False)[0])
+        else:
+            evicted = [classifier_key]
+        
+        for key in evicted:
+            if key in self.classifiers and key not in self.pinned and key not in self.in_use:
+                del self.classifiers[key]
+                print(f"🗑️  {key} 메모리 해제")
+        if evicted and torch.cuda.is_available():
+            torch.cuda.empty_cache()
     
-    def _find_classifier(self, key, level):
-        """CSV 계층 정보를 참고하여 분류기를 찾고 로드"""
-        # 이미 로드된 분류기 검색
-        for classifier_name in self.classifiers:
-            if key in classifier_name.lower() and level in classifier_name:
-                return classifier_name
+    def _locate_classifier(self, key, level):
+        """
+        CSV 계층 정보를 참고하여 분류기 위치 확인 (로드하지 않음)
+        
+        Returns:
+            (분류기 키, 모델 파일, 클래스 파일) - 이미 로드된 분류기는 파일이 None, 없으면 None
+        """
+        # 정확한 매칭: best_벌_family (O), best_대벌레_family (X)
+        pattern = f"best_{key}_{level}_classifier"
+        
+        # 이미 로드된 분류기 검색 (같은 패턴으로 비교해야 '벌'이 '말벌' 분류기와 섞이지 않음)
+        for classifier_name in list(self.classifiers):
+            if pattern in classifier_name:
+                return classifier_name, None, None
         
         level_dir = self.models_dir / level
         if not level_dir.exists():
             return None
         
-        # 정확한 매칭: best_벌_family (O), best_대벌레_family (X)
-        pattern = f"best_{key}_{level}_classifier"
-        
         for model_file in level_dir.glob("best_*_classifier.pth"):
             if pattern in model_file.stem:
                 json_name = model_file.stem.replace("best_", "").replace("_classifier", "") + "_classes.json"
                 json_file = level_dir / json_name
                 
                 if json_file.exists():
-                    classifier_key = model_file.stem
-                    print(f"📥 {level} 분류기 로드: {model_file.name}")
-                    self.classifiers[classifier_key] = self._load_single_classifier(model_file, json_file)
-                    return classifier_key
+                    return model_file.stem, model_file, json_file
         
         return None
     
+    def estimated_load_seconds(self, classifier_key):
+        """분류기 예상 로드 시간 (같은 분류기의 이전 로드 시간 -> 전체 평균 -> 기본값 순)"""
+        if classifier_key in self.load_times:
+            return self.load_times[classifier_key]
+        if self.load_times:
+            return sum(self.load_times.values()) / len(self.load_times)
+        return self.default_load_seconds
+    
     def _classify_single(self, image, classifier_key, top_k=3):
-        if classifier_key not in self.classifiers:
-            return None
-        
-        classifier = self.classifiers[classifier_key]
+        return self._classify_batch([image], classifier_key, top_k)[0]
+    
+    def _classify_batch(self, images, classifier_key, top_k=3, batch_size=32):
+        """분류기 하나로 여러 이미지 추론 (이미지별 top_k 결과, 실패 시 None)"""
+        classifier = self.classifiers.get(classifier_key)
         if classifier is None:
-            return None
+            return [None] * len(images)
         
+        outputs = []
         try:
-            transformed = self.transform(image=image)
-            input_tensor = transformed['image'].unsqueeze(0).to(self.device)
-            
-            with torch.no_grad():
-                outputs = classifier['model'](input_tensor)
-                probabilities = torch.softmax(outputs, 1)[0]
-                top_probs, top_indices = torch.topk(probabilities, min(top_k, len(probabilities)))
-            
-            results = []
-            for prob, idx in zip(top_probs, top_indices):
-                class_name = classifier['idx_to_class'].get(idx.item(), f"Class_{idx.item()}")
-                results.append({'name': class_name, 'confidence': prob.item()})
-            
-            return results
+            for start in range(0, len(images), batch_size):
+                input_tensor = torch.stack([
+                    self.transform(image=image)['image'] for image in images[start:start + batch_size]
+                ]).to(self.device)
+                
+                with torch.no_grad():
+                    probabilities = torch.softmax(classifier['model'](input_tensor), 1)
+                    top_probs, top_indices = torch.topk(probabilities, min(top_k, probabilities.shape[1]), dim=1)
+                
+                for probs, indices in zip(top_probs.tolist(), top_indices.tolist()):
+                    outputs.append([
+                        {'name': classifier['idx_to_class'].get(idx, f"Class_{idx}"), 'confidence': prob}
+                        for prob, idx in zip(probs, indices)
+                    ])
+            return outputs
         except Exception as e:
             print(f"분류 오류 ({classifier_key}): {str(e)}")
-            return None
+            return [None] * len(images)
     
-    def classify_detections(self, image_path, detections, order_results, crop_dir=None):
-        with open(str(image_path), 'rb') as f:
-            image_data = f.read()
-        image_array = np.frombuffer(image_data, np.uint8)
-        image = cv2.imdecode(image_array, cv2.IMREAD_COLOR)
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    @staticmethod
+    def build_classification(order_name, order_confidence, hierarchical_result):
+        """목 결과 + 계층적 분류 결과 -> 단계별 classification 목록 (목, 과, 속, 종, 종 후보)"""
+        classification = []
+        classification.append({
+            'class': 0,
+            'class_name': order_name,
+            'confidence': order_confidence,
+            'level': 'order'
+        })
         
-        classification_results = []
+        if hierarchical_result['family']:
+            classification.append({
+                'class': 1,
+                'class_name': hierarchical_result['family'],
+                'confidence': hierarchical_result['confidence_scores'].get('family', 0.0),
+                'level': 'family'
+            })
         
+        if hierarchical_result['genus']:
+            classification.append({
+                'class': 2,
+                'class_name': hierarchical_result['genus'],
+                'confidence': hierarchical_result['confidence_scores'].get('genus', 0.0),
+                'level': 'genus'
+            })
+        
+        if hierarchical_result['species']:
+            classification.append({
+                'class': 3,
+                'class_name': hierarchical_result['species'],
+                'confidence': hierarchical_result['confidence_scores'].get('species', 0.0),
+                'level': 'species'
+            })
+            
+            if 'species_candidates' in hierarchical_result:
+                for i, candidate in enumerate(hierarchical_result['species_candidates'][1:], 1):
+                    classification.append({
+                        'class': 3 + i,
+                        'class_name': f"{candidate['name']} (후보 #{i+1})",
+                        'confidence': candidate['confidence'],
+                        'level': 'species_candidate'
+                    })
+        
+        return classification
+    
+    def classify_detections(self, image_path, detections, order_results, crop_dir=None, image=None, deadline=None,
+                            beam_width=None):
+        """
+        탐지된 곤충들을 크롭하여 한 번에 계층적 분류
+
+        Args:
+            order_results: InsectClassifier.classify_detections 결과 (detection_idx로 매칭)
+            image: 이미 디코딩한 RGB 이미지 (있으면 다시 읽지 않음)
+            deadline: time.perf_counter() 기준 마감 시각 (classify_hierarchical_batch 참고)
+            beam_width: 유지할 분류 경로 수 (classify_hierarchical_batch 참고)
+        """
+        if image is not None:
+            image_rgb = image
+        else:
+            with open(str(image_path), 'rb') as f:
+                image_data = f.read()
+            image_array = np.frombuffer(image_data, np.uint8)
+            image_rgb = cv2.cvtColor(cv2.imdecode(image_array, cv2.IMREAD_COLOR), cv2.COLOR_BGR2RGB)
+        
+        order_by_idx = {r.get('detection_idx', i): r for i, r in enumerate(order_results)}
+        
+        crops = []
         for idx, det in enumerate(detections):
             if isinstance(det, dict):
                 bbox = det.get('bbox', det)
@@ -222,14 +544,19 @@ class HierarchicalClassifier:
             if cropped.size == 0:
                 continue
             
-            order_name = "Unknown"
-            if idx < len(order_results) and order_results[idx].get('classification'):
-                order_classification = order_results[idx]['classification']
-                if order_classification:
-                    order_name = order_classification[0]['class_name']
-            
-            hierarchical_result = self.classify_hierarchical(cropped, order_name)
-            
+            order_classification = (order_by_idx.get(idx) or {}).get('classification') or []
+            order_name = order_classification[0]['class_name'] if order_classification else "Unknown"
+            order_confidence = order_classification[0]['confidence'] if order_classification else 0.0
+            crops.append((idx, bbox, cropped, order_name, order_confidence))
+        
+        hierarchical_results = self.classify_hierarchical_batch(
+            [crop[2] for crop in crops], [crop[3] for crop in crops], deadline=deadline,
+            beam_width=beam_width
+        )
+        
+        classification_results = []
+        
+        for (idx, bbox, cropped, order_name, order_confidence), hierarchical_result in zip(crops, hierarchical_results):
             crop_path = None
             if crop_dir:
                 crop_dir = Path(crop_dir)
@@ -237,46 +564,7 @@ class HierarchicalClassifier:
                 crop_path = crop_dir / f"crop_{idx:03d}.jpg"
                 Image.fromarray(cropped).save(str(crop_path))
             
-            classification = []
-            classification.append({
-                'class': 0,
-                'class_name': order_name,
-                'confidence': order_results[idx]['classification'][0]['confidence'] if idx < len(order_results) and order_results[idx].get('classification') else 0.0,
-                'level': 'order'
-            })
-            
-            if hierarchical_result['family']:
-                classification.append({
-                    'class': 1,
-                    'class_name': hierarchical_result['family'],
-                    'confidence': hierarchical_result['confidence_scores'].get('family', 0.0),
-                    'level': 'family'
-                })
-            
-            if hierarchical_result['genus']:
-                classification.append({
-                    'class': 2,
-                    'class_name': hierarchical_result['genus'],
-                    'confidence': hierarchical_result['confidence_scores'].get('genus', 0.0),
-                    'level': 'genus'
-                })
-            
-            if hierarchical_result['species']:
-                classification.append({
-                    'class': 3,
-                    'class_name': hierarchical_result['species'],
-                    'confidence': hierarchical_result['confidence_scores'].get('species', 0.0),
-                    'level': 'species'
-                })
-                
-                if 'species_candidates' in hierarchical_result:
-                    for i, candidate in enumerate(hierarchical_result['species_candidates'][1:], 1):
-                        classification.append({
-                            'class': 3 + i,
-                            'class_name': f"{candidate['name']} (후보 #{i+1})",
-                            'confidence': candidate['confidence'],
-                            'level': 'species_candidate'
-                        })
+            classification = self.build_classification(order_name, order_confidence, hierarchical_result)
             
             classification_results.append({
                 'detection_idx': idx,
@@ -0,0 +1,79 @@
+"""
+탐지용 이미지 디코딩 모듈
+
+YOLO는 입력을 긴 변 640px 근처로 줄여 추론하므로, 수십 MP 사진을 원본 해상도로
+디코딩하면 메모리와 시간만 낭비됩니다. 큰 JPEG은 DCT 단계 축소 디코딩
+(cv2.IMREAD_REDUCED_COLOR_*)으로 읽고, 탐지 박스는 배율을 곱해 원본 좌표로 되돌립니다.
+원본 해상도 디코딩은 분류기가 크롭할 때만 수행됩니다.
+"""
+
+import cv2
+import numpy as np
+from PIL import Image
+
+
+# JPEG DCT 축소 디코딩 배율 -> OpenCV 플래그 (큰 배율부터 시도)
+REDUCED_DECODE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+# EXIF Orientation 중 가로/세로가 바뀌는 값
+TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+
+
+def oriented_image_size(image_path):
+    """
+    헤더만 읽어 (너비, 높이, 형식) 반환 (EXIF 회전 반영, 픽셀은 디코딩하지 않음)
+
+    Returns:
+        (width, height, format) 또는 None (이미지를 열 수 없음)
+    """
+    try:
+        with Image.open(image_path) as img:
+            width, height = img.size
+            orientation = img.getexif().get(0x0112, 1)
+            if orientation in TRANSPOSED_ORIENTATIONS:
+                width, height = height, width
+            return width, height, img.format
+    except Exception:
+        return None
+
+
+def read_image_for_detection(image_path, long_side=1280):
+    """
+    탐지용 이미지 로드 (큰 JPEG은 축소 디코딩)
+
+    YOLO는 어차피 긴 변 640px 근처로 줄여 추론하므로, 긴 변이 long_side 이상 남는
+    가장 큰 배율(1/2, 1/4, 1/8)로 JPEG을 DCT 단계에서 축소 디코딩합니다.
+    전체 해상도 버퍼를 만들지 않아 메모리와 디코딩 시간이 줄어듭니다.
+
+    Args:
+        image_path: 이미지 경로
+        long_side: 축소 후 남겨야 하는 긴 변 최소 길이 (0이면 항상 원본 해상도)
+
+    Returns:
+        (BGR 이미지, 배율, (원본 너비, 원본 높이)) - 배율 1이면 원본 해상도
+    """
+    # 한글 경로 지원
+    try:
+        buffer = np.fromfile(str(image_path), dtype=np.uint8)
+    except OSError:
+        buffer = None
+
+    info = oriented_image_size(image_path) if buffer is not None and long_side else None
+    if info is not None and info[2] == 'JPEG':
+        width, height = info[0], info[1]
+        for factor, flag in REDUCED_DECODE_FLAGS:
+            if max(width, height) / factor < long_side:
+                continue
+            image = cv2.imdecode(buffer, flag)
+            if image is not None:
+                return image, factor, (width, height)
+            break
+
+    image = cv2.imdecode(buffer, cv2.IMREAD_COLOR) if buffer is not None else None
+    if image is None:
+        raise ValueError(f"이미지를 로드할 수 없습니다: {image_path}")
+    return image, 1, (image.shape[1], image.shape[0])
@@ -0,0 +1,136 @@
+"""
+import 시간 예산 점검 모듈
+
+`python -X importtime`으로 app 모듈을 새 프로세스에서 import하여
+누적 import 시간을 측정하고, 웹 전용 경로에서 무거운 추론 의존성
+(torch, ultralytics, timm 등)이 로드되지 않는지 확인합니다.
+
+사용법:
+    python -m utils.import_budget                # 기본 예산 1000ms
+    python -m utils.import_budget --budget-ms 600 --top 15
+
+예산을 넘거나 금지 모듈이 import되면 종료 코드 1을 반환합니다.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+
+BASE_DIR = Path(__file__).parent.parent
+
+# 첫 추론 전까지 import되면 안 되는 최상위 패키지
+HEAVY_MODULES = (
+    'torch', 'torchvision', 'ultralytics', 'timm',
+    'albumentations', 'cv2', 'pandas',
+)
+
+DEFAULT_BUDGET_MS = 1000.0
+
+
+def measure_import_time(target: str = 'app') -> List[Tuple[str, float, float]]:
+    """
+    새 프로세스에서 target 모듈 import 시간 측정
+
+    Args:
+        target: import할 모듈 이름
+
+    Returns:
+        [(모듈 이름, self 시간 ms, 누적 시간 ms), ...] (import 순서,
+        하위 import는 모듈 이름 앞에 깊이만큼 들여쓰기가 남음)
+    """
+    env = dict(os.environ)
+    # 측정 중에는 데이터 파일 감시 스레드를 띄우지 않음
+    env['NEST_DATA_RELOAD_INTERVAL'] = '0'
+
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {target}'],
+        cwd=str(BASE_DIR),
+        env=env,
+        capture_output=True,
+        text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"'{target}' import 실패:\n{completed.stderr[-2000:]}")
+
+    entries = []
+    for line in completed.stderr.splitlines():
+        # 형식: "import time:   self [us] | cumulative | imported package"
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3:
+            continue
+        try:
+            self_us = int(parts[0].strip())
+            cumulative_us = int(parts[1].strip())
+        except ValueError:
+            continue  # 헤더 행
+        # 구분자 뒤 공백 한 칸만 제거하고 중첩 깊이를 나타내는 들여쓰기는 유지
+        name = parts[2].rstrip()
+        if name.startswith(' '):
+            name = name[1:]
+        entries.append((name, self_us / 1000.0, cumulative_us / 1000.0))
+
+    return entries
+
+
+def check_budget(entries: List[Tuple[str, float, float]],
+                 budget_ms: float = DEFAULT_BUDGET_MS) -> Dict:
+    """
+    측정 결과를 예산과 비교
+
+    Returns:
+        {
+            'total_ms': 전체 import 시간 (최상위 모듈 누적 합),
+            'budget_ms': 예산,
+            'heavy_modules': import된 금지 패키지 목록,
+            'passed': 통과 여부
+        }
+    """
+    # 들여쓰기가 없는 항목이 최상위 import (누적 시간에 하위 import 포함)
+    total_ms = sum(cumulative for name, _, cumulative in entries if not name.startswith(' '))
+
+    loaded = {name.strip().split('.')[0] for name, _, _ in entries}
+    heavy = sorted(module for module in HEAVY_MODULES if module in loaded)
+
+    return {
+        'total_ms': total_ms,
+        'budget_ms': budget_ms,
+        'heavy_modules': heavy,
+        'passed': total_ms <= budget_ms and not heavy
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="app import 시간 예산 점검")
+    parser.add_argument('--target', default='app', help="측정할 모듈 (기본: app)")
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help=f"허용 import 시간 (기본: {DEFAULT_BUDGET_MS:.0f}ms)")
+    parser.add_argument('--top', type=int, default=10, help="느린 모듈 출력 개수")
+    args = parser.parse_args(argv)
+
+    entries = measure_import_time(args.target)
+    report = check_budget(entries, args.budget_ms)
+
+    print(f"[IMPORT_BUDGET] '{args.target}' import: {report['total_ms']:.1f}ms "
+          f"(예산: {report['budget_ms']:.0f}ms)")
+
+    slowest = sorted(entries, key=lambda entry: entry[1], reverse=True)[:args.top]
+    for name, self_ms, cumulative_ms in slowest:
+        print(f"  {self_ms:8.1f}ms (누적 {cumulative_ms:8.1f}ms)  {name.strip()}")
+
+    if report['heavy_modules']:
+        print(f"[IMPORT_BUDGET] 추론 전용 패키지가 로드됨: {', '.join(report['heavy_modules'])}")
+    if report['total_ms'] > report['budget_ms']:
+        print("[IMPORT_BUDGET] 예산 초과")
+
+    print(f"[IMPORT_BUDGET] {'통과' if report['passed'] else '실패'}")
+    return 0 if report['passed'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
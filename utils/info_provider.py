@@ -5,6 +5,7 @@
 """
 
 import json
+import threading
 from pathlib import Path
 from typing import Dict, List, Optional
 
@@ -23,7 +24,46 @@ class InfoProvider:
             data_path = Path(__file__).parent / "data" / "species_info.json"
         
         self.data_path = Path(data_path)
-        self.info_database = self._load_info_database()
+        
+        # 데이터와 인덱스는 하나의 딕셔너리로 묶어 참조 한 번으로 교체 (reload 참고)
+        self.version = 0
+        self._reload_lock = threading.Lock()
+        self._index = self._build_index(self._load_info_database())
+    
+    @property
+    def info_database(self) -> Dict:
+        """현재 정보 데이터베이스"""
+        return self._index["database"]
+    
+    def reload(self) -> bool:
+        """
+        정보 데이터 파일을 다시 읽어 인덱스를 새로 구축한 뒤 교체
+        
+        조회 중인 요청은 잠금 없이 이전 인덱스를 끝까지 사용하며,
+        교체될 때마다 version이 증가합니다.
+        
+        Returns:
+            교체 성공 여부 (실패 시 기존 데이터 유지)
+        """
+        with self._reload_lock:
+            try:
+                index = self._build_index(self._load_info_database())
+            except Exception as e:
+                print(f"[INFO_PROVIDER] 데이터 리로드 실패 (기존 데이터 유지): {e}")
+                return False
+            self._index = index
+            self.version += 1
+        print(f"[INFO_PROVIDER] 데이터 리로드 완료: {len(index['database'])}개 종 (version {self.version})")
+        return True
+    
+    def _build_index(self, database: Dict) -> Dict:
+        """학명 -> 국명 인덱스 구축 (같은 학명은 먼저 나온 종 우선)"""
+        scientific_index = {}
+        for korean_name, data in database.items():
+            scientific = data.get("scientific_name", "")
+            if scientific:
+                scientific_index.setdefault(scientific, korean_name)
+        return {"database": database, "scientific": scientific_index}
     
     def _load_info_database(self) -> Dict:
         """정보 데이터베이스 로드"""
@@ -612,33 +652,33 @@ class InfoProvider:
         """
         print(f"[INFO_PROVIDER] 검색 중: {species_name}")
         
+        # 리로드 중에도 한 요청은 같은 인덱스를 사용
+        index = self._index
+        database = index["database"]
+        
         # 국명으로 검색
-        if species_name in self.info_database:
+        if species_name in database:
             print(f"[INFO_PROVIDER] 국명 매칭 성공: {species_name}")
-            return self._format_info(species_name, self.info_database[species_name])
+            return self._format_info(species_name, database[species_name])
         
         # 학명으로 검색
-        for korean_name, data in self.info_database.items():
-            scientific = data.get("scientific_name", "")
-            print(f"[INFO_PROVIDER] 학명 비교: '{species_name}' vs '{scientific}'")
-            if scientific == species_name:
-                print(f"[INFO_PROVIDER] 학명 매칭 성공: {korean_name}")
-                return self._format_info(korean_name, data)
+        korean_name = index["scientific"].get(species_name)
+        if korean_name is not None:
+            print(f"[INFO_PROVIDER] 학명 매칭 성공: {korean_name}")
+            return self._format_info(korean_name, database[korean_name])
         
         # 부분 매칭 (언더스코어를 공백으로 변환하여 매칭)
         normalized_species = species_name.replace("_", " ")
         print(f"[INFO_PROVIDER] 정규화된 종명: '{normalized_species}'")
         
         # 정확한 매칭 우선
-        for korean_name, data in self.info_database.items():
-            scientific = data.get("scientific_name", "")
-            print(f"[INFO_PROVIDER] 정확한 매칭 비교: '{normalized_species}' vs '{scientific}'")
-            if normalized_species == scientific:
-                print(f"[INFO_PROVIDER] 정확한 매칭 성공: {korean_name}")
-                return self._format_info(korean_name, data)
+        korean_name = index["scientific"].get(normalized_species)
+        if korean_name is not None:
+            print(f"[INFO_PROVIDER] 정확한 매칭 성공: {korean_name}")
+            return self._format_info(korean_name, database[korean_name])
         
         # 부분 매칭 (종명 포함)
-        for korean_name, data in self.info_database.items():
+        for korean_name, data in database.items():
             scientific = data.get("scientific_name", "")
             print(f"[INFO_PROVIDER] 부분 매칭 비교: '{normalized_species}' vs '{scientific}'")
             if normalized_species in scientific or scientific in normalized_species:
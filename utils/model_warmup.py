@@ -0,0 +1,189 @@
+"""
+모델 워밍업 모듈
+
+서버 시작 직후 탐지기, 목 분류기, 계층적 분류기를 미리 로드하고
+더미 이미지로 한 번씩 추론하여 첫 업로드 요청의 지연을 없앱니다.
+자주 관찰된 분류군의 하위 분류기(과/속/종)는 상위 N개를 사전 로드합니다.
+
+환경 변수:
+    NEST_WARMUP=1            워밍업 활성화 (기본: 비활성, 첫 요청 시 지연 로딩)
+    NEST_WARMUP_PRELOAD=3    사전 로드할 계층 분류기 수
+"""
+
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class ModelWarmup:
+    """모델 사전 로드 및 준비 상태 관리"""
+
+    def __init__(self,
+                 get_detector: Callable,
+                 get_classifier: Callable,
+                 get_hierarchical_classifier: Callable,
+                 get_usage_records: Optional[Callable[[], Dict]] = None,
+                 enabled: bool = False,
+                 preload_count: int = 3):
+        """
+        초기화
+
+        Args:
+            get_detector / get_classifier / get_hierarchical_classifier:
+                app.py의 싱글톤 반환 함수 (잠금 하에 모델 생성)
+            get_usage_records: 저장된 분류 기록 반환 함수 (사전 로드 대상 선정용)
+            enabled: 워밍업 활성화 여부
+            preload_count: 사전 로드할 계층 분류기 수
+        """
+        self.loaders = [
+            ('detector', get_detector),
+            ('classifier', get_classifier),
+            ('hierarchical_classifier', get_hierarchical_classifier),
+        ]
+        self.get_usage_records = get_usage_records
+        self.enabled = enabled
+        self.preload_count = preload_count
+
+        self._lock = threading.Lock()
+        self._thread = None
+        self.state = {
+            'status': 'pending' if enabled else 'disabled',
+            'started_at': None,
+            'finished_at': None,
+            'models': {},
+            'preloaded': [],
+            'error': None
+        }
+
+    def _set(self, **kwargs):
+        with self._lock:
+            self.state.update(kwargs)
+
+    def most_used_classifiers(self, hierarchical_classifier) -> List[Tuple[str, str]]:
+        """
+        저장된 분류 기록에서 가장 많이 쓰인 하위 분류기 선정
+
+        Args:
+            hierarchical_classifier: 분류기 키 규칙(classifier_keys_for)을 제공하는 계층적 분류기
+
+        Returns:
+            [(키, 레벨), ...] 사용 횟수 내림차순, 최대 preload_count개
+        """
+        if self.preload_count <= 0 or self.get_usage_records is None:
+            return []
+
+        counts = Counter()
+        for record in self.get_usage_records().values():
+            if not isinstance(record, dict):
+                continue
+            counts.update(hierarchical_classifier.classifier_keys_for(
+                order=record.get('order'),
+                family=record.get('family'),
+                genus=record.get('genus')
+            ))
+
+        return [key for key, _ in counts.most_common(self.preload_count)]
+
+    def run(self) -> bool:
+        """
+        모델 로드 + 더미 추론 실행 (동기)
+
+        Returns:
+            모든 모델 준비 성공 여부
+        """
+        self._set(status='running', started_at=datetime.now().isoformat(), error=None)
+        print("[WARMUP] 모델 워밍업 시작")
+
+        try:
+            for name, loader in self.loaders:
+                start = time.perf_counter()
+                model = loader()
+                loaded = time.perf_counter()
+
+                if name == 'hierarchical_classifier':
+                    preloaded = []
+                    for key, level in self.most_used_classifiers(model):
+                        classifier_key = model.preload(key, level)
+                        if classifier_key:
+                            preloaded.append(classifier_key)
+                    self._set(preloaded=preloaded)
+                    loaded = time.perf_counter()
+
+                model.warm_up()
+                warmed = time.perf_counter()
+
+                timing = {
+                    'load_seconds': round(loaded - start, 3),
+                    'warmup_seconds': round(warmed - loaded, 3)
+                }
+                # 모델 객체가 직접 측정한 가중치 로드 시간 (워밍업 전에 이미 로드된 경우 포함)
+                if getattr(model, 'load_seconds', None) is not None:
+                    timing['model_load_seconds'] = round(model.load_seconds, 3)
+                if getattr(model, 'load_times', None):
+                    timing['classifier_load_seconds'] = {
+                        key: round(seconds, 3) for key, seconds in model.load_times.items()
+                        if key in model.pinned
+                    }
+
+                with self._lock:
+                    self.state['models'][name] = timing
+
+        except Exception as e:
+            print(f"[WARMUP] 워밍업 실패: {e}")
+            import traceback
+            traceback.print_exc()
+            self._set(status='failed', error=str(e), finished_at=datetime.now().isoformat())
+            return False
+
+        self._set(status='ready', finished_at=datetime.now().isoformat())
+        self.print_report()
+        return True
+
+    def print_report(self):
+        """모델별 시작 소요 시간 출력"""
+        status = self.get_status()
+        print("[WARMUP] 모델 워밍업 완료 - 시작 리포트")
+        for name, timing in status['models'].items():
+            line = f"  {name:<24} 로드 {timing['load_seconds']:7.2f}초  더미 추론 {timing['warmup_seconds']:7.2f}초"
+            if 'model_load_seconds' in timing:
+                line += f"  (가중치 {timing['model_load_seconds']:.2f}초)"
+            print(line)
+            for key, seconds in timing.get('classifier_load_seconds', {}).items():
+                print(f"    - {key}: {seconds:.2f}초")
+
+    def start(self):
+        """백그라운드 스레드에서 워밍업 시작 (비활성화 또는 이미 시작했으면 무시)"""
+        if not self.enabled or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self.run, name="model-warmup", daemon=True)
+        self._thread.start()
+
+    def is_ready(self) -> bool:
+        """요청을 지연 없이 처리할 수 있는지 (비활성화 시 지연 로딩이므로 True)"""
+        with self._lock:
+            return self.state['status'] in ('ready', 'disabled')
+
+    def get_status(self) -> Dict:
+        """준비 상태 사본"""
+        with self._lock:
+            status = dict(self.state)
+            status['models'] = dict(self.state['models'])
+            status['preloaded'] = list(self.state['preloaded'])
+        status['ready'] = status['status'] in ('ready', 'disabled')
+        return status
+
+
+def warmup_enabled_from_env() -> bool:
+    """NEST_WARMUP 환경 변수 해석"""
+    return os.environ.get("NEST_WARMUP", "0").lower() in ("1", "true", "yes", "on")
+
+
+def preload_count_from_env() -> int:
+    """NEST_WARMUP_PRELOAD 환경 변수 해석"""
+    try:
+        return int(os.environ.get("NEST_WARMUP_PRELOAD", "3"))
+    except ValueError:
+        return 3
@@ -0,0 +1,317 @@
+"""
+근접 중복 이미지 검색 모듈
+
+연사로 찍은 같은 곤충 사진은 바이트는 다르지만 거의 같은 이미지입니다.
+업로드 시 dHash(64비트 지각 해시)를 계산해 BK-트리에 넣고, 해밍 거리가
+임계값 이하이면서 최근 시간 창 안에 같은 세션에서 올라온 이미지를 찾습니다.
+
+트랩/잎 사진의 dHash는 주로 배경을 반영하므로 해시만으로는 같은 곤충인지 알 수 없습니다.
+찾은 결과는 후보로만 쓰고, 저해상도 빠른 탐지 결과와 박스가 일치할 때만 재사용합니다.
+기본값은 비활성입니다 (NEST_NEAR_DUP_DISTANCE=0).
+"""
+
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+from utils.crop_result_cache import bbox_iou
+
+
+def dhash(img: Image.Image, hash_size: int = 8) -> int:
+    """
+    차이 해시(dHash) 계산
+
+    흑백으로 (hash_size+1) x hash_size 크기로 줄인 뒤, 가로로 이웃한 픽셀의
+    밝기 비교 결과를 비트로 모읍니다. 밝기/압축/작은 이동에 강합니다.
+
+    Args:
+        img: PIL 이미지
+        hash_size: 한 변의 비트 수 (8이면 64비트)
+
+    Returns:
+        정수 해시
+    """
+    small = img.convert('L').resize((hash_size + 1, hash_size), Image.BILINEAR)
+    pixels = list(small.getdata())
+
+    value = 0
+    width = hash_size + 1
+    for row in range(hash_size):
+        offset = row * width
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def image_signature(image_path, hash_size: int = 8) -> Optional[Tuple[int, Tuple[int, int]]]:
+    """
+    이미지 경로 -> (dHash, (원본 너비, 원본 높이))
+
+    JPEG은 축소 디코딩(draft)으로 전체 해상도 디코드를 피합니다.
+    탐지 박스와 같은 좌표계가 되도록 크기와 해시 모두 EXIF 회전을 반영합니다.
+
+    Returns:
+        (해시, 크기) 또는 None (이미지를 열 수 없음)
+    """
+    # image_decode는 cv2를 import하므로 웹 경로 import 시간에 포함되지 않도록 호출 시 import
+    from utils.image_decode import TRANSPOSED_ORIENTATIONS
+
+    try:
+        with Image.open(image_path) as img:
+            width, height = img.size
+            if img.getexif().get(0x0112, 1) in TRANSPOSED_ORIENTATIONS:
+                width, height = height, width
+            img.draft('L', ((hash_size + 1) * 8, hash_size * 8))
+            return dhash(ImageOps.exif_transpose(img), hash_size), (width, height)
+    except Exception as e:
+        print(f"[NEAR_DUP] 해시 계산 실패 ({image_path}): {e}")
+        return None
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """두 해시의 해밍 거리"""
+    return bin(a ^ b).count('1')
+
+
+class BKTree:
+    """해밍 거리 BK-트리 (삼각 부등식으로 검색 범위를 줄임)"""
+
+    def __init__(self):
+        # 노드: [해시, 항목 리스트, {거리: 자식 노드}]
+        self.root = None
+        self.size = 0
+
+    def add(self, value: int, item):
+        """해시와 항목 추가 (같은 해시는 한 노드에 모음)"""
+        self.size += 1
+        if self.root is None:
+            self.root = [value, [item], {}]
+            return
+
+        node = self.root
+        while True:
+            distance = hamming_distance(value, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [item], {}]
+                return
+            node = child
+
+    def search(self, value: int, max_distance: int) -> List[Tuple[int, object]]:
+        """
+        거리 max_distance 이내 항목 검색
+
+        Returns:
+            [(거리, 항목), ...] 거리 오름차순
+        """
+        if self.root is None:
+            return []
+
+        results = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            distance = hamming_distance(value, node[0])
+            if distance <= max_distance:
+                results.extend((distance, item) for item in node[1])
+            low, high = distance - max_distance, distance + max_distance
+            for child_distance, child in node[2].items():
+                if low <= child_distance <= high:
+                    stack.append(child)
+
+        results.sort(key=lambda result: result[0])
+        return results
+
+
+class NearDuplicateIndex:
+    """최근 업로드의 지각 해시 인덱스"""
+
+    def __init__(self, max_distance: int = 0, window_seconds: float = 600, max_entries: int = 4096,
+                 confirm_size: int = 320, confirm_iou: float = 0.5):
+        """
+        초기화
+
+        Args:
+            max_distance: 근접 중복으로 볼 최대 해밍 거리 (64비트 중, 0이면 비활성)
+            window_seconds: 이 시간 안에 올라온 이미지만 재사용 대상
+            max_entries: 인덱스 최대 항목 수
+            confirm_size: 재사용 전 확인 탐지의 입력 크기 (px)
+            confirm_iou: 확인 탐지 박스와 이 값 이상 겹쳐야 같은 박스로 봄
+        """
+        self.max_distance = max_distance
+        self.window_seconds = window_seconds
+        self.max_entries = max_entries
+        self.confirm_size = confirm_size
+        self.confirm_iou = confirm_iou
+
+        self._tree = BKTree()
+        self._lock = threading.Lock()
+        self.matches = 0
+        self.lookups = 0
+        self.confirmed = 0
+        self.rejected = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_distance > 0
+
+    def _rebuild(self, now: float):
+        """시간 창이 지난 항목을 빼고 트리 재구성 (BK-트리는 삭제를 지원하지 않음, 잠금 안에서 호출)"""
+        live = []
+        stack = [self._tree.root] if self._tree.root else []
+        while stack:
+            node = stack.pop()
+            live.extend((node[0], item) for item in node[1] if now - item['added_at'] <= self.window_seconds)
+            stack.extend(node[2].values())
+
+        live.sort(key=lambda entry: entry[1]['added_at'])
+        live = live[-(self.max_entries // 2):]
+
+        self._tree = BKTree()
+        for value, item in live:
+            self._tree.add(value, item)
+
+    def add(self, phash: int, record: Dict):
+        """
+        업로드 기록 추가
+
+        Args:
+            phash: dhash 결과
+            record: 재사용에 필요한 정보 (content_hash, model_version, size, owner 등)
+        """
+        if not self.enabled or phash is None:
+            return
+        now = time.time()
+        with self._lock:
+            if self._tree.size >= self.max_entries:
+                self._rebuild(now)
+            self._tree.add(phash, dict(record, phash=phash, added_at=now))
+
+    def find(self, phash: int, version: str, owner: str, size: Tuple[int, int] = None,
+             exclude_hash: str = None) -> Optional[Dict]:
+        """
+        가장 가까운 근접 중복 검색
+
+        Args:
+            phash: 새 이미지의 dhash
+            version: 현재 탐지 모델 버전 (다른 버전 결과는 재사용하지 않음)
+            owner: 세션 ID - 같은 세션이 올린 이미지만 후보 (다른 사용자의 박스를 주지 않음)
+            size: 새 이미지 (너비, 높이) - 가로세로 비율이 다른 이미지는 제외
+            exclude_hash: 제외할 내용 해시 (자기 자신)
+
+        Returns:
+            기록 사본 + 'distance' 또는 None
+        """
+        if not self.enabled or phash is None or not owner:
+            return None
+        now = time.time()
+        with self._lock:
+            self.lookups += 1
+            for distance, item in self._tree.search(phash, self.max_distance):
+                if now - item['added_at'] > self.window_seconds:
+                    continue
+                if item.get('owner') != owner:
+                    continue
+                if item.get('model_version') != version or item.get('content_hash') == exclude_hash:
+                    continue
+                if size and not same_aspect_ratio(size, item.get('size')):
+                    continue
+                self.matches += 1
+                return dict(item, distance=distance)
+        return None
+
+    def record_confirmation(self, accepted: bool):
+        """확인 탐지 결과 기록 (재사용/거부 통계)"""
+        with self._lock:
+            if accepted:
+                self.confirmed += 1
+            else:
+                self.rejected += 1
+
+    def get_stats(self) -> Dict:
+        """인덱스 통계"""
+        with self._lock:
+            return {
+                'entries': self._tree.size,
+                'max_distance': self.max_distance,
+                'window_seconds': self.window_seconds,
+                'lookups': self.lookups,
+                'matches': self.matches,
+                'confirmed': self.confirmed,
+                'rejected': self.rejected,
+                'match_rate': round(self.matches / self.lookups, 4) if self.lookups else 0.0
+            }
+
+
+def same_aspect_ratio(a: Tuple[int, int], b: Tuple[int, int], tolerance: float = 0.02) -> bool:
+    """두 (너비, 높이)의 가로세로 비율이 tolerance 이내로 같은지"""
+    if not a or not b or not a[1] or not b[1]:
+        return False
+    ratio_a, ratio_b = a[0] / a[1], b[0] / b[1]
+    return abs(ratio_a - ratio_b) <= tolerance * max(ratio_a, ratio_b)
+
+
+def scale_detections(detections: List[Dict], from_size: Tuple[int, int], to_size: Tuple[int, int]) -> List[Dict]:
+    """
+    다른 해상도의 근접 중복 이미지로 바운딩 박스 좌표 변환
+
+    Args:
+        from_size / to_size: (width, height)
+    """
+    sx = to_size[0] / from_size[0] if from_size[0] else 1.0
+    sy = to_size[1] / from_size[1] if from_size[1] else 1.0
+    scaled = []
+    for det in detections:
+        x1, y1, x2, y2 = det['bbox'][:4]
+        scaled.append(dict(det, bbox=[x1 * sx, y1 * sy, x2 * sx, y2 * sy]))
+    return scaled
+
+
+def boxes_agree(candidate: List[Dict], confirmed: List[Dict], iou_threshold: float = 0.5) -> bool:
+    """
+    재사용할 박스와 확인 탐지 박스가 같은 곤충들을 가리키는지
+
+    개수가 같고, 확인 탐지 박스마다 IoU가 iou_threshold 이상인 재사용 박스가
+    서로 겹치지 않게 하나씩 있어야 합니다.
+    """
+    if len(candidate) != len(confirmed):
+        return False
+    remaining = [det['bbox'] for det in candidate]
+    for det in confirmed:
+        best, best_iou = None, iou_threshold
+        for index, bbox in enumerate(remaining):
+            iou = bbox_iou(det['bbox'], bbox)
+            if iou >= best_iou:
+                best, best_iou = index, iou
+        if best is None:
+            return False
+        remaining.pop(best)
+    return True
+
+
+# 싱글톤 인스턴스
+_near_duplicate_index_instance = None
+
+def get_near_duplicate_index() -> NearDuplicateIndex:
+    """
+    근접 중복 인덱스 싱글톤 인스턴스 반환
+
+    환경 변수:
+        NEST_NEAR_DUP_DISTANCE: 최대 해밍 거리 (기본 0 = 비활성, 연사 재사용 시 6 정도)
+        NEST_NEAR_DUP_WINDOW: 재사용 시간 창 초 (기본 600)
+        NEST_NEAR_DUP_CONFIRM_SIZE: 재사용 전 확인 탐지 입력 크기 px (기본 320)
+    """
+    global _near_duplicate_index_instance
+    if _near_duplicate_index_instance is None:
+        _near_duplicate_index_instance = NearDuplicateIndex(
+            max_distance=int(os.environ.get("NEST_NEAR_DUP_DISTANCE", "0")),
+            window_seconds=float(os.environ.get("NEST_NEAR_DUP_WINDOW", "600")),
+            confirm_size=int(os.environ.get("NEST_NEAR_DUP_CONFIRM_SIZE", "320"))
+        )
+    return _near_duplicate_index_instance
@@ -5,10 +5,46 @@
 """
 
 import json
+import threading
+from bisect import bisect_left
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
 
+class FrozenDict(dict):
+    """
+    읽기 전용 딕셔너리
+
+    미리 계산된 위험도 평가 결과를 여러 요청이 공유하므로 수정을 막습니다.
+    dict의 하위 클래스라서 jsonify, 세션, json.dump에는 그대로 사용할 수 있고,
+    수정이 필요하면 dict(result)로 복사해서 사용합니다.
+    """
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("캐시된 위험도 평가 결과는 수정할 수 없습니다 (dict(result)로 복사 후 사용)")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+
+def _freeze(value):
+    """dict/list를 FrozenDict/tuple로 재귀 변환"""
+    if isinstance(value, dict):
+        return FrozenDict((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
 class RiskAssessor:
     """곤충 위험도 평가 시스템"""
     
@@ -31,7 +67,38 @@ class RiskAssessor:
             data_path = Path(__file__).parent / "data" / "risk_data.json"
         
         self.data_path = Path(data_path)
-        self.risk_database = self._load_risk_database()
+        
+        # 데이터와 인덱스는 하나의 딕셔너리로 묶어 참조 한 번으로 교체 (reload 참고)
+        self.version = 0
+        self._reload_lock = threading.Lock()
+        self._index = self._build_index(self._load_risk_database())
+    
+    @property
+    def risk_database(self) -> Dict:
+        """현재 위험도 데이터베이스"""
+        return self._index["database"]
+    
+    def reload(self) -> bool:
+        """
+        위험도 데이터 파일을 다시 읽어 인덱스를 새로 구축한 뒤 교체
+        
+        새 인덱스를 모두 만든 다음 참조만 바꾸므로, 조회 중인 요청은
+        잠금 없이 이전 인덱스를 끝까지 사용합니다. 교체될 때마다 version이
+        증가하며, 하위 캐시는 이 값을 키로 사용합니다.
+        
+        Returns:
+            교체 성공 여부 (실패 시 기존 데이터 유지)
+        """
+        with self._reload_lock:
+            try:
+                index = self._build_index(self._load_risk_database())
+            except Exception as e:
+                print(f"[RISK_ASSESSOR] 데이터 리로드 실패 (기존 데이터 유지): {e}")
+                return False
+            self._index = index
+            self.version += 1
+        print(f"[RISK_ASSESSOR] 데이터 리로드 완료: {len(index['database'])}개 종 (version {self.version})")
+        return True
     
     def _load_risk_database(self) -> Dict:
         """위험도 데이터베이스 로드"""
@@ -42,6 +109,65 @@ class RiskAssessor:
             # 기본 데이터베이스 반환
             return self._get_default_database()
     
+    def _build_index(self, database: Dict) -> Dict:
+        """
+        종별 평가 결과를 미리 계산하고 조회 인덱스 구축
+
+        - database: 원본 위험도 데이터베이스
+        - results: 국명 -> 읽기 전용 평가 결과
+        - scientific: 학명 -> 국명 (정확 매칭)
+        - sorted_scientific: (학명, 국명) 정렬 목록 (접두어/속명 매칭)
+        - db_order: 국명 -> DB 내 순서 (여러 종이 매칭될 때 기존 우선순위 유지)
+        """
+        results = {}
+        scientific_index = {}
+        db_order = {}
+        
+        for position, (korean_name, data) in enumerate(database.items()):
+            results[korean_name] = _freeze(self._format_risk_result(korean_name, data))
+            db_order[korean_name] = position
+            scientific = data.get("scientific_name", "")
+            if scientific:
+                scientific_index.setdefault(scientific, korean_name)
+        
+        return {
+            "database": database,
+            "results": results,
+            "scientific": scientific_index,
+            "sorted_scientific": sorted(scientific_index.items()),
+            "db_order": db_order
+        }
+    
+    def _find_partial_match(self, species_name: str, index: Dict) -> Optional[str]:
+        """
+        부분 매칭 (속명 또는 학명 포함 관계)
+
+        - 입력이 학명의 접두어인 경우 (예: 속명 "Vespa"): 정렬 목록에서 이진 탐색
+        - 학명이 입력에 포함된 경우: 입력의 부분 문자열을 학명 인덱스에서 조회
+        """
+        if not species_name:
+            return None
+        
+        candidates = []
+        
+        sorted_scientific = index["sorted_scientific"]
+        position = bisect_left(sorted_scientific, (species_name,))
+        while (position < len(sorted_scientific)
+               and sorted_scientific[position][0].startswith(species_name)):
+            candidates.append(sorted_scientific[position][1])
+            position += 1
+        
+        length = len(species_name)
+        for start in range(length):
+            for end in range(start + 1, length + 1):
+                korean_name = index["scientific"].get(species_name[start:end])
+                if korean_name is not None:
+                    candidates.append(korean_name)
+        
+        if not candidates:
+            return None
+        return min(candidates, key=index["db_order"].__getitem__)
+    
     def _get_default_database(self) -> Dict:
         """기본 위험도 데이터베이스"""
         return {
@@ -188,22 +314,25 @@ class RiskAssessor:
             species_name: 종 이름 (국명 또는 학명)
             
         Returns:
-            위험도 평가 결과 딕셔너리
+            위험도 평가 결과 (읽기 전용 FrozenDict, 종별로 미리 계산됨)
         """
+        # 리로드 중에도 한 요청은 같은 인덱스를 사용
+        index = self._index
+        
         # 국명으로 검색
-        if species_name in self.risk_database:
-            return self._format_risk_result(species_name, self.risk_database[species_name])
+        result = index["results"].get(species_name)
+        if result is not None:
+            return result
         
         # 학명으로 검색
-        for korean_name, data in self.risk_database.items():
-            if data.get("scientific_name") == species_name:
-                return self._format_risk_result(korean_name, data)
+        korean_name = index["scientific"].get(species_name)
+        if korean_name is not None:
+            return index["results"][korean_name]
         
         # 부분 매칭 (속명 또는 과명)
-        for korean_name, data in self.risk_database.items():
-            scientific = data.get("scientific_name", "")
-            if species_name in scientific or scientific in species_name:
-                return self._format_risk_result(korean_name, data)
+        korean_name = self._find_partial_match(species_name, index)
+        if korean_name is not None:
+            return index["results"][korean_name]
         
         return None
     
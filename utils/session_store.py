@@ -0,0 +1,380 @@
+"""
+서버 측 세션 저장소 모듈
+
+탐지 결과(last_detection)에는 바운딩 박스, 분류 결과, 위험도, 상세 정보가 모두
+들어 있어 쿠키 세션으로 보내기에는 너무 큽니다. 세션 내용은 서버에 저장하고
+쿠키에는 세션 ID만 담습니다.
+
+- 메모리 LRU 캐시 + SQLite 저장소 (SQLite는 재시작/여러 워커 간 공유용)
+- 마지막 접근(조회/저장) 후 TTL이 지나면 자동 삭제 (조회만 하는 세션도 만료 시각 연장)
+- Flask 태그 JSON(공백 없음) + zlib 압축으로 저장
+- 세션별 부가 항목(session_items): 요청 밖(백그라운드 작업)에서 만든 결과를 세션에 전달할 때 사용.
+  세션 본문을 직접 고치면 같은 세션의 요청과 경쟁하므로, 항목으로 남기고 다음 요청이 세션에 반영합니다.
+"""
+
+import os
+import secrets
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+
+class SessionStore:
+    """세션 데이터 저장소 (메모리 LRU + SQLite)"""
+
+    def __init__(self, db_path=None, max_entries: int = 256, ttl_seconds: int = 6 * 3600,
+                 purge_interval: int = 300, touch_interval: int = 60):
+        """
+        초기화
+
+        Args:
+            db_path: SQLite 파일 경로 (None이면 메모리만 사용)
+            max_entries: 메모리에 보관할 최대 세션 수
+            ttl_seconds: 마지막 접근(조회/저장) 이후 세션 유지 시간 (초)
+            purge_interval: 만료 세션 정리 주기 (초)
+            touch_interval: 조회 시 만료 시각을 연장하는 최소 간격 (초, 요청마다 SQLite에 쓰지 않도록)
+        """
+        self.db_path = Path(db_path) if db_path else None
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.purge_interval = purge_interval
+        self.touch_interval = min(touch_interval, ttl_seconds)
+
+        # sid -> (압축된 데이터, revision, 만료 시각)
+        self._memory = OrderedDict()
+        # (sid, 항목 키) -> (데이터, 만료 시각) - SQLite를 쓰지 않을 때의 부가 항목
+        self._items = {}
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+        self._last_purge = time.time()
+        self.hits = 0
+        self.misses = 0
+
+        if self.db_path:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            with self._lock:
+                self._connection()
+
+    def _connection(self) -> sqlite3.Connection:
+        """SQLite 연결 (fork된 워커에서는 새로 연결, 잠금 안에서 호출)"""
+        if self._conn is None or self._conn_pid != os.getpid():
+            self._conn = sqlite3.connect(str(self.db_path), timeout=5, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " sid TEXT PRIMARY KEY,"
+                " data BLOB NOT NULL,"
+                " revision INTEGER NOT NULL,"
+                " expires_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS session_items ("
+                " sid TEXT NOT NULL,"
+                " item_key TEXT NOT NULL,"
+                " data BLOB NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " PRIMARY KEY (sid, item_key))"
+            )
+            self._conn.commit()
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    @staticmethod
+    def new_sid() -> str:
+        """추측할 수 없는 세션 ID 생성"""
+        return secrets.token_urlsafe(32)
+
+    def _remember(self, sid: str, blob: bytes, revision: int, expires_at: float):
+        self._memory[sid] = (blob, revision, expires_at)
+        self._memory.move_to_end(sid)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _touch(self, sid: str, expires_at: float, now: float) -> float:
+        """
+        조회한 세션의 만료 시각 연장 (잠금 안에서 호출, 부가 항목 포함)
+
+        마지막 연장 후 touch_interval이 지나지 않았으면 그대로 둡니다.
+
+        Returns:
+            새 만료 시각
+        """
+        new_expires_at = now + self.ttl_seconds
+        if new_expires_at - expires_at < self.touch_interval:
+            return expires_at
+        cached = self._memory.get(sid)
+        if cached is not None:
+            self._memory[sid] = (cached[0], cached[1], new_expires_at)
+        for key in [key for key in self._items if key[0] == sid]:
+            self._items[key] = (self._items[key][0], new_expires_at)
+        if self.db_path is not None:
+            conn = self._connection()
+            conn.execute("UPDATE sessions SET expires_at = ? WHERE sid = ?", (new_expires_at, sid))
+            conn.execute("UPDATE session_items SET expires_at = ? WHERE sid = ?", (new_expires_at, sid))
+            conn.commit()
+        return new_expires_at
+
+    def get(self, sid: str) -> Optional[bytes]:
+        """
+        세션 데이터 조회 (만료 시각 연장)
+
+        다른 워커가 같은 세션을 갱신했을 수 있으므로, SQLite를 쓰는 경우
+        revision만 확인하여 메모리 사본이 최신일 때만 재사용합니다.
+
+        Returns:
+            압축된 세션 데이터 또는 None (없거나 만료)
+        """
+        now = time.time()
+        with self._lock:
+            cached = self._memory.get(sid)
+            if cached is not None and cached[2] < now:
+                del self._memory[sid]
+                cached = None
+
+            if self.db_path is None:
+                if cached is None:
+                    self.misses += 1
+                    return None
+                self._memory.move_to_end(sid)
+                self._touch(sid, cached[2], now)
+                self.hits += 1
+                return cached[0]
+
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT revision, expires_at FROM sessions WHERE sid = ?", (sid,)
+            ).fetchone()
+            if row is None or row[1] < now:
+                self._memory.pop(sid, None)
+                self.misses += 1
+                return None
+
+            if cached is not None and cached[1] == row[0]:
+                self._memory.move_to_end(sid)
+                self._touch(sid, row[1], now)
+                self.hits += 1
+                return cached[0]
+
+            blob = conn.execute("SELECT data FROM sessions WHERE sid = ?", (sid,)).fetchone()[0]
+            self._remember(sid, blob, row[0], row[1])
+            self._touch(sid, row[1], now)
+            self.misses += 1
+            return blob
+
+    def set(self, sid: str, blob: bytes):
+        """세션 데이터 저장 (만료 시각 갱신)"""
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        with self._lock:
+            revision = 1
+            if self.db_path is not None:
+                conn = self._connection()
+                row = conn.execute("SELECT revision FROM sessions WHERE sid = ?", (sid,)).fetchone()
+                revision = row[0] + 1 if row else 1
+                conn.execute(
+                    "INSERT OR REPLACE INTO sessions (sid, data, revision, expires_at) VALUES (?, ?, ?, ?)",
+                    (sid, sqlite3.Binary(blob), revision, expires_at)
+                )
+                conn.commit()
+            self._remember(sid, blob, revision, expires_at)
+
+            if now - self._last_purge >= self.purge_interval:
+                self._purge_expired(now)
+
+    def delete(self, sid: str):
+        """세션 삭제 (부가 항목 포함)"""
+        with self._lock:
+            self._memory.pop(sid, None)
+            for key in [key for key in self._items if key[0] == sid]:
+                del self._items[key]
+            if self.db_path is not None:
+                conn = self._connection()
+                conn.execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+                conn.execute("DELETE FROM session_items WHERE sid = ?", (sid,))
+                conn.commit()
+
+    def set_item(self, sid: str, item_key: str, blob: bytes):
+        """
+        세션 부가 항목 저장 (모든 워커가 읽을 수 있음, 세션 TTL과 같이 만료)
+
+        Args:
+            sid: 세션 ID
+            item_key: 항목 키 (세션 안에서 유일)
+            blob: 저장할 데이터
+        """
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            if self.db_path is None:
+                self._items[(sid, item_key)] = (blob, expires_at)
+                return
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO session_items (sid, item_key, data, expires_at) VALUES (?, ?, ?, ?)",
+                (sid, item_key, sqlite3.Binary(blob), expires_at)
+            )
+            conn.commit()
+
+    def get_item(self, sid: str, item_key: str) -> Optional[bytes]:
+        """세션 부가 항목 조회 (없거나 만료되었으면 None)"""
+        now = time.time()
+        with self._lock:
+            if self.db_path is None:
+                item = self._items.get((sid, item_key))
+                return item[0] if item and item[1] >= now else None
+            row = self._connection().execute(
+                "SELECT data, expires_at FROM session_items WHERE sid = ? AND item_key = ?", (sid, item_key)
+            ).fetchone()
+            return bytes(row[0]) if row and row[1] >= now else None
+
+    def pop_item(self, sid: str, item_key: str) -> Optional[bytes]:
+        """세션 부가 항목을 꺼내고 삭제 (없거나 만료되었으면 None)"""
+        now = time.time()
+        with self._lock:
+            if self.db_path is None:
+                item = self._items.pop((sid, item_key), None)
+                return item[0] if item and item[1] >= now else None
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT data, expires_at FROM session_items WHERE sid = ? AND item_key = ?", (sid, item_key)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("DELETE FROM session_items WHERE sid = ? AND item_key = ?", (sid, item_key))
+            conn.commit()
+            return bytes(row[0]) if row[1] >= now else None
+
+    def _purge_expired(self, now: float):
+        """만료된 세션 정리 (잠금 안에서 호출)"""
+        expired = [sid for sid, (_, _, expires_at) in self._memory.items() if expires_at < now]
+        for sid in expired:
+            del self._memory[sid]
+
+        for key in [key for key, (_, expires_at) in self._items.items() if expires_at < now]:
+            del self._items[key]
+
+        removed = len(expired)
+        if self.db_path is not None:
+            conn = self._connection()
+            removed = conn.execute("DELETE FROM sessions WHERE expires_at < ?", (now,)).rowcount
+            conn.execute("DELETE FROM session_items WHERE expires_at < ?", (now,))
+            conn.commit()
+
+        self._last_purge = now
+        if removed:
+            print(f"[SESSION] 만료 세션 {removed}개 삭제")
+
+    def get_stats(self) -> Dict:
+        """저장소 통계"""
+        with self._lock:
+            return {
+                'memory_entries': len(self._memory),
+                'max_entries': self.max_entries,
+                'memory_bytes': sum(len(blob) for blob, _, _ in self._memory.values()),
+                'ttl_seconds': self.ttl_seconds,
+                'sqlite': str(self.db_path) if self.db_path else None,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    """서버 측에 저장되는 세션 (쿠키에는 sid만 저장)"""
+
+    def __init__(self, initial=None, sid: str = None, new: bool = False):
+        def on_update(self):
+            self.modified = True
+
+        CallbackDict.__init__(self, initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """Flask 세션 인터페이스 - 세션 내용을 SessionStore에 저장"""
+
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, store: SessionStore):
+        self.store = store
+
+    def encode(self, data: Dict) -> bytes:
+        """세션 dict -> 압축 바이트 (공백 없는 태그 JSON + zlib)"""
+        return zlib.compress(self.serializer.dumps(data).encode('utf-8'))
+
+    def decode(self, blob: bytes) -> Dict:
+        """압축 바이트 -> 세션 dict"""
+        return self.serializer.loads(zlib.decompress(blob).decode('utf-8'))
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            blob = self.store.get(sid)
+            if blob is not None:
+                try:
+                    return ServerSideSession(self.decode(blob), sid=sid)
+                except Exception as e:
+                    print(f"[SESSION] 세션 복원 오류: {e}")
+        return ServerSideSession(sid=self.store.new_sid(), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session:
+            # 비워진 세션은 저장소와 쿠키에서 모두 제거
+            if session.modified and not session.new:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        if session.modified or session.new:
+            self.store.set(session.sid, self.encode(dict(session)))
+
+        if not self.should_set_cookie(app, session) and not session.new:
+            return
+
+        response.set_cookie(
+            name,
+            session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app)
+        )
+
+
+# 싱글톤 인스턴스
+_session_store_instance = None
+
+def get_session_store() -> SessionStore:
+    """
+    세션 저장소 싱글톤 인스턴스 반환
+
+    환경 변수:
+        NEST_SESSION_DB: SQLite 경로 (기본 utils/data/sessions.sqlite3, 빈 값이면 메모리만 사용)
+        NEST_SESSION_TTL: 마지막 접근 이후 세션 유지 시간 초 (기본 21600)
+        NEST_SESSION_MEMORY: 메모리 LRU 크기 (기본 256)
+    """
+    global _session_store_instance
+    if _session_store_instance is None:
+        default_db = Path(__file__).parent / "data" / "sessions.sqlite3"
+        db_path = os.environ.get("NEST_SESSION_DB", str(default_db))
+        _session_store_instance = SessionStore(
+            db_path=db_path or None,
+            max_entries=int(os.environ.get("NEST_SESSION_MEMORY", "256")),
+            ttl_seconds=int(os.environ.get("NEST_SESSION_TTL", str(6 * 3600)))
+        )
+    return _session_store_instance
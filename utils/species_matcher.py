@@ -5,12 +5,16 @@ CSV 파일의 종 정보를 사용하여 학명과 국명을 매칭하고
 계통분류 정보를 제공합니다.
 """
 
+import numpy as np
 import pandas as pd
 import re
 from pathlib import Path
 from typing import Dict, Optional, List
 
 
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
 class SpeciesMatcher:
     """곤충 종 매칭 클래스"""
     
@@ -26,6 +30,13 @@ class SpeciesMatcher:
         
         self.csv_path = Path(csv_path)
         self.species_data = None
+        
+        # 조회용 인덱스 (load_species_data에서 구축)
+        self._normalized_scientific = pd.Series([], dtype=object)
+        self._scientific_index = {}
+        self._korean_index = {}
+        self._genus_index = {}
+        self._taxonomy_columns = {}
         self.load_species_data()
     
     def load_species_data(self):
@@ -53,6 +64,7 @@ class SpeciesMatcher:
                             break
                 
                 print(f"[SPECIES_MATCHER] 컬럼: {list(self.species_data.columns)}")
+                self._build_indexes()
             else:
                 print(f"[SPECIES_MATCHER] CSV 파일을 찾을 수 없음: {self.csv_path}")
                 self.species_data = pd.DataFrame()
@@ -60,6 +72,55 @@ class SpeciesMatcher:
             print(f"[SPECIES_MATCHER] 데이터 로드 오류: {str(e)}")
             self.species_data = pd.DataFrame()
     
+    def _build_indexes(self):
+        """
+        정규화된 학명 컬럼과 학명/국명/속명 딕셔너리 인덱스 구축
+        
+        같은 키가 여러 행에 있으면 CSV에서 먼저 나온 행을 사용합니다
+        (기존 순차 검색과 동일한 우선순위).
+        """
+        data = self.species_data
+        row_count = len(data)
+        
+        if 'scientific_name' in data.columns:
+            normalized = (data['scientific_name'].fillna('').astype(str)
+                          .str.replace('_', ' ', regex=False)
+                          .str.replace(_WHITESPACE_RE, ' ', regex=True)
+                          .str.strip())
+            self._normalized_scientific = normalized.reset_index(drop=True)
+        else:
+            self._normalized_scientific = pd.Series([''] * row_count, dtype=object)
+        
+        self._scientific_index = {}
+        self._genus_index = {}
+        for pos, name in enumerate(self._normalized_scientific):
+            if not name:
+                continue
+            self._scientific_index.setdefault(name, pos)
+            parts = name.split(' ')
+            if len(parts) >= 2:
+                self._genus_index.setdefault(parts[0], pos)
+        
+        self._korean_index = {}
+        if 'korean_name' in data.columns:
+            for pos, korean in enumerate(data['korean_name'].tolist()):
+                if pd.notna(korean) and str(korean):
+                    self._korean_index.setdefault(str(korean), pos)
+        
+        # 계통분류 검색용 문자열 컬럼 (한글 컬럼 우선)
+        self._taxonomy_columns = {}
+        for level, candidates in (('order', ('목', 'order')),
+                                  ('family', ('과', 'family')),
+                                  ('genus', ('속', 'genus'))):
+            column = next((c for c in candidates if c in data.columns), None)
+            if column is not None:
+                self._taxonomy_columns[level] = data[column].astype(str).reset_index(drop=True)
+            else:
+                self._taxonomy_columns[level] = pd.Series([''] * row_count, dtype=object)
+        
+        print(f"[SPECIES_MATCHER] 인덱스 구축 완료: 학명 {len(self._scientific_index)}개, "
+              f"국명 {len(self._korean_index)}개, 속 {len(self._genus_index)}개")
+    
     def normalize_name(self, name: str) -> str:
         """이름 정규화"""
         if not name:
@@ -69,7 +130,7 @@ class SpeciesMatcher:
         name = name.replace("_", " ")
         
         # 여러 공백을 하나로
-        name = re.sub(r'\s+', ' ', name)
+        name = _WHITESPACE_RE.sub(' ', name)
         
         # 앞뒤 공백 제거
         name = name.strip()
@@ -94,49 +155,60 @@ class SpeciesMatcher:
         normalized_input = self.normalize_name(species_name)
         
         # 1. 정확한 학명 매칭
-        if 'scientific_name' in self.species_data.columns:
-            for idx, row in self.species_data.iterrows():
-                scientific = str(row.get('scientific_name', ''))
-                if scientific and self.normalize_name(scientific) == normalized_input:
-                    print(f"[SPECIES_MATCHER] 학명 정확 매칭 성공: {scientific}")
-                    return self._format_species_info(row)
+        pos = self._scientific_index.get(normalized_input)
+        if pos is not None:
+            print(f"[SPECIES_MATCHER] 학명 정확 매칭 성공: {self._normalized_scientific.iat[pos]}")
+            return self._format_species_info(self.species_data.iloc[pos])
         
         # 2. 정확한 국명 매칭
-        if 'korean_name' in self.species_data.columns:
-            for idx, row in self.species_data.iterrows():
-                korean = str(row.get('korean_name', ''))
-                if korean and korean == species_name:
-                    print(f"[SPECIES_MATCHER] 국명 정확 매칭 성공: {korean}")
-                    return self._format_species_info(row)
+        pos = self._korean_index.get(species_name)
+        if pos is not None:
+            print(f"[SPECIES_MATCHER] 국명 정확 매칭 성공: {species_name}")
+            return self._format_species_info(self.species_data.iloc[pos])
         
         # 3. 부분 매칭 (속명 기준)
-        if 'scientific_name' in self.species_data.columns:
-            input_parts = normalized_input.split()
-            if len(input_parts) >= 2:
-                input_genus = input_parts[0]
-                
-                for idx, row in self.species_data.iterrows():
-                    scientific = str(row.get('scientific_name', ''))
-                    if scientific:
-                        scientific_parts = self.normalize_name(scientific).split()
-                        if len(scientific_parts) >= 2 and scientific_parts[0] == input_genus:
-                            print(f"[SPECIES_MATCHER] 속명 매칭 성공: {scientific}")
-                            return self._format_species_info(row)
+        input_parts = normalized_input.split()
+        if len(input_parts) >= 2:
+            pos = self._genus_index.get(input_parts[0])
+            if pos is not None:
+                print(f"[SPECIES_MATCHER] 속명 매칭 성공: {self._normalized_scientific.iat[pos]}")
+                return self._format_species_info(self.species_data.iloc[pos])
         
         # 4. 포함 관계 매칭
-        if 'scientific_name' in self.species_data.columns:
-            for idx, row in self.species_data.iterrows():
-                scientific = str(row.get('scientific_name', ''))
-                if scientific:
-                    normalized_scientific = self.normalize_name(scientific)
-                    if (normalized_input in normalized_scientific or 
-                        normalized_scientific in normalized_input):
-                        print(f"[SPECIES_MATCHER] 부분 매칭 성공: {scientific}")
-                        return self._format_species_info(row)
+        pos = self._find_containment_match(normalized_input)
+        if pos is not None:
+            print(f"[SPECIES_MATCHER] 부분 매칭 성공: {self._normalized_scientific.iat[pos]}")
+            return self._format_species_info(self.species_data.iloc[pos])
         
         print(f"[SPECIES_MATCHER] 매칭 실패: {species_name}")
         return None
     
+    def _find_containment_match(self, normalized_input: str) -> Optional[int]:
+        """
+        입력이 학명에 포함되거나 학명이 입력에 포함되는 첫 행의 위치 반환
+        
+        - 입력 ⊂ 학명: 정규화 학명 배열에 대한 벡터화 부분 문자열 검사
+        - 학명 ⊂ 입력: 입력의 부분 문자열을 학명 인덱스에서 조회
+          (CSV 크기와 무관하게 입력 길이에만 비례)
+        """
+        if not normalized_input or len(self._normalized_scientific) == 0:
+            return None
+        
+        candidates = []
+        
+        hits = np.flatnonzero(self._contains_mask(self._normalized_scientific, normalized_input))
+        if len(hits) > 0:
+            candidates.append(int(hits[0]))
+        
+        length = len(normalized_input)
+        for start in range(length):
+            for end in range(start + 1, length + 1):
+                pos = self._scientific_index.get(normalized_input[start:end])
+                if pos is not None:
+                    candidates.append(pos)
+        
+        return min(candidates) if candidates else None
+    
     def _format_species_info(self, row: pd.Series) -> Dict:
         """종 정보 포맷팅"""
         info = {}
@@ -209,31 +281,26 @@ class SpeciesMatcher:
         if self.species_data is None or self.species_data.empty:
             return []
         
-        results = []
+        mask = np.ones(len(self.species_data), dtype=bool)
         
-        for idx, row in self.species_data.iterrows():
-            match = True
-            
-            if order:
-                row_order = str(row.get('목', row.get('order', '')))
-                if order not in row_order:
-                    match = False
-            
-            if family and match:
-                row_family = str(row.get('과', row.get('family', '')))
-                if family not in row_family:
-                    match = False
-            
-            if genus and match:
-                row_genus = str(row.get('속', row.get('genus', '')))
-                scientific = str(row.get('scientific_name', ''))
-                if genus not in row_genus and not scientific.startswith(genus):
-                    match = False
-            
-            if match:
-                results.append(self._format_species_info(row))
+        if order:
+            mask &= self._contains_mask(self._taxonomy_columns['order'], order)
         
-        return results[:10]  # 최대 10개만 반환
+        if family:
+            mask &= self._contains_mask(self._taxonomy_columns['family'], family)
+        
+        if genus:
+            genus_mask = self._contains_mask(self._taxonomy_columns['genus'], genus)
+            genus_mask |= self._normalized_scientific.str.startswith(genus).to_numpy(dtype=bool)
+            mask &= genus_mask
+        
+        positions = np.flatnonzero(mask)[:10]  # 최대 10개만 반환
+        return [self._format_species_info(self.species_data.iloc[pos]) for pos in positions]
+    
+    @staticmethod
+    def _contains_mask(values: pd.Series, keyword: str) -> np.ndarray:
+        """문자열 컬럼에서 keyword를 포함하는 행의 불리언 마스크"""
+        return values.str.contains(keyword, regex=False).to_numpy(dtype=bool)
 
 
 # 싱글톤 인스턴스
@@ -0,0 +1,190 @@
+"""
+분류군 이름 해석 모듈
+
+모델이 출력한 원시 레이블(예: "Vespa_mandarinia (후보 #2)")을 정규화하고
+국명, 학명, 위험도 평가, 상세 정보를 하나의 레코드로 묶어 반환합니다.
+같은 이름은 프로세스당 한 번만 해석되도록 크기 제한이 있는 캐시를 사용합니다.
+"""
+
+import copy
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from utils.risk_assessor import get_risk_assessor
+from utils.info_provider import get_info_provider
+
+
+# 계층 깊은 순서 (종 -> 속 -> 과 -> 목)
+TAXON_LEVELS = ('species', 'genus', 'family', 'order')
+
+
+def clean_taxon_label(label: str) -> str:
+    """
+    모델 레이블 정리
+
+    후보 표시를 제거하고 언더스코어를 공백으로 변환합니다.
+    예: "Vespa_mandarinia (후보 #2)" -> "Vespa mandarinia"
+    """
+    if not label:
+        return ""
+    return label.split(' (후보')[0].strip().replace('_', ' ')
+
+
+def extract_taxon_label(result: Dict) -> Optional[str]:
+    """
+    분류 결과에서 가장 깊은 계층의 이름 추출
+
+    hierarchical_result를 우선 사용하고, 없으면 classification 리스트를
+    종 -> 속 -> 과 -> 목 순으로 검색합니다.
+
+    Args:
+        result: classify_detections가 반환한 단일 분류 결과
+
+    Returns:
+        원시 레이블 또는 None
+    """
+    if not isinstance(result, dict):
+        return None
+
+    hier_result = result.get('hierarchical_result')
+    if hier_result:
+        for level in TAXON_LEVELS:
+            if hier_result.get(level):
+                return hier_result[level]
+
+    for cls in reversed(result.get('classification') or []):
+        if cls.get('level') in TAXON_LEVELS and cls.get('class_name'):
+            return cls['class_name']
+
+    return None
+
+
+class TaxonResolver:
+    """
+    레이블 -> 정규 분류군 레코드 해석기 (LRU 캐시)
+
+    캐시 키에는 정보/위험도 DB의 version이 포함되므로, 데이터 파일이
+    리로드되면 이전 레코드는 더 이상 사용되지 않습니다.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        """
+        초기화
+
+        Args:
+            max_entries: 캐시에 보관할 최대 이름 수
+        """
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._cache_version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def resolve(self, label: str) -> Optional[Dict]:
+        """
+        원시 레이블을 분류군 레코드로 해석
+
+        Args:
+            label: 모델 레이블, 학명 또는 국명
+
+        Returns:
+            {
+                'label': 정리된 이름,
+                'korean_name': 국명,
+                'scientific_name': 학명,
+                'risk': RiskAssessor.assess_risk 결과 또는 None,
+                'info': InfoProvider.get_info 결과 또는 None
+            }
+            레이블이 비어 있으면 None. 반환값은 캐시와 분리된 사본입니다.
+        """
+        name = clean_taxon_label(label)
+        if not name:
+            return None
+
+        key = (self.data_version(), name)
+
+        with self._lock:
+            if key[0] != self._cache_version:
+                # 데이터가 리로드되었으면 이전 버전 레코드 폐기
+                self._cache.clear()
+                self._cache_version = key[0]
+            record = self._cache.get(key)
+            if record is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(record)
+
+        record = self._build_record(name)
+
+        with self._lock:
+            self.misses += 1
+            if key[0] == self._cache_version:
+                self._cache[key] = record
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+
+        return copy.deepcopy(record)
+
+    @staticmethod
+    def data_version() -> tuple:
+        """(정보 DB version, 위험도 DB version)"""
+        return (get_info_provider().version, get_risk_assessor().version)
+
+    def _build_record(self, name: str) -> Dict:
+        """정보 DB와 위험도 DB를 한 번씩 조회하여 레코드 생성"""
+        info = get_info_provider().get_info(name)
+
+        korean_name = None
+        scientific_name = None
+        if info:
+            korean_name = info.get('korean_name') or info.get('species_name')
+            scientific_name = info.get('scientific_name')
+
+        assessor = get_risk_assessor()
+        risk = assessor.assess_risk(name)
+        if risk is None and korean_name and korean_name != name:
+            risk = assessor.assess_risk(korean_name)
+        if risk:
+            korean_name = korean_name or risk.get('species_name')
+            scientific_name = scientific_name or risk.get('scientific_name')
+
+        print(f"[TAXON_RESOLVER] 해석 완료: '{name}' -> 국명: {korean_name}, "
+              f"위험도: {risk is not None}, 정보: {info is not None}")
+
+        return {
+            'label': name,
+            'korean_name': korean_name or '',
+            'scientific_name': scientific_name or '',
+            'risk': risk,
+            'info': info
+        }
+
+    def clear(self):
+        """캐시 초기화"""
+        with self._lock:
+            self._cache.clear()
+
+    def get_stats(self) -> Dict:
+        """캐시 통계"""
+        with self._lock:
+            return {
+                'data_version': self._cache_version,
+                'entries': len(self._cache),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+# 싱글톤 인스턴스
+_taxon_resolver_instance = None
+
+def get_taxon_resolver() -> TaxonResolver:
+    """분류군 해석기 싱글톤 인스턴스 반환"""
+    global _taxon_resolver_instance
+    if _taxon_resolver_instance is None:
+        _taxon_resolver_instance = TaxonResolver()
+    return _taxon_resolver_instance
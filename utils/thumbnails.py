@@ -0,0 +1,199 @@
+"""
+썸네일 생성 모듈
+
+게시판/지도 화면이 원본 사진(수 MB) 대신 작은 WebP 썸네일을 받도록, 업로드 시
+백그라운드 스레드 풀에서 여러 크기(기본 256px, 768px)의 썸네일을 만듭니다.
+파일 이름은 원본 내용 해시 기반이라 내용이 바뀌지 않는 한 영구 캐시할 수 있습니다.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+
+THUMBNAIL_SIZES = (256, 768)
+# thumbnail_name 형식 (index.json, 작성 중인 *.tmp 등은 제외)
+THUMBNAIL_NAME_RE = re.compile(r'^[0-9a-f]{32}_\d+\.webp$')
+
+
+def file_sha256(path, chunk_size: int = 64 * 1024) -> str:
+    """파일 SHA-256 (업로드 시 해시가 없던 기존 파일용)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ThumbnailStore:
+    """내용 주소 기반 썸네일 저장소"""
+
+    def __init__(self, thumb_dir, sizes: Tuple[int, ...] = THUMBNAIL_SIZES,
+                 quality: int = 80, workers: int = 2):
+        """
+        초기화
+
+        Args:
+            thumb_dir: 썸네일 저장 디렉토리
+            sizes: 생성할 썸네일 긴 변 크기 목록 (px)
+            quality: WebP 품질
+            workers: 백그라운드 생성 스레드 수
+        """
+        self.thumb_dir = Path(thumb_dir)
+        self.thumb_dir.mkdir(parents=True, exist_ok=True)
+        self.sizes = tuple(sorted(sizes))
+        self.quality = quality
+
+        # 업로드 파일명 -> 내용 해시
+        self.index_path = self.thumb_dir / "index.json"
+        self._index_mtime = None
+        self._index = self._load_index()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnail")
+
+    def _load_index(self) -> Dict[str, str]:
+        try:
+            self._index_mtime = self.index_path.stat().st_mtime_ns
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _refresh_index(self):
+        """다른 워커 프로세스가 인덱스를 갱신했으면 다시 읽기 (잠금 안에서 호출)"""
+        try:
+            mtime = self.index_path.stat().st_mtime_ns
+        except OSError:
+            return
+        if mtime != self._index_mtime:
+            self._index.update(self._load_index())
+
+    def _save_index(self):
+        """인덱스 저장 (잠금 안에서 호출)"""
+        tmp_path = self.index_path.with_name(f"index.json.{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, self.index_path)
+        self._index_mtime = self.index_path.stat().st_mtime_ns
+
+    @staticmethod
+    def thumbnail_name(content_hash: str, size: int) -> str:
+        """썸네일 파일 이름 (내용 해시 + 크기)"""
+        return f"{content_hash[:32]}_{size}.webp"
+
+    @staticmethod
+    def is_thumbnail_name(name: str) -> bool:
+        """thumbnail_name으로 만든 이름인지 (내용 해시 기반이라 영구 캐시해도 되는 파일)"""
+        return bool(THUMBNAIL_NAME_RE.match(name))
+
+    def _build(self, source_path: Path, content_hash: str):
+        """원본에서 모든 크기 썸네일 생성 (큰 크기부터, 이미 있으면 건너뜀)"""
+        targets = [
+            (size, self.thumb_dir / self.thumbnail_name(content_hash, size))
+            for size in reversed(self.sizes)
+        ]
+        if all(path.exists() for _, path in targets):
+            return
+
+        with Image.open(source_path) as img:
+            # JPEG은 필요한 크기 근처로 축소 디코딩
+            img.draft('RGB', (self.sizes[-1], self.sizes[-1]))
+            # 휴대폰 사진 회전 정보 반영
+            image = ImageOps.exif_transpose(img)
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGB')
+
+            for size, path in targets:
+                image.thumbnail((size, size), Image.LANCZOS)
+                if path.exists():
+                    continue
+                tmp_path = path.with_name(path.name + '.tmp')
+                image.save(tmp_path, 'WEBP', quality=self.quality, method=4)
+                os.replace(tmp_path, path)
+
+    def _run(self, source_path: Path, filename: str, content_hash: Optional[str]):
+        try:
+            if content_hash is None:
+                content_hash = file_sha256(source_path)
+            self._build(source_path, content_hash)
+            with self._lock:
+                self._refresh_index()
+                self._index[filename] = content_hash
+                self._save_index()
+        except Exception as e:
+            print(f"[THUMBNAIL] 생성 실패 ({filename}): {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(filename)
+
+    def submit(self, source_path, filename: str, content_hash: str = None):
+        """
+        썸네일 생성 예약 (백그라운드)
+
+        Args:
+            source_path: 원본 이미지 경로
+            filename: 업로드 파일명 (템플릿에서 조회할 키)
+            content_hash: 원본 SHA-256 (없으면 작업 스레드에서 계산)
+        """
+        with self._lock:
+            if filename in self._pending:
+                return
+            self._pending.add(filename)
+        self._executor.submit(self._run, Path(source_path), filename, content_hash)
+
+    def get_name(self, filename: str, size: int) -> Optional[str]:
+        """
+        업로드 파일의 썸네일 이름
+
+        Returns:
+            썸네일 파일 이름 또는 None (아직 생성되지 않음)
+        """
+        size = min((s for s in self.sizes if s >= size), default=self.sizes[-1])
+        with self._lock:
+            content_hash = self._index.get(filename)
+            if content_hash is None:
+                self._refresh_index()
+                content_hash = self._index.get(filename)
+        if content_hash is None:
+            return None
+        name = self.thumbnail_name(content_hash, size)
+        return name if (self.thumb_dir / name).exists() else None
+
+    def get_stats(self) -> Dict:
+        """저장소 통계"""
+        with self._lock:
+            return {
+                'indexed': len(self._index),
+                'pending': len(self._pending),
+                'sizes': list(self.sizes),
+                'quality': self.quality
+            }
+
+
+# 싱글톤 인스턴스
+_thumbnail_store_instance = None
+
+def get_thumbnail_store() -> ThumbnailStore:
+    """
+    썸네일 저장소 싱글톤 인스턴스 반환
+
+    환경 변수:
+        NEST_THUMBNAIL_DIR: 저장 디렉토리 (기본: 프로젝트/cache/thumbnails)
+        NEST_THUMBNAIL_QUALITY: WebP 품질 (기본 80)
+    """
+    global _thumbnail_store_instance
+    if _thumbnail_store_instance is None:
+        default_dir = Path(__file__).parent.parent / "cache" / "thumbnails"
+        _thumbnail_store_instance = ThumbnailStore(
+            thumb_dir=os.environ.get("NEST_THUMBNAIL_DIR", str(default_dir)),
+            quality=int(os.environ.get("NEST_THUMBNAIL_QUALITY", "80"))
+        )
+    return _thumbnail_store_instance
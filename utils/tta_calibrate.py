@@ -0,0 +1,150 @@
+"""
+adaptive TTA 임계값 조정 모듈
+
+평가용 크롭 이미지마다 원본 1회 추론과 TTA(원본/반전/회전 평균) 추론을 한 번씩 수행한 뒤,
+(top-1 확률 차, 정규화 엔트로피) 임계값 조합별로 adaptive 방식의 정확도와 TTA 생략 비율을
+계산합니다. 항상 TTA를 쓸 때보다 정확도가 --tolerance 이상 떨어지지 않는 조합 중
+가장 많이 생략하는 값을 추천합니다.
+
+평가 세트는 목 이름별 하위 폴더에 크롭 이미지를 둡니다 (폴더 이름 = 정답 목):
+
+    eval_crops/
+        Coleoptera/*.jpg
+        Hymenoptera/*.jpg
+
+사용법:
+    python -m utils.tta_calibrate eval_crops/
+    python -m utils.tta_calibrate eval_crops/ --tolerance 0.002 --batch-size 64
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.webp'}
+MARGIN_GRID = [round(0.05 * i, 2) for i in range(0, 20)]
+ENTROPY_GRID = [round(0.05 * i, 2) for i in range(1, 21)]
+
+
+def collect_eval_set(eval_dir: Path) -> List[Tuple[Path, str]]:
+    """평가 세트 폴더 -> [(이미지 경로, 정답 목 이름), ...]"""
+    samples = []
+    for class_dir in sorted(p for p in eval_dir.iterdir() if p.is_dir()):
+        for path in sorted(class_dir.rglob('*')):
+            if path.suffix.lower() in IMAGE_EXTENSIONS:
+                samples.append((path, class_dir.name))
+    return samples
+
+
+def sweep_thresholds(plain_probs: np.ndarray, tta_probs: np.ndarray, labels: np.ndarray,
+                     tolerance: float = 0.005) -> Dict:
+    """
+    임계값 조합별 adaptive 정확도/생략 비율 계산
+
+    Args:
+        plain_probs: (N, C) 원본 1회 추론 확률
+        tta_probs: (N, C) TTA 평균 확률
+        labels: (N,) 정답 클래스 인덱스
+        tolerance: 허용할 정확도 하락 (0.005 = 0.5%p)
+
+    Returns:
+        {'plain_accuracy', 'tta_accuracy', 'grid': [...], 'best': {...} 또는 None}
+    """
+    from utils.classifier import prediction_uncertainty
+
+    plain_correct = plain_probs.argmax(1) == labels
+    tta_correct = tta_probs.argmax(1) == labels
+    uncertainty = np.array([prediction_uncertainty(p) for p in plain_probs])
+    margins, entropies = uncertainty[:, 0], uncertainty[:, 1]
+
+    tta_accuracy = float(tta_correct.mean())
+    grid = []
+    for min_margin in MARGIN_GRID:
+        for max_entropy in ENTROPY_GRID:
+            # tta_needed와 같은 조건: 확률 차가 충분하고 엔트로피가 낮으면 원본 결과 사용
+            skip = (margins >= min_margin) & (entropies <= max_entropy)
+            accuracy = float(np.where(skip, plain_correct, tta_correct).mean())
+            grid.append({
+                'min_margin': min_margin,
+                'max_entropy': max_entropy,
+                'accuracy': accuracy,
+                'skip_rate': float(skip.mean())
+            })
+
+    eligible = [row for row in grid if row['accuracy'] >= tta_accuracy - tolerance]
+    best = max(eligible, key=lambda row: (row['skip_rate'], row['accuracy'], row['min_margin'])) if eligible else None
+    return {
+        'plain_accuracy': float(plain_correct.mean()),
+        'tta_accuracy': tta_accuracy,
+        'grid': grid,
+        'best': best
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="adaptive TTA 임계값 조정")
+    parser.add_argument('eval_dir', help="목 이름별 하위 폴더에 크롭 이미지가 있는 평가 세트")
+    parser.add_argument('--tolerance', type=float, default=0.005, help="허용 정확도 하락 (기본 0.005 = 0.5%%p)")
+    parser.add_argument('--batch-size', type=int, default=32, help="추론 배치 크기 (기본 32)")
+    parser.add_argument('--model', default=None, help="목 분류 모델 경로 (기본: utils/models/order/)")
+    args = parser.parse_args(argv)
+
+    samples = collect_eval_set(Path(args.eval_dir))
+    if not samples:
+        print("[TTA_CALIBRATE] 평가 이미지가 없습니다.")
+        return 1
+
+    from utils.classifier import InsectClassifier, read_rgb_image
+    classifier = InsectClassifier(model_path=args.model)
+
+    unknown = sorted({label for _, label in samples if label not in classifier.order_to_idx})
+    if unknown:
+        print(f"[TTA_CALIBRATE] 모델에 없는 목 폴더는 제외: {', '.join(unknown)}")
+    samples = [(path, label) for path, label in samples if label in classifier.order_to_idx]
+    if not samples:
+        return 1
+
+    images = [read_rgb_image(path) for path, _ in samples]
+    labels = np.array([classifier.order_to_idx[label] for _, label in samples])
+
+    plain_sums, plain_counts = classifier._forward_views(images, classifier.tta_transforms[:1], args.batch_size)
+    extra_sums, extra_counts = classifier._forward_views(images, classifier.tta_transforms[1:], args.batch_size)
+    # 변환에 실패한 이미지는 제외
+    valid = [i for i in range(len(images)) if plain_counts[i] and extra_counts[i]]
+    plain_probs = np.stack([plain_sums[i] / plain_counts[i] for i in valid])
+    tta_probs = np.stack([
+        (plain_sums[i] + extra_sums[i]) / (plain_counts[i] + extra_counts[i]) for i in valid
+    ])
+    labels = labels[valid]
+
+    report = sweep_thresholds(plain_probs, tta_probs, labels, args.tolerance)
+    print(f"[TTA_CALIBRATE] {len(valid)}장")
+    print(f"  원본 1회 정확도 : {report['plain_accuracy'] * 100:.2f}%")
+    print(f"  항상 TTA 정확도 : {report['tta_accuracy'] * 100:.2f}%")
+
+    current = next(
+        (row for row in report['grid']
+         if row['min_margin'] == round(classifier.tta_min_margin, 2) and row['max_entropy'] == round(classifier.tta_max_entropy, 2)),
+        None
+    )
+    if current:
+        print(f"  현재 설정 (margin {current['min_margin']}, entropy {current['max_entropy']}): "
+              f"정확도 {current['accuracy'] * 100:.2f}%, TTA 생략 {current['skip_rate'] * 100:.1f}%")
+
+    best = report['best']
+    if best is None:
+        print("[TTA_CALIBRATE] 허용 범위 안의 조합이 없습니다. 항상 TTA 사용: NEST_TTA_MODE=always")
+        return 0
+    print(f"  추천 (margin {best['min_margin']}, entropy {best['max_entropy']}): "
+          f"정확도 {best['accuracy'] * 100:.2f}%, TTA 생략 {best['skip_rate'] * 100:.1f}%")
+    print()
+    print(f"NEST_TTA_MODE=adaptive NEST_TTA_MIN_MARGIN={best['min_margin']} NEST_TTA_MAX_ENTROPY={best['max_entropy']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())